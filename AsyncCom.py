@@ -0,0 +1,117 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Callable
+
+from Com import Com
+from Message import Message, MsgKind
+from Synchronize import GLOBAL_BARRIER
+from Token import DEFAULT_RESOURCE
+
+class AsyncCom:
+    """
+    Façade asyncio d'un `Com`, pour les applications basées sur une boucle d'évènements.
+    Aucune attente ne bloque de thread :
+    - les primitives à `Future` du `Com` (ACKs, barrière, SC) sont attendues via
+      `asyncio.wrap_future`
+    - la BAL prévient la boucle par un listener (`call_soon_threadsafe`) seulement
+      quand une coroutine attend un message
+    """
+
+    def __init__(self, com: Com, loop: asyncio.AbstractEventLoop | None = None):
+        """ À construire depuis la boucle (ou en lui passant `loop`)."""
+        self.com = com
+        self.loop = loop or asyncio.get_running_loop()
+        self._arrival = asyncio.Event()
+        self._waiting = 0
+        com.mailbox.add_listener(self._on_put)
+
+    def close(self):
+        """ Détache la façade de la BAL (le `Com` reste ouvert)."""
+        self.com.mailbox.remove_listener(self._on_put)
+
+    @property
+    def id(self) -> int:
+        return self.com.id
+
+    # === Envois asynchrones (non bloquants par nature) ===
+    def broadcast(self, payload: object):
+        self.com.broadcast(payload)
+
+    def send_to(self, payload: object, dest: int):
+        self.com.sendTo(payload, dest)
+
+    # === Réception ===
+    async def receive(self, predicate: Callable[[Message], bool] | None = None,
+                      timeout: float | None = None) -> Message | None:
+        """ Attend le premier message (ou le premier qui satisfait `predicate`).
+        Retourne None si `timeout` expire."""
+        return await self._get(timeout, predicate=predicate)
+
+    async def recv_from(self, from_id: int, timeout: float | None = None) -> Message | None:
+        """ Attend le prochain message utilisateur de `from_id`."""
+        return await self._get(timeout, sender=from_id, kind=MsgKind.USER)
+
+    # === Primitives synchrones ===
+    async def broadcast_sync(self, payload: object, **kwargs):
+        """ Diffuse et attend les N-1 ACK (`timeout`/`retries` comme `Com`)."""
+        await asyncio.wrap_future(self.com.broadcastSyncAsync(payload, **kwargs))
+
+    async def send_to_sync(self, payload: object, dest: int, **kwargs):
+        """ Envoie à `dest` et attend son ACK."""
+        await asyncio.wrap_future(self.com.sendToSyncAsync(payload, dest, **kwargs))
+
+    async def synchronize(self, name: str = GLOBAL_BARRIER, members: list[int] | None = None) -> int:
+        """ Barrière (globale par défaut, ou nommée sur un sous-groupe)."""
+        return await asyncio.wrap_future(self.com.synchronizeAsync(name, members))
+
+    @asynccontextmanager
+    async def critical_section(self, resource: str = DEFAULT_RESOURCE, shared: bool = False):
+        """ `async with acom.critical_section("db"): ...` : requestSC / releaseSC.
+        Si la coroutine est annulée pendant l'attente, la SC est rendue dès l'entrée."""
+        fut = self.com.requestSCAsync(resource, shared)
+        try:
+            await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            fut.add_done_callback(lambda f: self._release_granted(f, resource))
+            raise
+        try:
+            yield
+        finally:
+            self.com.releaseSC(resource)
+
+    # === Helpers ===
+    def _release_granted(self, fut, resource: str):
+        """ Demande de SC abandonnée (annulation) : si elle aboutit, la SC est rendue
+        aussitôt (hors du thread du moteur, qui peut tenir son verrou)."""
+        if not fut.cancelled() and fut.exception() is None:
+            self.com.bus.defer(lambda: self.com.releaseSC(resource))
+
+    def _on_put(self):
+        """ Listener de la BAL (thread quelconque) : réveille la boucle si besoin."""
+        if self._waiting:
+            self.loop.call_soon_threadsafe(self._arrival.set)
+
+    async def _get(self, timeout: float | None, **filters) -> Message | None:
+        """ Lecture non bloquante de la BAL, puis attente d'un dépôt et nouvel essai."""
+        get = self.com.mailbox.get
+        m = get(block=False, **filters)
+        if m is not None:
+            return m
+        self._waiting += 1
+        try:
+            return await asyncio.wait_for(self._wait(filters), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiting -= 1
+
+    async def _wait(self, filters: dict) -> Message:
+        """ Boucle d'attente : re-vérifie la BAL à chaque dépôt signalé."""
+        get = self.com.mailbox.get
+        while True:
+            self._arrival.clear()
+            m = get(block=False, **filters)
+            if m is not None:
+                return m
+            await self._arrival.wait()
@@ -0,0 +1,296 @@
+from Bus import Bus
+from Com import Com
+from Codec import DEFAULT_CODEC
+from Message import AckMessage
+from BroadcastMessage import BroadcastMessage
+from Token import Token
+import argparse, json, pickle, platform, sys, threading, time, uuid
+from typing import Callable
+
+SUITE_SIZES = (2, 4, 8, 16, 32, 64, 128, 256)
+SUITE_PRIMITIVES = ("broadcast", "sendTo", "broadcastSync", "sendToSync", "recvFromSync",
+                    "synchronize", "sc_handoff")
+SUITE_DELIVERIES = 20_000  # livraisons visées par mesure (le nombre d'envois s'adapte à N)
+
+def bench_sc_handoff(n: int = 3, rounds: int = 20, queued: bool = False, sc_mode: str = "ring",
+                     transport: str | None = None) -> dict:
+    """ Mesure la latence de passage de la SC : temps entre le `releaseSC()` d'un
+    processus et l'entrée en SC du suivant, tous les processus demandant la SC en boucle.
+    `transport` : `"bus"`, `"queued"` ou `"remote"` (défaut : selon `queued`). Le
+    résultat est aussi une ligne de la suite (débit en entrées/s, quantiles en µs)."""
+    transport = transport or ("queued" if queued else "bus")
+    coms, close = _nodes(n, transport, sc_mode=sc_mode)
+    log: list[tuple[float, float]] = []  # (entrée, sortie)
+    log_lock = threading.Lock()
+
+    def worker(com: Com):
+        for _ in range(rounds):
+            com.requestSC()
+            t_in = time.perf_counter()
+            t_out = time.perf_counter()
+            with log_lock:
+                log.append((t_in, t_out))
+            com.releaseSC()
+
+    threads = [threading.Thread(target=worker, args=(c,), daemon=True) for c in coms]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    close()
+
+    log.sort()
+    gaps = sorted(log[i + 1][0] - log[i][1] for i in range(len(log) - 1))
+    return {
+        **_stats("sc_handoff", n, len(log), elapsed, gaps),
+        "handoffs": len(gaps),
+        "mean_ms": 1000 * sum(gaps) / len(gaps),
+        "p50_ms": 1000 * gaps[len(gaps) // 2],
+        "max_ms": 1000 * gaps[-1],
+    }
+
+def bench_idle_ring_cpu(n: int = 3, seconds: float = 2.0, queued: bool = False, sc_mode: str = "ring") -> dict:
+    """ Mesure le CPU consommé par un anneau inactif (personne ne demande la SC) :
+    temps CPU du processus / temps réel, et nombre de threads créés."""
+    bus = Bus(queued=queued)
+    coms = [Com(bus, sc_mode=sc_mode) for _ in range(n)]
+    time.sleep(0.2)
+    th0 = threading.active_count()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu1, wall1 = time.process_time(), time.perf_counter()
+    for c in coms: c.close()
+    return {
+        "n": n,
+        "cpu_ratio": (cpu1 - cpu0) / (wall1 - wall0),
+        "threads": th0,
+    }
+
+def bench_codec(iterations: int = 100_000) -> dict:
+    """ Compare le codec binaire (`Codec`) à pickle : octets par message et
+    µs par encodage+décodage, pour un ACK, un jeton et un petit broadcast 'sync'."""
+    sync = BroadcastMessage(payload={"sync_all": "from 0"}, lamport=12, sender=0)
+    sync.ack_seq = 7
+    ack = AckMessage(seq=7, sender=1, uid=str(uuid.UUID(int=1, version=4)))
+    samples = {"ack": ack, "token": Token(holder=2), "broadcast_sync": sync}
+    dumps = lambda m: pickle.dumps(m, protocol=pickle.HIGHEST_PROTOCOL)
+    out = {}
+    for name, msg in samples.items():
+        row = {}
+        for label, enc, dec in (("codec", DEFAULT_CODEC.encode, DEFAULT_CODEC.decode),
+                                ("pickle", dumps, pickle.loads)):
+            data = enc(msg)
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                dec(enc(msg))
+            row[label] = {"bytes": len(data),
+                          "us": 1e6 * (time.perf_counter() - t0) / iterations}
+        out[name] = row
+    return out
+
+# === Suite : primitives de Com pour N de 2 à 256 ===
+class _Recorder:
+    """ Callback `on_receive` : latence des payloads ("bench", instant d'envoi)."""
+
+    def __init__(self):
+        self.samples: list[float] = []
+
+    def on_receive(self, msg):
+        p = msg.payload
+        if type(p) is tuple and p and p[0] == "bench":
+            self.samples.append(time.perf_counter() - p[1])
+
+    def wait(self, count: int, timeout: float = 60.0):
+        """ Attend `count` réceptions (`TimeoutError` au-delà de `timeout`)."""
+        deadline = time.monotonic() + timeout
+        while len(self.samples) < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{len(self.samples)}/{count} réceptions")
+            time.sleep(0.0005)
+
+def _nodes(n: int, transport: str, on_receive=None, **kw) -> tuple[list[Com], Callable[[], None]]:
+    """ N `Com` (options `kw`) sur un bus neuf (`"bus"`, `"queued"` ou `"remote"`),
+    triés par id, et la fonction qui les ferme."""
+    server = None
+    if transport == "remote":
+        from RemoteBus import BusServer, RemoteBus
+        server = BusServer()
+        bus = RemoteBus(server.address)
+    elif transport in ("bus", "queued"):
+        bus = Bus(queued=transport == "queued")
+    else:
+        raise ValueError(f"transport inconnu: {transport!r}")
+    coms = [Com(bus, on_receive=on_receive, **kw) for _ in range(n)]
+    while len(bus.view) < n:
+        time.sleep(0.001)
+    coms.sort(key=lambda c: c.id)
+
+    def close():
+        for c in coms:
+            c.close()
+        if server is not None:
+            bus.close()
+            server.close()
+    return coms, close
+
+def _stats(primitive: str, n: int, ops: int, elapsed: float, samples: list[float]) -> dict:
+    """ Ligne de résultat : débit (opérations/s) et quantiles de latence (µs)."""
+    samples = sorted(samples)
+    q = lambda f: 1e6 * samples[min(len(samples) - 1, int(f * len(samples)))] if samples else None
+    return {"primitive": primitive, "n": n, "ops": ops, "seconds": elapsed,
+            "throughput": ops / elapsed if elapsed else None,
+            "p50_us": q(0.5), "p99_us": q(0.99)}
+
+def _bench_broadcast(n: int, transport: str, deliveries: int) -> dict:
+    """ Rafale de `broadcast` depuis l'id 0 ; latence émission -> `on_receive`,
+    débit en livraisons/s."""
+    rec = _Recorder()
+    coms, close = _nodes(n, transport, rec.on_receive)
+    count = max(10, deliveries // (n - 1))
+    t0 = time.perf_counter()
+    for _ in range(count):
+        coms[0].broadcast(("bench", time.perf_counter()))
+    rec.wait(count * (n - 1))
+    elapsed = time.perf_counter() - t0
+    close()
+    return _stats("broadcast", n, count * (n - 1), elapsed, rec.samples)
+
+def _bench_send_to(n: int, transport: str, deliveries: int) -> dict:
+    """ Rafale de `sendTo`, chaque envoi vers l'id suivant (en tourniquet)."""
+    rec = _Recorder()
+    coms, close = _nodes(n, transport, rec.on_receive)
+    t0 = time.perf_counter()
+    for i in range(deliveries):
+        coms[i % n].sendTo(("bench", time.perf_counter()), (i + 1) % n)
+    rec.wait(deliveries)
+    elapsed = time.perf_counter() - t0
+    close()
+    return _stats("sendTo", n, deliveries, elapsed, rec.samples)
+
+def _bench_sync(primitive: str, n: int, transport: str, deliveries: int) -> dict:
+    """ `broadcastSync` (attente des N-1 ACK) ou `sendToSync` (id 0 -> 1) en boucle ;
+    latence d'un appel bloquant."""
+    coms, close = _nodes(n, transport)
+    a = coms[0]
+    count = max(10, deliveries // (n - 1)) if primitive == "broadcastSync" else deliveries // 4
+    samples = []
+    t0 = time.perf_counter()
+    for i in range(count):
+        t = time.perf_counter()
+        if primitive == "broadcastSync":
+            a.broadcastSync(i, from_id=a.id)
+        else:
+            a.sendToSync(i, 1)
+        samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - t0
+    close()
+    return _stats(primitive, n, count, elapsed, samples)
+
+def _bench_recv_from_sync(n: int, transport: str, deliveries: int) -> dict:
+    """ Ping-pong `sendTo` / `recvFromSync` entre les ids 0 et 1 : latence d'un saut
+    (envoi -> retour de `recvFromSync`), débit en sauts/s."""
+    coms, close = _nodes(n, transport)
+    a, b = coms[0], coms[1]
+    hops = deliveries // 4
+    samples = []
+
+    def pong():
+        for _ in range(hops // 2):
+            m = b.recvFromSync(a.id, timeout=30)
+            samples.append(time.perf_counter() - m.payload[1])
+            b.sendTo(("bench", time.perf_counter()), a.id)
+
+    t = threading.Thread(target=pong, daemon=True)
+    t0 = time.perf_counter()
+    t.start()
+    for _ in range(hops // 2):
+        a.sendTo(("bench", time.perf_counter()), b.id)
+        m = a.recvFromSync(b.id, timeout=30)
+        samples.append(time.perf_counter() - m.payload[1])
+    t.join()
+    elapsed = time.perf_counter() - t0
+    close()
+    return _stats("recvFromSync", n, len(samples), elapsed, samples)
+
+def _bench_synchronize(n: int, transport: str, rounds: int) -> dict:
+    """ Tous les `Com` enchaînent `rounds` barrières globales ; latence d'un appel
+    à `synchronize()`, débit en barrières/s."""
+    coms, close = _nodes(n, transport)
+    samples = []
+
+    def worker(com: Com):
+        for _ in range(rounds):
+            t = time.perf_counter()
+            com.synchronize()
+            samples.append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=worker, args=(c,), daemon=True) for c in coms]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    close()
+    return _stats("synchronize", n, rounds, elapsed, samples)
+
+def bench_suite(sizes=SUITE_SIZES, primitives=SUITE_PRIMITIVES, transport: str = "bus",
+                deliveries: int = SUITE_DELIVERIES, sc_mode: str = "ring", log=print) -> dict:
+    """ Mesure chaque primitive pour chaque taille N : débit et latences p50/p99.
+    Retourne un dict sérialisable en JSON : {"meta": ..., "results": [lignes]}."""
+    results = []
+    for n in sizes:
+        rounds = max(2, 512 // n)
+        for primitive in primitives:
+            if primitive == "broadcast":
+                row = _bench_broadcast(n, transport, deliveries)
+            elif primitive == "sendTo":
+                row = _bench_send_to(n, transport, deliveries)
+            elif primitive in ("broadcastSync", "sendToSync"):
+                row = _bench_sync(primitive, n, transport, deliveries)
+            elif primitive == "recvFromSync":
+                row = _bench_recv_from_sync(n, transport, deliveries)
+            elif primitive == "synchronize":
+                row = _bench_synchronize(n, transport, rounds)
+            elif primitive == "sc_handoff":
+                row = bench_sc_handoff(n, rounds, sc_mode=sc_mode, transport=transport)
+            else:
+                raise ValueError(f"primitive inconnue: {primitive!r}")
+            results.append(row)
+            if log:
+                log(f"[BENCH] n={n:<4} {primitive:<13} {row['throughput']:>12.0f} op/s"
+                    f"  p50={row['p50_us']:>10.1f} us  p99={row['p99_us']:>10.1f} us")
+    meta = {"transport": transport, "sc_mode": sc_mode, "deliveries": deliveries,
+            "python": sys.version.split()[0], "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    return {"meta": meta, "results": results}
+
+def main():
+    """ Lance les mesures et affiche les résultats. """
+    parser = argparse.ArgumentParser(description="Micro-benchmarks du middleware")
+    parser.add_argument("-n", type=int, default=3, help="nombre de Com")
+    parser.add_argument("--rounds", type=int, default=20, help="entrées en SC par Com")
+    parser.add_argument("--seconds", type=float, default=2.0, help="durée de la mesure d'anneau inactif")
+    parser.add_argument("--queued", action="store_true", help="utilise Bus(queued=True)")
+    parser.add_argument("--sc-mode", default="ring", help="moteur de SC (ring, suzuki)")
+    parser.add_argument("--suite", action="store_true",
+                        help="suite complète : toutes les primitives pour chaque N de --sizes")
+    parser.add_argument("--sizes", default=",".join(map(str, SUITE_SIZES)), help="tailles N (suite)")
+    parser.add_argument("--primitives", default=",".join(SUITE_PRIMITIVES), help="primitives (suite)")
+    parser.add_argument("--transport", default="bus", help="bus, queued ou remote (suite)")
+    parser.add_argument("--deliveries", type=int, default=SUITE_DELIVERIES,
+                        help="livraisons visées par mesure (suite)")
+    parser.add_argument("--json", metavar="FICHIER", help="écrit les résultats de la suite en JSON")
+    args = parser.parse_args()
+    if args.suite:
+        out = bench_suite([int(x) for x in args.sizes.split(",")], args.primitives.split(","),
+                          args.transport, args.deliveries, args.sc_mode)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(out, f, indent=2)
+            print(f"[BENCH] résultats écrits dans {args.json}")
+        return
+    print("[BENCH] sc_handoff", bench_sc_handoff(args.n, args.rounds, args.queued, args.sc_mode))
+    print("[BENCH] idle_ring ", bench_idle_ring_cpu(args.n, args.seconds, args.queued, args.sc_mode))
+    print("[BENCH] codec     ", bench_codec())
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,371 @@
 from __future__ import annotations
-import threading, time
-from typing import TYPE_CHECKING
-from Com import HEARTBEAT_TIMEOUT_SEC
+import threading, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+from FailureDetector import FailureDetector
+from Mailbox import Credit, Mailbox, MailboxFull, approx_size, settle
 from Message import Message
+from Scheduler import SCHEDULER
+from Synchronize import GLOBAL_BARRIER
+from View import View
 
 if TYPE_CHECKING:
     from Com import Com
+    from Journal import Journal
+
+class _BarrierState:
+    """ État d'une barrière nommée : génération courante, arrivés de cette
+    génération, et membres attendus (None = tous les abonnés)."""
+    __slots__ = ("generation", "arrived", "members")
+
+    def __init__(self, members: frozenset[str] | None):
+        self.generation = 0
+        self.arrived: set[str] = set()
+        self.members = members
+
+# Exécuteur partagé par tous les bus pour les envois différés (sauts de jeton, ...)
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="bus-defer")
 
 class Bus:
     """ Bus mémoire partagé simulant le 'réseau' entre communicateurs `Com`.
-        - Maintient l'annuaire des participants (`_subscribers`, `_directory`)
-        - Diffuse les messages (broadcast / sendto)
-        - Gère une barrière globale (barrier_arrive)
+        - Maintient l'annuaire des participants (`_subscribers`) et la vue de membres
+          courante (`view`, numérotée par époque) : l'id logique d'un `Com` est son rang
+          dans la vue, qu'il relit lui-même (une vue est partagée, jamais recopiée)
+        - Diffuse les messages (broadcast / sendto), ou aux seuls membres d'un groupe
+          nommé (broadcast_group) grâce à un index groupe -> abonnés
+        - Gère les barrières (barrier_arrive) : globale ou nommée sur un sous-groupe,
+          avec numéro de génération
+
+        - Détecte les pannes : les `Com` émettent des heartbeats, un `FailureDetector`
+          (tas d'échéances) est vérifié par le scheduler à la prochaine échéance
+          seulement, et les silencieux sont retirés de la vue
+        - Journalise, si un `Journal` est fourni, chaque envoi sous son verrou (l'ordre
+          du journal est celui des livraisons)
+
+        Deux modes de livraison :
+        - `queued=False` (défaut) : `_deliver()` est appelé directement, sous le verrou du bus
+        - `queued=True` : chaque `Com` possède une file d'entrée vidée par son propre thread
+          dispatcher ; l'émetteur ne fait qu'enfiler, le verrou du bus est tenu quelques µs
     """
 
-    def __init__(self):
-        """Initialise les structures internes (protégées par un RLock)."""
+    def __init__(self, queued: bool = False, detector: FailureDetector | None = None,
+                 journal: "Journal | None" = None):
+        """Initialise les structures internes (protégées par un RLock).
+        `detector` : détecteur de pannes (par défaut délai fixe `HEARTBEAT_TIMEOUT_SEC` ;
+        `FailureDetector(phi_threshold=...)` pour une suspicion adaptative).
+        `journal` : `Journal` où chaque envoi est enregistré (None = aucun)."""
+        self.queued = queued
+        self.journal = journal
+        self.scheduler = SCHEDULER
+        self.detector = detector or FailureDetector()
+        self._detector_timer = None
+        self._detector_at: float | None = None
         self._lock = threading.RLock()
         self._subscribers: dict[str, "Com"] = {}
-        self._directory: list[str] = []
-        self._last_hb: dict[str, float] = {}
-        self._barrier_waiting: set[str] = set()
+        self.view = View()
+        self._view_listeners: list[Callable[[View, tuple, tuple], None]] = []
+        self._barriers: dict[str, _BarrierState] = {}
+        self._tokens_claimed: dict[str, int] = {}
+        self._groups: dict[str, dict[str, "Com"]] = {}
+        self._member_of: dict[str, set[str]] = {}
+        # UID -> BAL bornée à crédits ; remplacé (jamais modifié) pour être lu sans verrou
+        self._credited: dict[str, Mailbox] = {}
+
+    def new_uid(self) -> str:
+        """ UID d'un nouveau `Com` (stable, l'ordre des UID fixe les ids)."""
+        return str(uuid.uuid4())
 
     def join(self, com: "Com") -> int:
         """
         Enregistre un nouveau `Com` sur le bus et retourne son id logique.
         - Ajoute son UID dans l'annuaire
-        - Met à jour la liste triée `_directory` (source de numérotation)
-        - Déclenche `_renumber()` pour informer tout le monde du mapping à jour
+        - Publie une nouvelle vue (époque + 1) ; les `Com` déjà présents n'ont rien
+          à recevoir, ils relisent leur rang dans `bus.view` à la prochaine utilisation
         """
         with self._lock:
             node_uid = com.node_uid
+            if self.queued:
+                com._start_dispatcher()
             self._subscribers[node_uid] = com
-            self._last_hb[node_uid] = time.time()
-            if node_uid not in self._directory:
-                self._directory.append(node_uid)
-                self._directory.sort()
-            self._renumber()
-            return self._directory.index(node_uid)
+            mb = getattr(com, "mailbox", None)
+            if mb is not None and mb.bounded and mb.policy != "drop_oldest":
+                self._credited = {**self._credited, node_uid: mb}
+            self.detector.watch(node_uid, self.scheduler.now())
+            self._arm_detector()
+            if node_uid not in self.view:
+                self._change_view(joined=(node_uid,))
+            return self.view.index(node_uid)
 
     def leave(self, com: "Com"):
-        """Retire un `Com` du bus (départ/arrêt) et renumérote les restants."""
+        """Retire un `Com` du bus (départ/arrêt) et publie la nouvelle vue."""
         with self._lock:
             self._subscribers.pop(com.node_uid, None)
-            self._last_hb.pop(com.node_uid, None)
-            if com.node_uid in self._directory:
-                self._directory.remove(com.node_uid)
-            self._renumber()
+            self._drop_credits([com.node_uid])
+            self.detector.forget(com.node_uid)
+            if com.node_uid in self.view:
+                self._change_view(left=(com.node_uid,))
+            self._drop_from_barriers([com.node_uid])
+            self._drop_from_groups([com.node_uid])
+
+    def add_view_listener(self, cb: Callable[[View, tuple, tuple], None]):
+        """ Enregistre `cb(view, joined, left)`, appelé sous le verrou du bus à chaque
+        changement de vue (sert à relayer les deltas vers d'autres processus)."""
+        with self._lock:
+            self._view_listeners.append(cb)
 
-    def _renumber(self):
-        """" Recalcule la table {uid -> id} à partir de `_directory` et notifie tous les `Com`. """
-        mapping = {uid: idx for idx, uid in enumerate(self._directory)}
-        for c in list(self._subscribers.values()):
-            c._onRenumber(mapping)
+    def _change_view(self, joined: tuple = (), left: tuple = ()):
+        """ Applique un delta de membres (sous le verrou). Seuls les départs sont notifiés
+        aux `Com` (`_onView`) : ils doivent cesser d'attendre les partants."""
+        self.view = view = self.view.apply(joined, left)
+        for cb in self._view_listeners:
+            cb(view, joined, left)
+        if left:
+            for c in list(self._subscribers.values()):
+                c._onView(view, left)
 
     def broadcast(self, msg: Message, exclude_uid: str | None = None):
         """ Diffuse `msg` à tous les `Com` enregistrés, sauf éventuellement `exclude_uid`. """
         with self._lock:
+            if self.journal is not None:
+                self.journal.broadcast(msg, self.scheduler.now())
             for uid, c in self._subscribers.items():
                 if uid == exclude_uid:
                     continue
-                c._deliver(msg)
+                c._post(msg)
+            if getattr(msg, "credit", None) is not None:
+                settle((msg,), self._subscribers)
 
     def sendto(self, dest_id: int, msg: Message):
         """ Envoie `msg` à un seul destinataire par identifiant logique. """
         with self._lock:
-            if 0 <= dest_id < len(self._directory):
-                uid = self._directory[dest_id]
-                c = self._subscribers.get(uid)
-                if c:
-                    c._deliver(msg)
+            if self.journal is not None:
+                self.journal.sendto(dest_id, msg, self.scheduler.now())
+            uid = self.view.uid(dest_id)
+            c = self._subscribers.get(uid) if uid is not None else None
+            if c:
+                c._post(msg)
+            if getattr(msg, "credit", None) is not None:
+                settle((msg,), (uid,) if c else ())
 
-    def heartbeat(self, sender_uid: str):
-        """ Marque un heartbeat pour `sender_uid`. Sert à la détection de pannes. """
+    def broadcast_many(self, msgs: list[Message], exclude_uid: str | None = None):
+        """ Diffuse un lot de messages (dans l'ordre) : une prise du verrou pour tout le
+        lot, et un seul `_post_many` par destinataire. """
+        with self._lock:
+            if self.journal is not None:
+                self.journal.broadcast_many(msgs, self.scheduler.now())
+            for uid, c in self._subscribers.items():
+                if uid != exclude_uid:
+                    c._post_many(msgs)
+            if getattr(msgs[0], "credit", None) is not None:
+                settle(msgs, self._subscribers)
+
+    def sendto_many(self, dest_id: int, msgs: list[Message]):
+        """ Envoie un lot de messages (dans l'ordre) à un seul destinataire. """
+        with self._lock:
+            if self.journal is not None:
+                self.journal.sendto_many(dest_id, msgs, self.scheduler.now())
+            uid = self.view.uid(dest_id)
+            c = self._subscribers.get(uid) if uid is not None else None
+            if c:
+                c._post_many(msgs)
+            if getattr(msgs[0], "credit", None) is not None:
+                settle(msgs, (uid,) if c else ())
+
+    def reserve(self, payloads: list, exclude_uid: str | None = None,
+                dest: int | None = None, group: str | None = None):
+        """ Contrôle de flux : réserve la place de messages de contenus `payloads` dans
+        les BAL bornées des destinataires (id `dest`, membres de `group`, ou tous ; sauf
+        `exclude_uid`). Appelé par
+        l'émetteur *avant* l'envoi et hors du verrou du bus : peut le faire attendre
+        (politique `"block"`) ou lever `MailboxFull` (`"reject"`, rien n'est alors
+        réservé). Depuis un callback du scheduler, jamais d'attente : `MailboxFull`
+        tout de suite (les minuteurs de tous les `Com` en dépendent). Retourne un ticket (`Credit`) par payload, à poser sur son message
+        (`msg.credit`) : le dépôt solde la réservation, et les envois du bus soldent
+        celles des destinataires que le message n'atteindra pas. Sans BAL bornée
+        concernée, ne coûte rien et retourne None. """
+        credited = self._credited
+        if not credited:
+            return None
+        if dest is not None:
+            uids = (self.view.uid(dest),)
+        elif group is not None:
+            uids = self.group_members(group)
+        else:
+            uids = credited
+        targets = {credited[uid]: uid for uid in uids if uid != exclude_uid and uid in credited}
+        if not targets:
+            return None
+        sizes = [approx_size(p) for p in payloads]
+        count, nbytes = len(sizes), sum(sizes)
+        timeout = 0 if self.scheduler.in_timer() else None
+        done = []
+        try:
+            for mb in targets:
+                mb.reserve(count, nbytes, timeout)
+                done.append(mb)
+        except MailboxFull:
+            for mb in done:
+                mb.unreserve(count, nbytes)
+            raise
+        return [Credit(n, dict(targets)) for n in sizes]
+
+    def _drop_credits(self, uids: list[str]):
+        """ Oublie les BAL à crédits de partants (sous le verrou)."""
+        if any(uid in self._credited for uid in uids):
+            self._credited = {u: mb for u, mb in self._credited.items() if u not in uids}
+
+    def join_group(self, uid: str, name: str):
+        """ Ajoute l'abonné `uid` au groupe `name` (créé au besoin)."""
+        with self._lock:
+            c = self._subscribers.get(uid)
+            if c is None:
+                return
+            self._groups.setdefault(name, {})[uid] = c
+            self._member_of.setdefault(uid, set()).add(name)
+
+    def leave_group(self, uid: str, name: str):
+        """ Retire `uid` du groupe `name` (un groupe vide disparaît)."""
         with self._lock:
-            self._last_hb[sender_uid] = time.time()
+            members = self._groups.get(name)
+            if members is not None and members.pop(uid, None) is not None:
+                if not members:
+                    del self._groups[name]
+                self._member_of[uid].discard(name)
+
+    def group_members(self, name: str) -> tuple[str, ...]:
+        """ UID des membres du groupe `name`."""
+        with self._lock:
+            return tuple(self._groups.get(name, ()))
+
+    def broadcast_group(self, name: str, msg: Message, exclude_uid: str | None = None):
+        """ Diffuse `msg` aux seuls membres du groupe `name` (sauf `exclude_uid`) :
+        le coût ne dépend que de la taille du groupe. """
+        with self._lock:
+            if self.journal is not None:
+                self.journal.broadcast_group(msg, self.scheduler.now())
+            members = self._groups.get(name, {})
+            for uid, c in members.items():
+                if uid != exclude_uid:
+                    c._post(msg)
+            if getattr(msg, "credit", None) is not None:
+                settle((msg,), members)
+
+    def _drop_from_groups(self, uids: list[str]):
+        """ Retire des partants de tous leurs groupes (sous le verrou)."""
+        for uid in uids:
+            for name in self._member_of.pop(uid, ()):
+                members = self._groups.get(name)
+                if members is not None:
+                    members.pop(uid, None)
+                    if not members:
+                        del self._groups[name]
+
+    def claim_token(self, name: str = "default", epoch: int = 0) -> bool:
+        """ Arbitre la création du jeton `name` de génération `epoch` : retourne True
+        une seule fois par génération, et seulement si elle dépasse toutes celles déjà
+        accordées. Génération 0 : jeton initial (évite plusieurs jetons quand l'id 0
+        change au fil des arrivées) ; au-delà : coordinateur d'une régénération."""
+        with self._lock:
+            last = self._tokens_claimed.get(name)
+            if last is not None and epoch <= last:
+                return False
+            self._tokens_claimed[name] = epoch
+            return True
+
+    def defer(self, fn: Callable[[], None]):
+        """ Exécute `fn` plus tard, hors du thread appelant, via l'exécuteur partagé."""
+        _EXECUTOR.submit(fn)
+
+    def heartbeat(self, sender_uid: str):
+        """ Marque un heartbeat pour `sender_uid` (O(1), sans le verrou du bus, sauf si
+        son échéance a avancé : la vérification du détecteur est alors réarmée). """
+        if self.detector.heartbeat(sender_uid, self.scheduler.now()):
+            with self._lock:
+                self._arm_detector()
 
     def check_timeouts(self):
         """
-        Détecte les `Com` silencieux (au-delà de HEARTBEAT_TIMEOUT_SEC) et les enlève.
-        Déclenche ensuite une renumérotation.
+        Détecte les `Com` silencieux (échéance du détecteur dépassée) et les enlève.
+        Publie ensuite une seule nouvelle vue pour tous les partants.
+        Appelé automatiquement par le scheduler ; peut aussi être appelé à la main.
         """
+        dead = self.detector.expired(self.scheduler.now())
+        if not dead:
+            return
+        with self._lock:
+            for uid in dead:
+                self._subscribers.pop(uid, None)
+            self._drop_credits(dead)
+            left = tuple(uid for uid in dead if uid in self.view)
+            if left:
+                self._change_view(left=left)
+            self._drop_from_barriers(dead)
+            self._drop_from_groups(dead)
+
+    def _arm_detector(self):
+        """ (Ré)arme la vérification du détecteur à sa prochaine échéance (sous le verrou)."""
+        deadline = self.detector.next_deadline()
+        if deadline is None or (self._detector_at is not None and self._detector_at <= deadline):
+            return
+        if self._detector_timer is not None:
+            self._detector_timer.cancel()
+        self._detector_at = deadline
+        self._detector_timer = self.scheduler.call_later(
+            max(0.0, deadline - self.scheduler.now()), self._on_detector_timer)
+
+    def _on_detector_timer(self):
+        """ Échéance du détecteur (thread du scheduler) : vérifie puis réarme."""
+        with self._lock:
+            self._detector_timer = None
+            self._detector_at = None
+        self.check_timeouts()
         with self._lock:
-            now = time.time()
-            dead = [uid for uid, t0 in self._last_hb.items()
-                    if now - t0 > HEARTBEAT_TIMEOUT_SEC]
-            if dead:
-                for uid in dead:
-                    self._subscribers.pop(uid, None)
-                    self._last_hb.pop(uid, None)
-                    if uid in self._directory:
-                        self._directory.remove(uid)
-                self._renumber()
-
-    def barrier_arrive(self, uid: str):
+            self._arm_detector()
+
+    def barrier_arrive(self, uid: str, name: str = GLOBAL_BARRIER, members: list[int] | None = None):
         """
-        Point de rendez-vous de la barrière:
-        - Ajoute `uid` dans l'ensemble des arrivés.
-        - Si tous les vivants sont arrivés, libère la barrière chez tous.
+        Point de rendez-vous de la barrière `name` :
+        - Ajoute `uid` aux arrivés de la génération courante (O(1), pas de
+          reconstruction de l'ensemble des abonnés).
+        - `members` (ids logiques) restreint une barrière nommée à un sous-groupe ;
+          il est figé à la première arrivée d'une génération.
+        - Quand tous les attendus sont arrivés, libère la génération chez eux
+          (`_onBarrierRelease(name, generation)`) et passe à la suivante.
         """
         with self._lock:
-            self._barrier_waiting.add(uid)
-            if self._barrier_waiting == set(self._subscribers.keys()):
-                self._barrier_waiting.clear()
-                for c in list(self._subscribers.values()):
-                    c._onBarrierRelease()
\ No newline at end of file
+            b = self._barriers.get(name)
+            if b is None:
+                b = self._barriers[name] = _BarrierState(None)
+            if not b.arrived and members is not None:
+                view = self.view
+                b.members = frozenset(view.members[i] for i in members if 0 <= i < len(view))
+            b.arrived.add(uid)
+            self._maybe_release(name, b)
+
+    def _maybe_release(self, name: str, b: _BarrierState):
+        """ Libère la génération courante de `b` si tous les attendus sont arrivés."""
+        expected = len(self._subscribers) if b.members is None else len(b.members)
+        if not b.arrived or len(b.arrived) < expected:
+            return
+        gen = b.generation
+        targets = b.arrived
+        b.generation += 1
+        b.arrived = set()
+        b.members = None
+        for uid in targets:
+            self._release_barrier(uid, name, gen)
+
+    def _release_barrier(self, uid: str, name: str, gen: int):
+        """ Libère la génération `gen` de la barrière `name` chez `uid` (s'il est là)."""
+        c = self._subscribers.get(uid)
+        if c:
+            c._onBarrierRelease(name, gen)
+
+    def _drop_from_barriers(self, uids: list[str]):
+        """ Retire des partants des barrières en cours (ils ne sont plus attendus)."""
+        for name, b in self._barriers.items():
+            for uid in uids:
+                b.arrived.discard(uid)
+                if b.members is not None and uid in b.members:
+                    b.members = b.members - {uid}
+            self._maybe_release(name, b)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+import json, pickle, struct
+
+from Message import AckMessage, AckRangeMessage, Message, MsgKind
+from BroadcastMessage import BroadcastMessage
+from MessageTo import MessageTo
+from GroupMessage import GroupMessage
+from Synchronize import BarrierMessage
+from Token import Token, SKToken, PermitToken, SCRequestMessage, CensusMessage, DEFAULT_RESOURCE
+from Ordering import OrderedMessage, ClockMessage, CausalMessage
+from Fanout import TreeMessage, GossipMessage
+from Collectives import CollectiveMessage
+
+class PickleSerializer:
+    """ Sérialiseur de payload par défaut (tout objet picklable)."""
+    def dumps(self, obj: object) -> bytes:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> object:
+        return pickle.loads(data)
+
+class JsonSerializer:
+    """ Sérialiseur de payload JSON (payloads simples, lisible par d'autres langages)."""
+    def dumps(self, obj: object) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> object:
+        return json.loads(data)
+
+def _uid_str(raw: bytes) -> str:
+    """ 16 octets -> UID canonique (forme de `str(uuid.UUID)`)."""
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+class Codec:
+    """
+    Format binaire compact pour les messages qui quittent le processus.
+    En-tête fixe (`struct`, 43 octets) :
+        type, kind, flags, lamport, sender, dest, ack_seq, seq, holder, longueur payload
+    (-1 code `None` / champ absent), suivi du payload sérialisé.
+    - un payload `None` ne coûte rien (ACK, jetons, requêtes de SC)
+    - un payload `bytes` est copié tel quel, sans sérialiseur
+    - champs compacts, présents seulement si posés (drapeau) : `uid` (UUID sur 16 octets),
+      `upto` (entier 64 bits), `resource` (nom court, absent pour la ressource par défaut)
+    - les champs propres à une classe hors en-tête (ex. `ln`/`queue` d'un `SKToken`)
+      sont préfixés au payload (toujours en pickle, indépendamment du sérialiseur)
+    - une classe non enregistrée (ou un `uid` qui n'est pas un UUID) est entièrement picklée (repli)
+    """
+    HEADER = struct.Struct("!BBBqiiqqiI")
+    _HEADER_FIELDS = ("kind", "payload", "lamport", "sender", "dest", "ack_seq", "seq", "holder")
+    _COMPACT_FIELDS = ("uid", "upto", "resource")  # hors pickle, après l'en-tête
+    _LOCAL_FIELDS = ("credit",)  # propres au processus, jamais encodés
+    _EXTRA_LEN = struct.Struct("!I")
+    _UPTO = struct.Struct("!q")
+    _FLAG_RAW = 1       # payload bytes brut
+    _FLAG_EXTRA = 2     # champs propres à la classe (pickle) avant le payload
+    _FLAG_OBJECT = 4    # message entier sérialisé (classe inconnue)
+    _FLAG_UID = 8       # UUID de 16 octets
+    _FLAG_UPTO = 16     # `upto` (!q)
+    _FLAG_RESOURCE = 32  # longueur (1 octet) + nom UTF-8
+
+    def __init__(self, serializer=None):
+        """ `serializer` : objet avec `dumps(obj) -> bytes` / `loads(bytes) -> obj`."""
+        self.serializer = serializer or PickleSerializer()
+        self._by_code: dict[int, tuple[type, tuple[str, ...], tuple[str, ...]]] = {}
+        self._by_cls: dict[type, tuple[int, tuple[str, ...], tuple[str, ...]]] = {}
+        self._kinds = {k.value: k for k in MsgKind}
+        for code, cls in enumerate((Message, BroadcastMessage, MessageTo, AckMessage,
+                                    Token, SKToken, SCRequestMessage, BarrierMessage, CensusMessage,
+                                    OrderedMessage, ClockMessage, CausalMessage, GroupMessage,
+                                    TreeMessage, GossipMessage, CollectiveMessage,
+                                    AckRangeMessage, PermitToken), start=1):
+            self.register(code, cls)
+
+    def register(self, code: int, cls: type):
+        """ Associe un code de type (1..255) à une classe de message."""
+        slots = []
+        for klass in reversed(cls.__mro__):
+            slots.extend(getattr(klass, "__slots__", ()))
+        compact = tuple(f for f in self._COMPACT_FIELDS if f in slots)
+        extras = tuple(s for s in slots if s not in self._HEADER_FIELDS
+                       and s not in compact and s not in self._LOCAL_FIELDS)
+        self._by_code[code] = (cls, extras, compact)
+        self._by_cls[cls] = (code, extras, compact)
+
+    def encode(self, msg: Message) -> bytes:
+        """ Message -> bytes."""
+        entry = self._by_cls.get(type(msg))
+        if entry is None:
+            return self._encode_object(msg)
+        code, extras, compact = entry
+        flags = 0
+        tail = b""
+        if compact:
+            flags, tail = self._encode_compact(msg, compact)
+            if tail is None:
+                return self._encode_object(msg)
+        payload = msg.payload
+        if payload is None:
+            data = b""
+        elif type(payload) is bytes:
+            data = payload
+            flags |= self._FLAG_RAW
+        else:
+            data = self.serializer.dumps(payload)
+        if extras:
+            ex = pickle.dumps(tuple(getattr(msg, f) for f in extras), protocol=pickle.HIGHEST_PROTOCOL)
+            data = self._EXTRA_LEN.pack(len(ex)) + ex + data
+            flags |= self._FLAG_EXTRA
+        if tail:
+            data = tail + data
+        sender = msg.sender
+        ack_seq = getattr(msg, "ack_seq", None)
+        return self.HEADER.pack(
+            code, msg.kind.value, flags, msg.lamport,
+            -1 if sender is None else sender,
+            getattr(msg, "dest", -1),
+            -1 if ack_seq is None else ack_seq,
+            getattr(msg, "seq", -1),
+            getattr(msg, "holder", -1),
+            len(data)) + data
+
+    def _encode_object(self, msg: Message) -> bytes:
+        """ Repli : message entier picklé."""
+        data = pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL)
+        return self.HEADER.pack(0, 0, self._FLAG_OBJECT, 0, -1, -1, -1, -1, -1, len(data)) + data
+
+    def _encode_compact(self, msg: Message, compact: tuple[str, ...]) -> tuple[int, bytes | None]:
+        """ (drapeaux, octets) des champs compacts posés ; octets None si l'un
+        d'eux n'a pas de forme compacte (UID non UUID, nom de plus de 255 octets)."""
+        flags = 0
+        parts = []
+        for name in compact:
+            value = getattr(msg, name, None)
+            if value is None:
+                continue
+            if name == "uid":
+                try:
+                    raw = bytes.fromhex(value.replace("-", ""))
+                except (TypeError, ValueError, AttributeError):
+                    return 0, None
+                if len(raw) != 16 or _uid_str(raw) != value:
+                    return 0, None  # forme non canonique : pas d'aller-retour exact
+                parts.append(raw)
+                flags |= self._FLAG_UID
+            elif name == "upto":
+                parts.append(self._UPTO.pack(value))
+                flags |= self._FLAG_UPTO
+            elif value != DEFAULT_RESOURCE:
+                raw = value.encode()
+                if len(raw) > 255:
+                    return 0, None
+                parts.append(bytes((len(raw),)) + raw)
+                flags |= self._FLAG_RESOURCE
+        return flags, b"".join(parts)
+
+    def decode(self, data: bytes) -> Message:
+        """ bytes -> Message (sans passer par `__init__`)."""
+        (code, kind, flags, lamport, sender, dest, ack_seq, seq, holder,
+         plen) = self.HEADER.unpack_from(data)
+        body = memoryview(data)[self.HEADER.size:self.HEADER.size + plen]
+        if flags & self._FLAG_OBJECT:
+            return pickle.loads(body)
+        cls, extras, compact = self._by_code[code]
+        msg = cls.__new__(cls)
+        msg.kind = self._kinds[kind]
+        msg.lamport = lamport
+        msg.sender = None if sender == -1 else sender
+        if ack_seq != -1:
+            msg.ack_seq = ack_seq
+        if dest != -1:
+            msg.dest = dest
+        if seq != -1:
+            msg.seq = seq
+        if holder != -1:
+            msg.holder = holder
+        if compact:
+            body = self._decode_compact(msg, compact, flags, body)
+        if flags & self._FLAG_EXTRA:
+            (elen,) = self._EXTRA_LEN.unpack_from(body)
+            start = self._EXTRA_LEN.size
+            for name, value in zip(extras, pickle.loads(body[start:start + elen])):
+                setattr(msg, name, value)
+            body = body[start + elen:]
+        if flags & self._FLAG_RAW:
+            msg.payload = bytes(body)
+        else:
+            msg.payload = self.serializer.loads(bytes(body)) if len(body) else None
+        return msg
+
+    def _decode_compact(self, msg: Message, compact: tuple[str, ...], flags: int,
+                        body: memoryview) -> memoryview:
+        """ Pose les champs compacts (valeur par défaut si absents) ; reste du corps."""
+        pos = 0
+        if "uid" in compact:
+            msg.uid = None
+            if flags & self._FLAG_UID:
+                msg.uid = _uid_str(bytes(body[:16]))
+                pos = 16
+        if "upto" in compact:
+            msg.upto = None
+            if flags & self._FLAG_UPTO:
+                (msg.upto,) = self._UPTO.unpack_from(body, pos)
+                pos += self._UPTO.size
+        if "resource" in compact:
+            msg.resource = DEFAULT_RESOURCE
+            if flags & self._FLAG_RESOURCE:
+                size = body[pos]
+                msg.resource = bytes(body[pos + 1:pos + 1 + size]).decode()
+                pos += 1 + size
+        return body[pos:]
+
+# Instance partagée (sérialiseur pickle)
+DEFAULT_CODEC = Codec()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import operator, threading, time
+from typing import TYPE_CHECKING, Callable
+
+from Message import Message, MsgKind
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    _HAS_NUMPY = False
+
+if TYPE_CHECKING:
+    from Com import Com
+
+def _elementwise(f: Callable) -> Callable:
+    """ Opération scalaire étendue terme à terme aux listes / tuples."""
+    def op(a, b):
+        if isinstance(a, (list, tuple)):
+            return type(a)(map(op, a, b))
+        return f(a, b)
+    return op
+
+# Opérations de réduction nommées (associatives et commutatives)
+if _HAS_NUMPY:
+    OPS: dict[str, Callable] = {"sum": np.add, "prod": np.multiply, "min": np.minimum, "max": np.maximum}
+else:
+    OPS = {"sum": _elementwise(operator.add), "prod": _elementwise(operator.mul),
+           "min": _elementwise(min), "max": _elementwise(max)}
+
+# Étapes spéciales de l'allreduce par doublement récursif (les autres étapes sont des masques de bits > 0)
+_FOLD_IN = -1   # rang >= 2^k : confie sa valeur au rang - 2^k
+_FOLD_OUT = -2  # ... qui lui renvoie le résultat
+
+class CollectiveMessage(Message):
+    """
+    Message d'une opération collective : `seq` numérote la collective (même ordre
+    d'appel chez tous les membres), `step` l'étape de son schéma de communication.
+    """
+    __slots__ = ("seq", "step")
+
+    def __init__(self, payload, sender: int, seq: int, step: int):
+        super().__init__(MsgKind.COLLECTIVE, payload, 0, sender)
+        self.seq = seq
+        self.step = step
+
+class Collectives:
+    """
+    Opérations collectives façon MPI sur la vue courante (ids 0..N-1) :
+    - `bcast` / `scatter` : arbre binomial depuis la racine, log2(N) étapes
+    - `reduce` / `gather` : arbre binomial vers la racine, log2(N) étapes
+    - `allreduce` : reduce vers 0 puis bcast (défaut : moins de messages, ce qui
+      prime quand les membres partagent un processus), ou doublement récursif (les
+      rangs au-delà de la plus grande puissance de 2 se replient sur un partenaire),
+      log2(N) + 2 étapes ; le résultat est identique bit à bit chez tous
+    Tous les membres appellent les mêmes collectives dans le même ordre (numéro
+    `seq` local) ; la vue ne doit pas changer pendant une collective.
+    Les messages reçus attendent dans une BAL dédiée, indexée par (seq, étape) :
+    ils ne transitent pas par la BAL applicative.
+    Les réductions nommées (`OPS`) utilisent NumPy s'il est disponible : une liste
+    de nombres est alors combinée et transportée en `ndarray`, puis rendue en liste.
+    """
+
+    def __init__(self, com: "Com"):
+        """ Rattache les collectives à leur `Com`."""
+        self.com = com
+        self._cond = threading.Condition()
+        self._inbox: dict[tuple[int, int], object] = {}
+        self._seq = 0
+
+    def on_message(self, msg: CollectiveMessage):
+        """ Dépose un message collectif (éventuellement en avance sur l'appel local)."""
+        with self._cond:
+            self._inbox[(msg.seq, msg.step)] = msg.payload
+            self._cond.notify_all()
+
+    def bcast(self, value: object, root: int, timeout: float | None) -> object:
+        """ Valeur de `root`, diffusée à tous."""
+        seq, n, rel, deadline = self._begin(root, timeout)
+        return self._bcast(seq, n, rel, root, value, deadline)
+
+    def scatter(self, values, root: int, timeout: float | None) -> object:
+        """ `values[i]` (séquence de N valeurs fournie par `root`) pour le membre i."""
+        n = self.com.world_size
+        if self.com.id == root and len(values) != n:
+            raise ValueError(f"scatter : {n} valeurs attendues, {len(values)} reçues")
+        seq, n, rel, deadline = self._begin(root, timeout)
+        if rel == 0:
+            chunk = _rotate(values, root)
+        mask = 1
+        while mask < n:
+            if rel & mask:
+                chunk = self._recv(seq, mask, deadline)
+                break
+            mask <<= 1
+        mask >>= 1
+        while mask:
+            if rel + mask < n:
+                # le sous-arbre de rel + mask couvre les rangs [rel + mask, rel + 2 * mask)
+                self._send((rel + mask + root) % n, seq, mask, chunk[mask:])
+                chunk = chunk[:mask]
+            mask >>= 1
+        return chunk[0]
+
+    def reduce(self, value: object, op, root: int, timeout: float | None) -> object:
+        """ op(v0, ..., vN-1) chez `root` (rangs relatifs à `root`), None ailleurs."""
+        op = _resolve(op)
+        seq, n, rel, deadline = self._begin(root, timeout)
+        acc, unpack = _pack(value, op)
+        acc = self._reduce(seq, n, rel, root, acc, op, deadline)
+        return None if rel else _unpack(acc, unpack)
+
+    def allreduce(self, value: object, op, timeout: float | None, schedule: str = "tree") -> object:
+        """ op(v0, ..., vN-1), identique chez tous.
+        `schedule` : `"tree"` (reduce vers 0 puis bcast : 2(N-1) messages, 2 log2(N)
+        étapes) ou `"doubling"` (doublement récursif : N log2(N) messages, log2(N) + 2
+        étapes, pour des membres vraiment parallèles, p. ex. un par processus OS)."""
+        if schedule not in ("tree", "doubling"):
+            raise ValueError(f"schedule inconnu: {schedule!r}")
+        op = _resolve(op)
+        seq, n, me, deadline = self._begin(0, timeout)
+        acc, unpack = _pack(value, op)
+        if schedule == "tree":
+            acc = self._reduce(seq, n, me, 0, acc, op, deadline)
+            return _unpack(self._bcast(seq, n, me, 0, acc, deadline, step=-1), unpack)
+        p2 = 1 << (n.bit_length() - 1)
+        if me >= p2:
+            self._send(me - p2, seq, _FOLD_IN, acc)
+            return _unpack(self._recv(seq, _FOLD_OUT, deadline), unpack)
+        folded = me < n - p2
+        if folded:
+            acc = op(acc, self._recv(seq, _FOLD_IN, deadline))
+        mask = 1
+        while mask < p2:
+            partner = me ^ mask
+            self._send(partner, seq, mask, acc)
+            other = self._recv(seq, mask, deadline)
+            acc = op(acc, other) if me < partner else op(other, acc)
+            mask <<= 1
+        if folded:
+            self._send(me + p2, seq, _FOLD_OUT, acc)
+        return _unpack(acc, unpack)
+
+    def gather(self, value: object, root: int, timeout: float | None) -> list | None:
+        """ [v0, ..., vN-1] (par id) chez `root`, None ailleurs."""
+        seq, n, rel, deadline = self._begin(root, timeout)
+        acc = [value]  # valeurs des rangs relatifs [rel, rel + len(acc))
+        mask = 1
+        while mask < n:
+            if rel & mask:
+                self._send((rel - mask + root) % n, seq, mask, acc)
+                return None
+            if rel + mask < n:
+                acc.extend(self._recv(seq, mask, deadline))
+            mask <<= 1
+        return acc[n - root:] + acc[:n - root] if root else acc
+
+    # === Schémas (arbre binomial, rangs relatifs à `root`) ===
+    def _bcast(self, seq: int, n: int, rel: int, root: int, value: object,
+               deadline: float | None, step: int = 1) -> object:
+        """ Reçoit `value` du parent (rel - bit de poids faible), la relaie aux
+        enfants rel + 2^j. `step` = -1 numérote les étapes en négatif (allreduce)."""
+        mask = 1
+        while mask < n:
+            if rel & mask:
+                value = self._recv(seq, step * mask, deadline)
+                break
+            mask <<= 1
+        mask >>= 1
+        while mask:
+            if rel + mask < n:
+                self._send((rel + mask + root) % n, seq, step * mask, value)
+            mask >>= 1
+        return value
+
+    def _reduce(self, seq: int, n: int, rel: int, root: int, acc: object, op: Callable,
+                deadline: float | None) -> object:
+        """ Combine les valeurs des enfants rel + 2^j, envoie le résultat au parent.
+        Retourne le total chez la racine (rel = 0)."""
+        mask = 1
+        while mask < n:
+            if rel & mask:
+                self._send((rel - mask + root) % n, seq, mask, acc)
+                return None
+            if rel + mask < n:
+                acc = op(acc, self._recv(seq, mask, deadline))
+            mask <<= 1
+        return acc
+
+    # === Helpers ===
+    def _begin(self, root: int, timeout: float | None) -> tuple[int, int, int, float | None]:
+        """ Numérote une collective : (seq, N, rang relatif à `root`, échéance)."""
+        n = self.com.world_size
+        if not 0 <= root < n:
+            raise ValueError(f"racine hors vue: {root}")
+        self._seq += 1
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return self._seq, n, (self.com.id - root) % n, deadline
+
+    def _send(self, dest: int, seq: int, step: int, payload: object):
+        self.com.bus.sendto(dest, CollectiveMessage(payload, self.com.id, seq, step))
+
+    def _recv(self, seq: int, step: int, deadline: float | None) -> object:
+        """ Attend le message (seq, step) ; `TimeoutError` à l'échéance."""
+        key = (seq, step)
+        with self._cond:
+            while key not in self._inbox:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    raise TimeoutError(f"collective {seq} : étape {step} non reçue")
+                self._cond.wait(left)
+            return self._inbox.pop(key)
+
+def _resolve(op) -> Callable:
+    """ Opération de réduction : nom de `OPS` ou fonction binaire associative."""
+    if callable(op):
+        return op
+    try:
+        return OPS[op]
+    except KeyError:
+        raise ValueError(f"opération de réduction inconnue: {op!r}") from None
+
+def _rotate(values, k: int):
+    """ `values` décalé de k (l'élément k en tête)."""
+    if not k:
+        return values
+    if _HAS_NUMPY and isinstance(values, np.ndarray):
+        return np.concatenate((values[k:], values[:k]))
+    return values[k:] + values[:k]
+
+def _pack(value, op) -> tuple[object, type | None]:
+    """ Liste / tuple de nombres -> `ndarray` pour une réduction nommée sous NumPy.
+    Retourne (valeur, type d'origine à restituer ou None)."""
+    if (_HAS_NUMPY and op in OPS.values() and isinstance(value, (list, tuple)) and value
+            and all(isinstance(x, (int, float)) for x in value)):
+        return np.asarray(value), type(value)
+    return value, None
+
+def _unpack(value, typ: type | None) -> object:
+    """ Restitue le type d'origine (liste / tuple, scalaire Python)."""
+    if typ is not None:
+        return typ(value.tolist())
+    if _HAS_NUMPY and isinstance(value, np.generic):
+        return value.item()
+    return value
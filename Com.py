@@ -1,12 +1,23 @@
 from __future__ import annotations
-import threading, time, uuid
-from collections import deque
+import queue, random, threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import TYPE_CHECKING, Callable
 
-from Message import AckMessage, Message, MsgKind
+from Message import AckMessage, AckRangeMessage, Message, MsgKind
+from Synchronize import GLOBAL_BARRIER, BarrierMessage
 from BroadcastMessage import BroadcastMessage
 from MessageTo import MessageTo
-from Token import Token
+from GroupMessage import GroupMessage
+from Token import DEFAULT_RESOURCE, Token
+from Mailbox import Mailbox
+from View import View
+from Mutex import SC_MODES, MutexEngine
+from Ordering import CausalOrder, TotalOrder
+from Fanout import FANOUT_K, FANOUT_MODES, GossipMessage, TreeMessage
+from Collectives import Collectives
+from Metrics import Metrics
+from SendBuffer import SEND_BATCH, SEND_BATCH_DELAY, SendBuffer
 from Events import UserEvent, TokenEvent
 from pyeventbus3.pyeventbus3 import PyBus, subscribe, Mode
 
@@ -20,59 +31,199 @@ if TYPE_CHECKING:
     from Bus import Bus  # typing-only to avoid circular import
 
 # === Constantes ===
-WORLD_SIZE = 3
 HEARTBEAT_SEC = 1.0
 HEARTBEAT_TIMEOUT_SEC = 3.5
+SYNC_DEDUP_WINDOW = 4096  # (émetteur, ack_seq) mémorisés pour ignorer les retransmissions
+EVENT_SAMPLE = 0.0        # fraction des envois publiés en `UserEvent` PyBus (0 = aucun)
+
+_DEFAULT = object()  # "utiliser la valeur configurée sur le Com"
+
+def _credited(msg: Message, credits: list | None) -> Message:
+    """ Pose sur `msg` son ticket de réservation (`Bus.reserve`), s'il y en a un."""
+    if credits:
+        msg.credit = credits[0]
+    return msg
+
+class _PendingAck:
+    """ Envoi 'sync' en attente d'ACKs : future à résoudre, UID qui n'ont pas encore
+    acquitté (stables quand la vue change), message à retransmettre et minuteur de timeout.
+    `tree` : arbre de l'envoi s'il est relayé (chaque UID attendu acquitte alors pour
+    tout son sous-arbre, cf. `Fanout.py`). Un lot (`broadcastMany`) occupe `count`
+    numéros consécutifs, acquittés ensemble. `start` : instant de l'envoi (RTT)."""
+    __slots__ = ("future", "remaining", "msg", "timeout", "retries", "timer", "tree", "count", "start")
+
+    def __init__(self, future: Future, remaining: set[str], msg: Message | list[Message],
+                 timeout: float | None, retries: int, tree=None, count: int = 1):
+        self.future = future
+        self.remaining = remaining
+        self.msg = msg
+        self.timeout = timeout
+        self.retries = retries
+        self.timer = None
+        self.tree = tree
+        self.count = count
+        self.start = 0.0
+
+class _Batch:
+    """ Délivrance d'un lot (`_deliver_many`) : horloge, dépôts en BAL et ACKs (par
+    émetteur) sont différés jusqu'à la fin du lot, puis faits en une fois."""
+    __slots__ = ("lamport", "deposits", "acks")
+
+    def __init__(self):
+        self.lamport = 0
+        self.deposits: list[Message] = []
+        self.acks: dict[int, list[int]] = {}
+
+class _DisseminationState:
+    """ Barrière à dissémination en cours : au tour k, on notifie le participant
+    de rang (r + 2^k) mod n et on attend celui de rang (r - 2^k) mod n."""
+    __slots__ = ("generation", "participants", "rank", "round", "rounds", "future")
+
+    def __init__(self, generation: int, participants: list[int], rank: int, future: Future):
+        self.generation = generation
+        self.participants = participants
+        self.rank = rank
+        self.round = 0
+        self.rounds = (len(participants) - 1).bit_length()
+        self.future = future
 
 class Com:
     """
     Communicateur (intergiciel) : point d'entrée unique des processus.
     - Maintient l'horloge de Lamport et la BAL
-    - Offre l'API async/sync (broadcast, sendTo, ... + ACKs)
+    - Offre l'API async/sync (broadcast, sendTo, ... + ACKs) et les diffusions à ordre total / causal
+    - Offre les opérations collectives (bcast, reduce, allreduce, gather, scatter)
     - Gère la barrière globale (synchronize)
-    - Implémente la SC via token
-    - Publie des `UserEvent` via PyBus côté ENVOI (optionnel, pour logs)
+    - Implémente la SC via token (moteur sélectionnable : anneau ou Suzuki–Kasami)
+    - Publie des `UserEvent` via PyBus côté ENVOI (optionnel et échantillonné, pour logs)
+    - Tient ses métriques (`metrics` : compteurs, histogrammes, `snapshot()`)
     """
-    def __init__(self, bus: "Bus", on_receive: Callable[[Message], None] | None = None):
-        """ Construit le communicateur et rejoint le bus. """
+    def __init__(self, bus: "Bus", on_receive: Callable[[Message], None] | None = None,
+                 sc_mode: str = "ring", ack_timeout: float | None = None, ack_retries: int = 0,
+                 barrier_mode: str = "bus", heartbeat_sec: float | None = HEARTBEAT_SEC,
+                 fanout: str = "direct", fanout_k: int = FANOUT_K,
+                 mailbox_capacity: int | None = None, mailbox_bytes: int | None = None,
+                 mailbox_policy: str = "block", event_sample: float = EVENT_SAMPLE,
+                 sc_permits: int = 1):
+        """ Construit le communicateur et rejoint le bus.
+        `sc_mode` choisit le moteur de SC (`"ring"`, `"suzuki"` ou `"shared"`, cf.
+        `Mutex.SC_MODES`), instancié pour chaque ressource nommée de `requestSC`.
+        `sc_permits` : permis du jeton du moteur `"shared"` (au plus `sc_permits`
+        détenteurs partagés simultanés, un détenteur exclusif les prend tous).
+        `ack_timeout` / `ack_retries` : délai d'attente des ACKs (None = infini) et nombre
+        de retransmissions avant d'échouer, par défaut pour les envois 'sync'.
+        `barrier_mode` : `"bus"` (compteur central dans le `Bus`) ou `"dissemination"`
+        (échange de `BarrierMessage` en log2(N) tours, sans coordinateur).
+        `heartbeat_sec` : période des heartbeats envoyés au détecteur de pannes du bus
+        (None = aucun ; le `Com` sera alors retiré par le détecteur).
+        `fanout` : diffusion `"direct"` (l'émetteur envoie les N-1 copies), `"tree"`
+        (relais le long d'un arbre d'arité `fanout_k`, ACKs agrégés) ou `"gossip"`
+        (épidémique pour `broadcast`, arbre pour les envois 'sync'), cf. `Fanout.FANOUT_MODES`.
+        `mailbox_capacity` / `mailbox_bytes` : bornes de la BAL (None = non bornée), en
+        messages / octets approximatifs ; `mailbox_policy` quand elle est pleine : `"block"`
+        (l'émetteur attend), `"drop_oldest"` (les plus anciens sont jetés) ou `"reject"`
+        (`MailboxFull` levée chez l'émetteur), cf. `Mailbox`.
+        `event_sample` : fraction des envois applicatifs publiés en `UserEvent` PyBus
+        (0 = aucun, 1 = tous) ; les `TokenEvent` ne sont publiés que si elle est non nulle."""
         self.bus = bus
-        self.node_uid = f"{uuid.uuid4()}"
-        self.id_lock = threading.RLock()
-        self.id: int = -1
+        self.node_uid = bus.new_uid()
+        # (vue, rang) : l'id logique n'est recalculé qu'une fois par vue
+        self._id_cache: tuple[View | None, int] = (None, -1)
 
         # --- Horloge Lamport ---
         self.clock_lock = threading.RLock()
         self.clock = 0
 
-        # --- BAL ---
-        self.mailbox = deque()
-        self.mailbox_lock = threading.RLock()
-        self.mailbox_has_msg = threading.Event()
+        # --- BAL (indexée par émetteur / kind) ---
+        self.mailbox = Mailbox(mailbox_capacity, mailbox_bytes, mailbox_policy)
+
+        # --- Instrumentation ---
+        self.event_sample = event_sample
+        self.metrics = Metrics({"mailbox_depth": lambda: len(self.mailbox),
+                                "mailbox_dropped": lambda: self.mailbox.dropped})
+
+        # --- Ordre total (broadcastOrdered, BAL dédiée) ---
+        self._order = TotalOrder(self)
+
+        # --- Ordre causal (broadcastCausal, horloges vectorielles) ---
+        self._causal = CausalOrder(self)
+
+        # --- Collectives (reduce, allreduce, ..., BAL dédiée) ---
+        self._coll = Collectives(self)
 
         # --- Sync (ACKs) ---
         self._ack_lock = threading.RLock()
-        # seq -> (event, remaining_acks)
-        self._pending_acks: dict[int, tuple[threading.Event, int]] = {}
+        # seq -> envoi en attente (future + UID restant à acquitter)
+        self._pending_acks: dict[int, _PendingAck] = {}
         self._ack_seq = 0
+        self.ack_timeout = ack_timeout
+        self.ack_retries = ack_retries
+        # (émetteur, ack_seq) déjà déposés : une retransmission est ré-acquittée, pas re-déposée
+        self._seen_sync: OrderedDict[tuple[int, int], None] = OrderedDict()
+
+        # --- Diffusion (directe, arbre ou gossip) ---
+        if fanout not in FANOUT_MODES:
+            raise ValueError(f"fanout inconnu: {fanout!r}")
+        self._fanout = FANOUT_MODES[fanout](self, fanout_k)
 
         # --- Barrière ---
-        self._barrier_evt = threading.Event()
+        if barrier_mode not in ("bus", "dissemination"):
+            raise ValueError(f"barrier_mode inconnu: {barrier_mode!r}")
+        self.barrier_mode = barrier_mode
+        self._barrier_lock = threading.Lock()
+        self._barrier_waiters: dict[str, list[Future]] = {}
+        # dissémination : génération locale, état en cours et notifications reçues
+        self._diss_gen: dict[str, int] = {}
+        self._diss_active: dict[str, _DisseminationState] = {}
+        self._diss_inbox: set[tuple[str, int, int]] = set()
 
         # --- SC state machine (demandée par le prof) ---
         # idle -> request -> sc -> release -> idle
-        self._sc_lock = threading.RLock()
-        self.sc_state = "idle"
-        self._in_sc_evt = threading.Event()  # réveille requestSC() quand on passe en "sc"
+        # un moteur (et un jeton) par ressource, créé à la première utilisation
+        if sc_mode not in SC_MODES:
+            raise ValueError(f"sc_mode inconnu: {sc_mode!r}")
+        if sc_permits < 1:
+            raise ValueError(f"sc_permits doit être >= 1: {sc_permits!r}")
+        self._sc_engine = SC_MODES[sc_mode]
+        self.sc_permits = sc_permits
+        self._mutexes: dict[str, MutexEngine] = {}  # remplacé (jamais modifié) : lu sans verrou
+        self._mutexes_lock = threading.Lock()
+        self._sc_entered: dict[str, float] = {}  # ressource -> instant d'entrée (métrique sc_hold)
+
+        # --- File d'entrée (mode `Bus(queued=True)` uniquement) ---
+        self._inbox: queue.SimpleQueue | None = None
+        self._dispatcher: threading.Thread | None = None
 
         # --- Callbacks app (optionnel) ---
         self.on_receive = on_receive
 
-        # --- Join ---
-        self.id = self.bus.join(self)
+        # --- Heartbeats (détection de pannes, cf. `FailureDetector`) ---
+        self.heartbeat_sec = heartbeat_sec
+        self._hb_timer = None
+        self._closed = False
 
-        # Jeton initial au P0
-        if self.id == 0:
-            self._deliver(Token(holder=0))
+        # --- Join ---
+        self.bus.join(self)
+        if heartbeat_sec is not None:
+            self._hb_timer = self.bus.scheduler.call_later(heartbeat_sec, self._send_heartbeat)
+
+        # Jeton initial (ressource par défaut) au P0
+        self._mutex(DEFAULT_RESOURCE, start=True)
+
+    # === Vue de membres ===
+    @property
+    def id(self) -> int:
+        """Id logique : rang de ce `Com` dans la vue courante du bus (-1 hors vue)."""
+        view = self.bus.view
+        cached = self._id_cache
+        if cached[0] is not view:
+            cached = self._id_cache = (view, view.index(self.node_uid))
+        return cached[1]
+
+    @property
+    def world_size(self) -> int:
+        """Nombre de processus dans la vue courante."""
+        return len(self.bus.view)
 
     # === Horloge ===
     def inc_clock(self, delta: int = 1):
@@ -90,147 +241,393 @@ class Com:
     def broadcast(self, payload: object):
         """Envoi asynchrone à tous les processus (sauf soi-même).
         - Incrémente l'horloge
-        - Publie un `UserEvent` via PyBus (si dispo)
+        - Compte l'envoi, publie un `UserEvent` via PyBus (si échantillonné)
         - Diffuse sur le bus
         """
+        credits = self.bus.reserve((payload,), exclude_uid=self.node_uid)
         ts = self.inc_clock()
         msg = BroadcastMessage(payload=payload, lamport=ts, sender=self.id)
-        if _HAS_PYBUS:
-            try:
-                PyBus.Instance().post(UserEvent(sender=self.id, lamport=ts, payload=payload))
-            except Exception:
-                pass
-        self.bus.broadcast(msg, exclude_uid=self.node_uid)
+        self._on_send(ts, payload)
+        self._fanout.broadcast(_credited(msg, credits))
 
     def sendTo(self, payload: object, dest: int):
         """ Envoi asynchrone point-à-point."""
+        credits = self.bus.reserve((payload,), dest=dest)
         ts = self.inc_clock()
         msg = MessageTo(payload=payload, lamport=ts, sender=self.id, dest=dest)
-        if _HAS_PYBUS:
-            try:
-                PyBus.Instance().post(UserEvent(sender=self.id, lamport=ts, payload=payload))
-            except Exception:
-                pass
-        self.bus.sendto(dest, msg)
+        self._on_send(ts, payload)
+        self.bus.sendto(dest, _credited(msg, credits))
 
-    def receive(self, block: bool = True, timeout: float | None = None) -> Message | None:
-        """ Lit la BAL."""
-        if block:
-            if not self.mailbox_has_msg.wait(timeout=timeout):
-                return None
-        with self.mailbox_lock:
-            if not self.mailbox:
-                self.mailbox_has_msg.clear()
-                return None
-            m = self.mailbox.popleft()
-            if not self.mailbox:
-                self.mailbox_has_msg.clear()
-            return m
+    def joinGroup(self, name: str):
+        """ Rejoint le groupe `name` : reçoit désormais ses `broadcastGroup`."""
+        self.bus.join_group(self.node_uid, name)
 
-    # === API synchrone (bloquante) ===
-    def broadcastSync(self, payload: object, from_id: int):
-        """ Diffuse à tous et bloque jusqu'à réception de N-1 ACK."""
-        if self.id == from_id:
-            ts = self.inc_clock()
-            seq = self._new_seq()
-            msg = BroadcastMessage(payload=payload, lamport=ts, sender=self.id)
-            msg.ack_seq = seq
+    def leaveGroup(self, name: str):
+        """ Quitte le groupe `name`."""
+        self.bus.leave_group(self.node_uid, name)
 
-            if _HAS_PYBUS:
-                try:
-                    PyBus.Instance().post(UserEvent(sender=self.id, lamport=ts, payload=payload))
-                except Exception:
-                    pass
+    def broadcastGroup(self, name: str, payload: object):
+        """ Envoi asynchrone aux seuls membres du groupe `name` (sauf soi-même),
+        membre ou non de ce groupe."""
+        credits = self.bus.reserve((payload,), exclude_uid=self.node_uid, group=name)
+        ts = self.inc_clock()
+        msg = GroupMessage(payload=payload, lamport=ts, sender=self.id, group=name)
+        self._on_send(ts, payload)
+        self.bus.broadcast_group(name, _credited(msg, credits), exclude_uid=self.node_uid)
+
+    def receive(self, block: bool = True, timeout: float | None = None,
+                predicate: Callable[[Message], bool] | None = None) -> Message | None:
+        """ Lit la BAL : retire le premier message (ou le premier qui satisfait
+        `predicate`), sans toucher aux autres."""
+        return self.mailbox.get(block=block, timeout=timeout, predicate=predicate)
+
+    # === Envois par lots ===
+    def broadcastMany(self, payloads, sync: bool = False, timeout=_DEFAULT,
+                      retries=_DEFAULT) -> Future | None:
+        """Diffuse plusieurs messages (dans l'ordre) en un seul appel au bus : une prise
+        de `clock_lock` (estampilles consécutives), un seul `UserEvent` (payload = la
+        liste) et une délivrance groupée chez chaque destinataire (diffusion directe).
+        Avec `sync`, retourne une `Future` résolue quand tous ont acquitté tout le lot ;
+        chaque destinataire l'acquitte par un seul ACK cumulatif."""
+        payloads = list(payloads)
+        if not payloads:
+            fut: Future = Future()
+            fut.set_result(None)
+            return fut if sync else None
+        credits = self.bus.reserve(payloads, exclude_uid=self.node_uid)
+        msgs = self._stamp_many(payloads, BroadcastMessage, ())
+        if credits:
+            for m, credit in zip(msgs, credits):
+                m.credit = credit
+        if not sync:
+            self.bus.broadcast_many(msgs, exclude_uid=self.node_uid)
+            return None
+        remaining = set(self.bus.view.members)
+        remaining.discard(self.node_uid)
+        fut = self._track_acks(msgs, remaining, timeout, retries)
+        self.bus.broadcast_many(msgs, exclude_uid=self.node_uid)
+        return fut
+
+    def sendToMany(self, payloads, dest: int):
+        """Envoie plusieurs messages (dans l'ordre) à `dest` en un seul appel au bus."""
+        payloads = list(payloads)
+        if payloads:
+            credits = self.bus.reserve(payloads, dest=dest)
+            msgs = self._stamp_many(payloads, MessageTo, (dest,))
+            if credits:
+                for m, credit in zip(msgs, credits):
+                    m.credit = credit
+            self.bus.sendto_many(dest, msgs)
+
+    def sendBuffer(self, max_msgs: int = SEND_BATCH, max_delay: float | None = SEND_BATCH_DELAY) -> SendBuffer:
+        """Tampon d'envoi (`SendBuffer.py`) : `broadcast` / `sendTo` y sont accumulés et
+        partent par lots (`broadcastMany` / `sendToMany`) dès `max_msgs` messages ou
+        après `max_delay` secondes."""
+        return SendBuffer(self, max_msgs, max_delay)
+
+    # === Ordre total ===
+    def broadcastOrdered(self, payload: object):
+        """Diffusion à ordre total : tous les processus (émetteur compris) délivrent
+        les messages ordonnés dans le même ordre, (lamport, UID d'origine).
+        Lecture via `receiveOrdered()`."""
+        ts = self._order.send(payload).lamport
+        self._on_send(ts, payload)
+
+    def receiveOrdered(self, block: bool = True, timeout: float | None = None) -> Message | None:
+        """Retire le prochain message ordonné délivré (ordre total), ou None."""
+        return self._order.mailbox.get(block=block, timeout=timeout)
+
+    # === Ordre causal ===
+    def broadcastCausal(self, payload: object):
+        """Diffusion causale : un message n'est délivré (dans la BAL, lu par
+        `receive()`) qu'après tous ceux que son émetteur avait délivrés ou envoyés
+        avant lui. Pas d'ACK : aucune latence d'aller-retour."""
+        credits = self.bus.reserve((payload,), exclude_uid=self.node_uid)
+        ts = self._causal.send(payload, credits[0] if credits else None).lamport
+        self._on_send(ts, payload)
+
+    # === Collectives ===
+    def bcast(self, value: object = None, root: int = 0, timeout: float | None = None) -> object:
+        """Retourne chez tous la `value` de `root` (arbre binomial, log2(N) étapes).
+        Comme toutes les collectives : à appeler par tous les membres, dans le même
+        ordre ; `TimeoutError` si une étape n'arrive pas avant `timeout`."""
+        return self._coll.bcast(value, root, timeout)
+
+    def reduce(self, value: object, op="sum", root: int = 0, timeout: float | None = None) -> object:
+        """Combine les `value` de tous avec `op` (`"sum"`, `"prod"`, `"min"`, `"max"` ou
+        fonction binaire associative) ; résultat chez `root`, None ailleurs."""
+        return self._coll.reduce(value, op, root, timeout)
+
+    def allreduce(self, value: object, op="sum", timeout: float | None = None,
+                  schedule: str = "tree") -> object:
+        """Comme `reduce`, mais le résultat est retourné à tous. `schedule="doubling"` :
+        doublement récursif (moins d'étapes, plus de messages)."""
+        return self._coll.allreduce(value, op, timeout, schedule)
+
+    def gather(self, value: object, root: int = 0, timeout: float | None = None) -> list | None:
+        """Liste des `value` de tous (indexée par id) chez `root`, None ailleurs."""
+        return self._coll.gather(value, root, timeout)
+
+    def scatter(self, values=None, root: int = 0, timeout: float | None = None) -> object:
+        """`root` fournit N valeurs ; chaque membre i reçoit `values[i]`."""
+        return self._coll.scatter(values, root, timeout)
 
-            remaining = WORLD_SIZE - 1
-            evt = threading.Event()
-            with self._ack_lock:
-                self._pending_acks[seq] = (evt, remaining)
-            self.bus.broadcast(msg, exclude_uid=self.node_uid)
-            evt.wait()
+    # === API synchrone (bloquante) ===
+    def broadcastSync(self, payload: object, from_id: int, timeout=_DEFAULT, retries=_DEFAULT,
+                      group: str | None = None):
+        """ Diffuse à tous et bloque jusqu'à réception de N-1 ACK.
+        Avec `group`, diffuse au groupe et n'attend que les ACK de ses membres.
+        Lève `TimeoutError` si un timeout est configuré et que des ACKs manquent."""
+        if self.id == from_id:
+            self.broadcastSyncAsync(payload, timeout, retries, group).result()
 
-    def sendToSync(self, payload: object, dest: int):
+    def sendToSync(self, payload: object, dest: int, timeout=_DEFAULT, retries=_DEFAULT):
         """ Envoi point-à-point bloquant jusqu'à réception d'un ACK."""
+        self.sendToSyncAsync(payload, dest, timeout, retries).result()
+
+    def broadcastSyncAsync(self, payload: object, timeout=_DEFAULT, retries=_DEFAULT,
+                           group: str | None = None) -> Future:
+        """ Diffuse à tous sans bloquer. La `Future` est résolue quand les N-1 ACK sont
+        arrivés, ou échoue en `TimeoutError` après `retries` retransmissions aux
+        processus qui n'ont pas acquitté. Plusieurs envois peuvent être en vol à la fois.
+        Avec `group`, seuls les membres du groupe reçoivent et acquittent."""
+        credits = self.bus.reserve((payload,), exclude_uid=self.node_uid, group=group)
         ts = self.inc_clock()
-        seq = self._new_seq()
-        msg = MessageTo(payload=payload, lamport=ts, sender=self.id, dest=dest)
-        msg.ack_seq = seq
-
-        if _HAS_PYBUS:
-            try:
-                PyBus.Instance().post(UserEvent(sender=self.id, lamport=ts, payload=payload))
-            except Exception:
-                pass
-
-        evt = threading.Event()
-        with self._ack_lock:
-            self._pending_acks[seq] = (evt, 1)
+        self._on_send(ts, payload)
+        if group is None:
+            msg = BroadcastMessage(payload=payload, lamport=ts, sender=self.id)
+            return self._fanout.broadcast_sync(_credited(msg, credits), timeout, retries)
+        msg = _credited(GroupMessage(payload=payload, lamport=ts, sender=self.id, group=group), credits)
+        remaining = set(self.bus.group_members(group))
+        remaining.discard(self.node_uid)
+        fut = self._track_acks(msg, remaining, timeout, retries)
+        self.bus.broadcast_group(group, msg, exclude_uid=self.node_uid)
+        return fut
+
+    def sendToSyncAsync(self, payload: object, dest: int, timeout=_DEFAULT, retries=_DEFAULT) -> Future:
+        """ Envoi point-à-point sans bloquer ; la `Future` est résolue à l'ACK de `dest`
+        (échoue en `ValueError` si `dest` n'est pas dans la vue courante)."""
+        dest_uid = self.bus.view.uid(dest)
+        if dest_uid is None:
+            fut: Future = Future()
+            fut.set_exception(ValueError(f"destinataire hors vue: {dest}"))
+            return fut
+        credits = self.bus.reserve((payload,), dest=dest)
+        ts = self.inc_clock()
+        msg = _credited(MessageTo(payload=payload, lamport=ts, sender=self.id, dest=dest), credits)
+        self._on_send(ts, payload)
+        fut = self._track_acks(msg, {dest_uid}, timeout, retries)
         self.bus.sendto(dest, msg)
-        evt.wait()
+        return fut
 
     def recvFromSync(self, from_id: int, timeout: float | None = None) -> Message | None:
-        """ Lit un message utilisateur *provenant d'un id précis*."""
-        t0 = time.time()
-        while True:
-            m = self.receive(block=True, timeout=timeout)
-            if m and getattr(m, "sender", None) == from_id and m.kind == MsgKind.USER:
-                return m
-            if timeout is not None and (time.time() - t0) > timeout:
-                return None
+        """ Lit un message utilisateur *provenant d'un id précis*.
+        Les messages des autres émetteurs restent dans la BAL."""
+        return self.mailbox.get(timeout=timeout, sender=from_id, kind=MsgKind.USER)
 
     # === Barrière ===
-    def synchronize(self):
-        """Barrière globale : bloque jusqu'à ce que tous les `Com` aient appelé
-        `synchronize()`. Le `Bus` déclenche ensuite `_onBarrierRelease()` partout."""
-        self.bus.barrier_arrive(self.node_uid)
-        self._barrier_evt.wait()
-        self._barrier_evt.clear()
-
-    # === Section critique distribuée (style prof) ===
-    def requestSC(self):
-        """ Demande d'entrée en section critique.
-        Place l'état à "request" et attend que le handler de token
-        fasse passer l'état à "sc" (ce qui déclenche `_in_sc_evt.set()`)."""
-        # Je demande la SC et j'attends d'y entrer
-        with self._sc_lock:
-            self.sc_state = "request"
-        self._in_sc_evt.wait()
-
-    def releaseSC(self):
-        """ Sortie de section critique. Ne renvoie PAS le token. Se contente de poser l'état "release".
-        Le handler de token détectera "release", remettra "idle"
-        et enverra le token au suivant."""
-        with self._sc_lock:
-            self.sc_state = "release"
-        self._in_sc_evt.clear()
+    def synchronize(self, name: str = GLOBAL_BARRIER, members: list[int] | None = None) -> int:
+        """Barrière : bloque jusqu'à ce que tous les participants aient appelé
+        `synchronize()` avec le même `name`. Par défaut, barrière globale ;
+        `members` (ids logiques) restreint une barrière nommée à un sous-groupe.
+        Retourne le numéro de génération libérée."""
+        now = self.bus.scheduler.now
+        t0 = now()
+        generation = self.synchronizeAsync(name, members).result()
+        self.metrics.observe("barrier_wait", now() - t0)
+        return generation
+
+    def synchronizeAsync(self, name: str = GLOBAL_BARRIER, members: list[int] | None = None) -> Future:
+        """Arrivée à la barrière sans bloquer : la `Future` est résolue (avec le
+        numéro de génération) à la libération."""
+        fut: Future = Future()
+        fut.set_running_or_notify_cancel()
+        if self.barrier_mode == "dissemination":
+            self._diss_start(name, members, fut)
+            return fut
+        with self._barrier_lock:
+            self._barrier_waiters.setdefault(name, []).append(fut)
+        self.bus.barrier_arrive(self.node_uid, name, members)
+        return fut
+
+    @property
+    def sc_state(self) -> str:
+        """État courant de la SC (ressource par défaut) : "idle", "request", "sc" ou "release"."""
+        return self._mutex(DEFAULT_RESOURCE).state
+
+    def scStateOf(self, resource: str) -> str:
+        """État courant de la SC de la ressource `resource`."""
+        eng = self._mutexes.get(resource)
+        return "idle" if eng is None else eng.state
+
+    def requestSC(self, resource: str = DEFAULT_RESOURCE, shared: bool = False):
+        """ Demande d'entrée en section critique sur `resource` (un jeton par ressource :
+        des ressources distinctes ne se disputent rien).
+        `shared` : accès partagé (lecteur, ou k-exclusion) avec `sc_mode="shared"` ;
+        exclusif avec les autres moteurs.
+        Bloque jusqu'à ce que le moteur de SC fasse passer l'état à "sc"."""
+        now = self.bus.scheduler.now
+        t0 = now()
+        self._mutex(resource, start=True).request(shared)
+        self._sc_entered[resource] = t1 = now()
+        self.metrics.observe("sc_wait", t1 - t0)
+
+    def requestSCAsync(self, resource: str = DEFAULT_RESOURCE, shared: bool = False) -> Future:
+        """ Demande d'entrée en SC sans bloquer : la `Future` est résolue à l'entrée en SC."""
+        now = self.bus.scheduler.now
+        t0 = now()
+        fut = self._mutex(resource, start=True).request_async(shared)
+        def entered(f: Future):
+            if f.exception() is None:
+                self._sc_entered[resource] = t1 = now()
+                self.metrics.observe("sc_wait", t1 - t0)
+        fut.add_done_callback(entered)
+        return fut
+
+    def releaseSC(self, resource: str = DEFAULT_RESOURCE):
+        """ Sortie de section critique de `resource`. Le moteur décide à qui transmettre
+        le jeton (suivant sur l'anneau, ou premier demandeur en attente)."""
+        entered = self._sc_entered.pop(resource, None)
+        if entered is not None:
+            self.metrics.observe("sc_hold", self.bus.scheduler.now() - entered)
+        eng = self._mutexes.get(resource)
+        if eng is not None:
+            eng.release()
 
     # === Arrêt ===
     def close(self):
-        """Quitte proprement le bus (désenregistrement)."""
+        """Quitte proprement le bus (désenregistrement) et arrête le dispatcher éventuel
+        ainsi que les heartbeats."""
+        self._closed = True
+        if self._hb_timer is not None:
+            self._hb_timer.cancel()
+        for eng in self._mutexes.values():
+            eng.stop()
         self.bus.leave(self)
+        if self._inbox is not None:
+            self._inbox.put(None)
+
+    # === File d'entrée / dispatcher ===
+    def _post(self, msg: Message):
+        """Point d'entrée utilisé par le `Bus`. Livre directement, ou enfile le message
+        si ce `Com` possède sa propre file (mode `queued`)."""
+        if self._inbox is None:
+            self._deliver(msg)
+        else:
+            self._inbox.put(msg)
+
+    def _post_many(self, msgs: list[Message]):
+        """Comme `_post`, pour un lot (`Bus.broadcast_many` / `sendto_many`) : une seule
+        entrée dans la file, délivrée d'un bloc par `_deliver_many`."""
+        if self._inbox is None:
+            self._deliver_many(msgs)
+        else:
+            self._inbox.put(msgs)
+
+    def _start_dispatcher(self):
+        """Crée la file d'entrée et démarre le thread qui la vide vers `_deliver`."""
+        if self._inbox is not None:
+            return
+        self._inbox = queue.SimpleQueue()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                            name=f"com-{self.node_uid[:8]}", daemon=True)
+        self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        """Boucle du dispatcher : un message (ou un lot) à la fois, dans l'ordre d'arrivée.
+        `None` est la sentinelle d'arrêt posée par `close()`."""
+        inbox = self._inbox
+        while True:
+            msg = inbox.get()
+            if msg is None:
+                return
+            try:
+                if type(msg) is list:
+                    self._deliver_many(msg)
+                else:
+                    self._deliver(msg)
+            except Exception:
+                pass
 
     # === Délivrance de tout message entrant ===
-    def _deliver(self, msg: Message):
+    def _deliver_many(self, msgs: list[Message]):
+        """Délivre un lot : dépôts en BAL groupés (`Mailbox.put_many`) et un ACK
+        cumulatif par plage de `ack_seq` consécutifs d'un même émetteur."""
+        batch = _Batch()
+        for msg in msgs:
+            self._deliver(msg, batch)
+        if batch.deposits:
+            # la réception du lot compte pour un évènement de Lamport
+            self.update_clock_on_recv(batch.lamport)
+        self.mailbox.put_many(batch.deposits)
+        self.metrics.inc("received", len(batch.deposits))
+        if self.on_receive:
+            for msg in batch.deposits:
+                try:
+                    self.on_receive(msg)
+                except Exception:
+                    pass
+        me, my_uid = self.id, self.node_uid
+        for sender, seqs in batch.acks.items():
+            seqs.sort()
+            lo = prev = seqs[0]
+            for s in seqs[1:] + [None]:
+                if s is not None and s == prev + 1:
+                    prev = s
+                    continue
+                ack = (AckMessage(seq=lo, sender=me, uid=my_uid) if lo == prev
+                       else AckRangeMessage(lo, prev, me, my_uid))
+                self.bus.sendto(sender, ack)
+                if s is not None:
+                    lo = prev = s
+
+    def _deliver(self, msg: Message, batch: _Batch | None = None):
         """
         Point d'entrée unique de *tous* les messages reçus (système et utilisateur).
-        - USER: met à jour Lamport, peut renvoyer un ACK si message 'sync',
-          et dépose en BAL (+ callback utilisateur éventuel)
-        - ACK: décrémente le compteur d'ACKs en attente et réveile l'émetteur si terminé
-        - RENUMBER: met à jour `self.id` (utile si vous gardez cette mécanique)
-        - TOKEN: implémente la machine d'états SC et forward asynchrone
+        - USER: met à jour Lamport, peut renvoyer un ACK si message 'sync' (relaie
+          les diffusions en arbre / gossip, `Fanout.py`), et dépose en BAL (+ callback éventuel)
+        - ACK: décrémente le compteur d'ACKs en attente et réveille l'émetteur si terminé
+          (un `AckRangeMessage` couvre une plage de numéros)
+        Avec `batch` (délivrance d'un lot), dépôts en BAL et ACKs sont différés.
+        - VIEW: départs de membres, qui ne sont plus attendus par les envois 'sync',
+          un recensement du jeton, ni par l'ordre total ou causal
+        - BARRIER: tour de barrière à dissémination
+        - TOKEN / SC_REQUEST / TOKEN_CENSUS: délégués au moteur de SC (`Mutex.py`)
+        - ORDERED / CLOCK: ordre total (rétention jusqu'à stabilité, `Ordering.py`)
+        - CAUSAL: ordre causal (attente des dépendances, `Ordering.py`)
+        - COLLECTIVE: étape d'une opération collective (BAL dédiée, `Collectives.py`)
         """
         if msg.kind == MsgKind.USER:
             # Horloge Lamport
-            self.update_clock_on_recv(msg.lamport)
-            # ACK si message sync
+            if batch is None:
+                self.update_clock_on_recv(msg.lamport)
+            elif msg.lamport > batch.lamport:
+                batch.lamport = msg.lamport
             ack_seq = getattr(msg, "ack_seq", None)
-            if ack_seq is not None and msg.sender is not None:
-                self.bus.sendto(msg.sender, AckMessage(seq=ack_seq, sender=self.id))
-
-            # Dépôt BAL
-            with self.mailbox_lock:
-                self.mailbox.append(msg)
-                self.mailbox_has_msg.set()
+            if isinstance(msg, (TreeMessage, GossipMessage)):
+                # Diffusion relayée : relais, ACK (agrégé) et doublons gérés par `Fanout.py`
+                if not self._fanout.on_relay(msg):
+                    return
+            # ACK si message sync (une retransmission est ré-acquittée mais pas re-déposée)
+            elif ack_seq is not None and msg.sender is not None:
+                if batch is None:
+                    self.bus.sendto(msg.sender, AckMessage(seq=ack_seq, sender=self.id, uid=self.node_uid))
+                else:
+                    batch.acks.setdefault(msg.sender, []).append(ack_seq)
+                key = (msg.sender, ack_seq)
+                with self._ack_lock:
+                    if key in self._seen_sync:
+                        return
+                    self._seen_sync[key] = None
+                    if len(self._seen_sync) > SYNC_DEDUP_WINDOW:
+                        self._seen_sync.popitem(last=False)
+
+            # Dépôt BAL (différé en fin de lot)
+            if batch is not None:
+                batch.deposits.append(msg)
+                return
+            self.mailbox.put(msg)
+            self.metrics.inc("received")
 
             # Callback éventuel
             if self.on_receive:
@@ -243,82 +640,288 @@ class Com:
         elif msg.kind == MsgKind.ACK:
             seq = getattr(msg, "seq", None)
             if seq is not None:
+                upto = getattr(msg, "upto", seq)
+                # l'acquitteur par son UID : une renumérotation entre l'envoi et le
+                # traitement de l'ACK ne doit pas créditer un autre membre
+                uid = getattr(msg, "uid", None) or self.bus.view.uid(msg.sender)
+                done = []
                 with self._ack_lock:
-                    evt, remaining = self._pending_acks.get(seq, (None, 0))
-                    if evt:
-                        remaining -= 1
-                        if remaining <= 0:
-                            self._pending_acks.pop(seq, None)
-                            evt.set()
-                        else:
-                            self._pending_acks[seq] = (evt, remaining)
+                    # ACK cumulatif : chaque envoi (ou lot) entièrement couvert par la plage
+                    for s in range(seq, upto + 1):
+                        pending = self._pending_acks.get(s)
+                        if pending is None or s + pending.count - 1 > upto:
+                            continue
+                        pending.remaining.discard(uid)
+                        if pending.remaining:
+                            continue
+                        del self._pending_acks[s]
+                        if pending.timer is not None:
+                            pending.timer.cancel()
+                        done.append(pending)
+                if done:
+                    now = self.bus.scheduler.now()
+                    metrics = self.metrics
+                    for pending in done:
+                        metrics.inc("acked", pending.count)
+                        metrics.observe("ack_rtt", now - pending.start)
+                        if not pending.future.done():
+                            pending.future.set_result(None)
             return
 
-        elif msg.kind == MsgKind.RENUMBER:
-            mapping = msg.payload
-            with self.id_lock:
-                self.id = mapping[self.node_uid]
+        elif msg.kind == MsgKind.VIEW:
+            left = set(msg.payload)
+            done = []
+            sends = []
+            with self._ack_lock:
+                for seq, pending in list(self._pending_acks.items()):
+                    if pending.tree is not None and not left.isdisjoint(pending.remaining):
+                        # un relais parti : son sous-arbre est servi directement
+                        sends.extend(self._flatten(seq, pending, pending.remaining & left))
+                    pending.remaining -= left
+                    if not pending.remaining:
+                        del self._pending_acks[seq]
+                        if pending.timer is not None:
+                            pending.timer.cancel()
+                        done.append(pending.future)
+            for fut in done:
+                if not fut.done():
+                    fut.set_result(None)
+            self._send_to_uids(sends)
+            for eng in self._mutexes.values():
+                eng.on_view()
+            self._order.on_view()
+            self._causal.on_view(self.bus.view)
             return
 
         elif msg.kind == MsgKind.TOKEN:
-            if isinstance(msg, Token) and msg.holder == self.id:
-                if _HAS_PYBUS:
+            if isinstance(msg, Token):
+                # Le bus a routé le jeton jusqu'ici : on en est le détenteur,
+                # même si une renumérotation a changé `holder` entre-temps.
+                msg.holder = self.id
+                if self.event_sample and _HAS_PYBUS:
                     try:
-                        PyBus.Instance().post(TokenEvent(holder=self.id))
+                        PyBus.Instance().post(TokenEvent(holder=self.id, resource=msg.resource))
                     except Exception:
                         pass
+                self._mutex(msg.resource).on_message(msg)
+            return
+
+        elif msg.kind == MsgKind.BARRIER:
+            if isinstance(msg, BarrierMessage):
+                self._on_barrier_message(msg)
+            return
 
-                with self._sc_lock:
-                    want = (self.sc_state == "request")
+        elif msg.kind in (MsgKind.SC_REQUEST, MsgKind.TOKEN_CENSUS):
+            self._mutex(msg.resource).on_message(msg)
+            return
 
-                if not want:
-                    self._forward_token_async((self.id + 1) % WORLD_SIZE)
-                    return
+        elif msg.kind in (MsgKind.ORDERED, MsgKind.CLOCK):
+            self._order.on_message(msg)
+            return
 
-                # J'entre en SC
-                with self._sc_lock:
-                    self.sc_state = "sc"
-                self._in_sc_evt.set()
-
-                # Attendre que releaseSC() bascule l'état sur "release"
-                while True:
-                    time.sleep(0.05)
-                    with self._sc_lock:
-                        if self.sc_state == "release":
-                            self.sc_state = "idle"
-                            break
-
-                # Forward au suivant (ASYNCHRONE)
-                self._in_sc_evt.clear()
-                self._forward_token_async((self.id + 1) % WORLD_SIZE)
+        elif msg.kind == MsgKind.CAUSAL:
+            self._causal.on_message(msg)
+            return
+
+        elif msg.kind == MsgKind.COLLECTIVE:
+            self._coll.on_message(msg)
             return
 
     # === Helpers ===
-    def _new_seq(self) -> int:
-        """Génère un nouveau numéro de séquence pour la mécanique d'ACKs."""
+    def _mutex(self, resource: str, start: bool = False) -> MutexEngine:
+        """ Moteur de SC de `resource`, créé au besoin. `start` (demande locale) : le
+        créateur arbitre le jeton initial auprès du bus ; un moteur créé à la réception
+        d'un message de la ressource ne le fait pas (son jeton existe déjà)."""
+        eng = self._mutexes.get(resource)
+        if eng is not None:
+            return eng
+        with self._mutexes_lock:
+            eng = self._mutexes.get(resource)
+            if eng is not None:
+                return eng
+            eng = self._sc_engine(self, resource)
+            self._mutexes = {**self._mutexes, resource: eng}
+        if start:
+            eng.start()
+        return eng
+
+    def _new_seq(self, count: int = 1) -> int:
+        """Génère `count` numéros de séquence consécutifs pour la mécanique d'ACKs
+        et retourne le premier."""
         with self._ack_lock:
-            self._ack_seq += 1
-            return self._ack_seq
-
-    def _onRenumber(self, mapping: dict[str, int]):
-        """Applique un mapping {uid -> id}. Conserve une voie uniforme
-        (passe par `_deliver` avec un message `RENUMBER`) pour centraliser
-        les effets de bord."""
-        # Utilisé seulement si vous conservez la renumérotation via Bus
-        m = Message(kind=MsgKind.RENUMBER, payload=mapping, lamport=0, sender=None)
+            self._ack_seq += count
+            return self._ack_seq - count + 1
+
+    def _stamp_many(self, payloads: list, cls: type, extra: tuple) -> list[Message]:
+        """Crée les messages d'un lot, d'estampilles consécutives (une prise de
+        `clock_lock`), et publie un seul `UserEvent` pour tout le lot."""
+        with self.clock_lock:
+            first = self.clock + 1
+            self.clock += len(payloads)
+        sender = self.id
+        msgs = [cls(p, first + i, sender, *extra) for i, p in enumerate(payloads)]
+        self._on_send(first, payloads, len(payloads))
+        return msgs
+
+    def _on_send(self, ts: int, payload: object, count: int = 1):
+        """Envoi applicatif (ou lot de `count`) : compté dans `metrics`, et publié en
+        `UserEvent` via PyBus pour une fraction `event_sample` des envois."""
+        self.metrics.inc("sent", count)
+        rate = self.event_sample
+        if rate and _HAS_PYBUS and (rate >= 1.0 or random.random() < rate):
+            try:
+                PyBus.Instance().post(UserEvent(sender=self.id, lamport=ts, payload=payload))
+            except Exception:
+                pass
+
+    def _track_acks(self, msg: Message | list[Message], remaining: set[str], timeout, retries,
+                    tree=None) -> Future:
+        """Enregistre un envoi 'sync' : numérote le message (ou le lot, en numéros
+        consécutifs), crée sa `Future` et arme le minuteur de timeout/retransmission."""
+        timeout = self.ack_timeout if timeout is _DEFAULT else timeout
+        retries = self.ack_retries if retries is _DEFAULT else retries
+        fut: Future = Future()
+        fut.set_running_or_notify_cancel()
+        if not remaining:
+            fut.set_result(None)
+            return fut
+        if isinstance(msg, list):
+            count = len(msg)
+            seq = self._new_seq(count)
+            for i, m in enumerate(msg):
+                m.ack_seq = seq + i
+        else:
+            count = 1
+            seq = self._new_seq()
+            msg.ack_seq = seq
+        pending = _PendingAck(fut, remaining, msg, timeout, retries, tree, count)
+        pending.start = self.bus.scheduler.now()
+        with self._ack_lock:
+            self._pending_acks[seq] = pending
+            if timeout is not None:
+                pending.timer = self.bus.scheduler.call_later(timeout, self._on_ack_timeout, seq)
+        return fut
+
+    def _on_ack_timeout(self, seq: int):
+        """Échéance d'un envoi 'sync' : retransmet aux retardataires ou échoue."""
+        with self._ack_lock:
+            pending = self._pending_acks.get(seq)
+            if pending is None:
+                return
+            if pending.retries <= 0:
+                self._pending_acks.pop(seq, None)
+                missing = sorted(pending.remaining)
+            else:
+                pending.retries -= 1
+                if pending.tree is not None:
+                    # relais silencieux : on ne compte plus sur l'arbre, chacun acquitte
+                    self._flatten(seq, pending, set(pending.remaining))
+                    pending.tree = None
+                targets = [(uid, pending.msg) for uid in pending.remaining]
+                pending.timer = self.bus.scheduler.call_later(pending.timeout, self._on_ack_timeout, seq)
+                missing = None
+        if missing is not None:
+            if not pending.future.done():
+                pending.future.set_exception(TimeoutError(f"ACK manquants (seq={seq}) : {missing}"))
+            return
+        self._send_to_uids(targets)
+
+    def _flatten(self, seq: int, pending: _PendingAck, uids: set[str]) -> list[tuple[str, Message]]:
+        """Envoi relayé : les membres des sous-arbres de `uids` acquitteront désormais
+        un par un. Le message à (re)transmettre devient une copie directe (`k=0`).
+        Retourne les envois à faire. À appeler sous `_ack_lock`."""
+        msg = pending.msg
+        if msg.k:
+            msg = TreeMessage(msg.payload, msg.lamport, msg.sender, msg.origin, self.id, 0, msg.epoch)
+            msg.ack_seq = seq
+            pending.msg = msg
+        view = self.bus.view
+        expect = {uid for uid in pending.tree.expand(uids) if uid in view}
+        expect.discard(self.node_uid)
+        pending.remaining -= uids
+        pending.remaining |= expect
+        return [(uid, msg) for uid in expect]
+
+    def _send_to_uids(self, sends: list[tuple[str, Message | list[Message]]]):
+        """Envoie chaque message (ou lot) au membre d'UID donné (ignoré s'il a quitté la vue)."""
+        view = self.bus.view
+        for uid, msg in sends:
+            dest = view.index(uid)
+            if dest < 0:
+                continue
+            if isinstance(msg, list):
+                self.bus.sendto_many(dest, msg)
+            else:
+                self.bus.sendto(dest, msg)
+
+    def _send_heartbeat(self):
+        """Heartbeat périodique (thread du scheduler) : signale au bus que ce `Com` vit."""
+        if self._closed:
+            return
+        self.bus.heartbeat(self.node_uid)
+        self._hb_timer = self.bus.scheduler.call_later(self.heartbeat_sec, self._send_heartbeat)
+
+    def _onView(self, view: View, left: tuple[str, ...]):
+        """Départs de membres (nouvelle vue `view`). Conserve une voie uniforme
+        (passe par `_deliver` avec un message `VIEW`) pour centraliser
+        les effets de bord. Les arrivées ne sont pas notifiées : `id` et
+        `world_size` relisent la vue courante."""
+        m = Message(kind=MsgKind.VIEW, payload=left, lamport=0, sender=None)
         self._deliver(m)
 
-    def _onBarrierRelease(self):
+    def _onBarrierRelease(self, name: str = GLOBAL_BARRIER, generation: int = 0):
         """
         Callback interne appelé par le bus quand *tous* les participants
-        sont arrivés à la barrière. Débloque `synchronize()`.
+        sont arrivés à la barrière `name`. Débloque `synchronize()`.
         """
-        self._barrier_evt.set()
-
-
-
-    def _forward_token_async(self, next_id: int):
-        """Envoi du token *asynchrone* pour éviter une chaîne de `_deliver` récursive."""
-        def _send():
-            self.bus.sendto(next_id, Token(holder=next_id))
-        threading.Thread(target=_send, daemon=True).start()
+        with self._barrier_lock:
+            waiters = self._barrier_waiters.pop(name, [])
+        for fut in waiters:
+            fut.set_result(generation)
+
+    # === Barrière à dissémination ===
+    def _diss_start(self, name: str, members: list[int] | None, fut: Future):
+        """Démarre une génération de la barrière à dissémination `name`."""
+        participants = sorted(members) if members is not None else list(range(self.world_size))
+        with self._barrier_lock:
+            gen = self._diss_gen.get(name, 0) + 1
+            self._diss_gen[name] = gen
+            st = _DisseminationState(gen, participants, participants.index(self.id), fut)
+            self._diss_active[name] = st
+            sends = self._diss_advance(name, st, first=True)
+        self._diss_send(sends)
+
+    def _on_barrier_message(self, msg: BarrierMessage):
+        """Notification d'un tour de dissémination (éventuellement en avance)."""
+        with self._barrier_lock:
+            self._diss_inbox.add((msg.name, msg.generation, msg.round))
+            st = self._diss_active.get(msg.name)
+            if st is None or st.generation != msg.generation:
+                return
+            sends = self._diss_advance(msg.name, st)
+        self._diss_send(sends)
+
+    def _diss_advance(self, name: str, st: _DisseminationState, first: bool = False) -> list:
+        """Avance les tours tant que les notifications attendues sont là.
+        Retourne les envois à faire (hors verrou). À appeler sous `_barrier_lock`."""
+        n = len(st.participants)
+        sends = []
+        if first and st.rounds:
+            sends.append((st.participants[(st.rank + 1) % n], BarrierMessage(self.id, name, st.generation, 0)))
+        while st.round < st.rounds:
+            key = (name, st.generation, st.round)
+            if key not in self._diss_inbox:
+                return sends
+            self._diss_inbox.discard(key)
+            st.round += 1
+            if st.round < st.rounds:
+                dest = st.participants[(st.rank + (1 << st.round)) % n]
+                sends.append((dest, BarrierMessage(self.id, name, st.generation, st.round)))
+        del self._diss_active[name]
+        st.future.set_result(st.generation)
+        return sends
+
+    def _diss_send(self, sends: list):
+        """Envoie les notifications de dissémination préparées sous verrou."""
+        for dest, msg in sends:
+            self.bus.sendto(dest, msg)
@@ -11,4 +11,5 @@ class UserEvent:
 
 @dataclass
 class TokenEvent:
-    holder: int  # id qui détient le token
\ No newline at end of file
+    holder: int                 # id qui détient le token
+    resource: str = "default"   # ressource protégée par ce jeton
\ No newline at end of file
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import heapq, itertools, math, threading
+from collections import deque
+
+from Com import HEARTBEAT_SEC, HEARTBEAT_TIMEOUT_SEC
+
+class _Watch:
+    """ Suivi d'un nœud : dernier heartbeat, intervalles récents (pour phi) et
+    échéance de son entrée courante dans le tas."""
+    __slots__ = ("last", "intervals", "total", "due")
+
+    def __init__(self, now: float):
+        self.last = now
+        self.intervals: deque[float] = deque()
+        self.total = 0.0
+        self.due = 0.0
+
+class FailureDetector:
+    """
+    Détecteur de pannes à tas d'échéances.
+    - `heartbeat()` ne fait que noter l'instant (O(1), sans toucher au tas)
+    - le tas garde une échéance par nœud ; à son expiration, si un heartbeat plus
+      récent est arrivé, l'entrée est ré-empilée avec sa nouvelle échéance
+      (ré-insertion paresseuse) : pas de parcours de tous les nœuds à chaque vérification
+    - en phi-accrual, une échéance peut aussi *avancer* (heartbeats plus rapprochés que
+      prévu) : une nouvelle entrée est alors empilée, l'ancienne sera ignorée
+    - `phi_threshold` : suspicion adaptative (phi-accrual, modèle exponentiel) ;
+      l'échéance devient l'instant où phi atteint le seuil, d'après l'intervalle moyen
+      observé entre heartbeats. Sinon, délai fixe `timeout`.
+    Les instants sont fournis par l'appelant (horloge du scheduler du bus).
+    """
+
+    def __init__(self, timeout: float = HEARTBEAT_TIMEOUT_SEC, phi_threshold: float | None = None,
+                 interval: float = HEARTBEAT_SEC, window: int = 100):
+        """ `interval` : période de heartbeat supposée tant que trop peu d'intervalles
+        ont été observés ; `window` : nombre d'intervalles retenus pour la moyenne."""
+        self.timeout = timeout
+        self.phi_threshold = phi_threshold
+        self.interval = interval
+        self.window = window
+        self._lock = threading.Lock()
+        self._nodes: dict[str, _Watch] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+
+    def watch(self, uid: str, now: float):
+        """ Commence à surveiller `uid` (comme s'il venait d'émettre un heartbeat)."""
+        with self._lock:
+            w = self._nodes[uid] = _Watch(now)
+            self._push(w, uid, self._deadline(w))
+
+    def forget(self, uid: str):
+        """ Arrête de surveiller `uid` (son entrée du tas sera ignorée)."""
+        with self._lock:
+            self._nodes.pop(uid, None)
+
+    def heartbeat(self, uid: str, now: float) -> bool:
+        """ Note un heartbeat de `uid` (ignoré s'il n'est pas surveillé).
+        Retourne True si son échéance a avancé (l'appelant réarme sa vérification)."""
+        with self._lock:
+            w = self._nodes.get(uid)
+            if w is None:
+                return False
+            if self.phi_threshold is None:
+                w.last = now
+                return False
+            self._observe(w, now)
+            deadline = self._deadline(w)
+            if deadline >= w.due:
+                return False
+            self._push(w, uid, deadline)
+            return True
+
+    def phi(self, uid: str, now: float) -> float:
+        """ Niveau de suspicion de `uid` : -log10(P(aucun heartbeat depuis `last`))."""
+        with self._lock:
+            w = self._nodes.get(uid)
+            if w is None:
+                return math.inf
+            return (now - w.last) / self._mean(w) * math.log10(math.e)
+
+    def next_deadline(self) -> float | None:
+        """ Prochaine échéance à vérifier (None si personne n'est surveillé)."""
+        with self._lock:
+            heap = self._heap
+            while heap and not self._current(heap[0]):
+                heapq.heappop(heap)
+            return self._heap[0][0] if self._heap else None
+
+    def expired(self, now: float) -> list[str]:
+        """ Retire et retourne les nœuds dont l'échéance est dépassée sans heartbeat."""
+        dead = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                if not self._current(entry):
+                    continue
+                uid = entry[2]
+                w = self._nodes[uid]
+                deadline = self._deadline(w)
+                if deadline > now:
+                    self._push(w, uid, deadline)
+                else:
+                    del self._nodes[uid]
+                    dead.append(uid)
+        return dead
+
+    # === Helpers (sous self._lock) ===
+    def _observe(self, w: _Watch, now: float):
+        """ Heartbeat à `now` : ajoute l'intervalle écoulé à la fenêtre de `w`."""
+        dt = now - w.last
+        w.intervals.append(dt)
+        w.total += dt
+        if len(w.intervals) > self.window:
+            w.total -= w.intervals.popleft()
+        w.last = now
+
+    def _push(self, w: _Watch, uid: str, deadline: float):
+        """ Empile l'échéance courante de `w` (les précédentes deviennent caduques)."""
+        w.due = deadline
+        heapq.heappush(self._heap, (deadline, next(self._seq), uid))
+
+    def _current(self, entry: tuple[float, int, str]) -> bool:
+        """ True si l'entrée du tas est l'échéance en vigueur d'un nœud surveillé."""
+        w = self._nodes.get(entry[2])
+        return w is not None and w.due == entry[0]
+
+    def _mean(self, w: _Watch) -> float:
+        """ Intervalle moyen observé (ou `interval` tant qu'il y a peu d'observations)."""
+        if len(w.intervals) < 3:
+            return self.interval
+        return max(w.total / len(w.intervals), 1e-3)
+
+    def _deadline(self, w: _Watch) -> float:
+        """ Instant où `w` sera suspecté faute de nouveau heartbeat."""
+        if self.phi_threshold is None:
+            return w.last + self.timeout
+        # phi(t) = t / moyenne * log10(e)  =>  phi = seuil pour t = seuil * moyenne * ln(10)
+        return w.last + self.phi_threshold * self._mean(w) * math.log(10)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import math, random, threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+from BroadcastMessage import BroadcastMessage
+from Mailbox import settle
+from Message import AckMessage
+
+if TYPE_CHECKING:
+    from Com import Com
+    from View import View
+
+FANOUT_K = 4             # arité de l'arbre / pairs contactés à chaque saut de gossip
+GOSSIP_TTL_EXTRA = 2     # sauts de gossip au-delà de ceil(log_k N)
+RELAY_DEDUP_WINDOW = 4096
+
+class TreeMessage(BroadcastMessage):
+    """
+    Diffusion relayée le long d'un arbre k-aire enraciné en `sender`.
+    `origin` : UID de la racine ; `relay` : id du nœud qui a fait ce saut (à qui
+    revient l'ACK) ; `k` : arité (0 = copie directe, à ne pas relayer) ; `epoch` :
+    époque de la vue sur laquelle la racine a construit l'arbre.
+    """
+    __slots__ = ("origin", "relay", "k", "epoch")
+
+    def __init__(self, payload, lamport: int, sender: int, origin: str, relay: int, k: int,
+                 epoch: int = -1):
+        super().__init__(payload, lamport, sender)
+        self.origin = origin
+        self.relay = relay
+        self.k = k
+        self.epoch = epoch
+
+class GossipMessage(BroadcastMessage):
+    """
+    Diffusion épidémique : relayée à k pairs au hasard tant que `ttl` > 0.
+    `origin` : UID de l'émetteur.
+    """
+    __slots__ = ("origin", "ttl")
+
+    def __init__(self, payload, lamport: int, sender: int, origin: str, ttl: int):
+        super().__init__(payload, lamport, sender)
+        self.origin = origin
+        self.ttl = ttl
+
+def tree_children(rank: int, k: int, n: int) -> range:
+    """ Rangs des enfants de `rank` dans l'arbre k-aire à n nœuds (racine : rang 0)."""
+    first = rank * k + 1
+    return range(min(first, n), min(first + k, n))
+
+def subtree(rank: int, k: int, n: int) -> list[int]:
+    """ Rangs du sous-arbre de `rank` (lui compris)."""
+    out, level = [], [rank]
+    while level:
+        out.extend(level)
+        level = [c for r in level for c in tree_children(r, k, n)]
+    return out
+
+class _Tree:
+    """ Arbre d'un envoi 'sync' relayé, dans la vue de l'envoi : sert à aplatir le
+    sous-arbre d'un enfant qui n'acquitte pas (départ, timeout)."""
+    __slots__ = ("root", "k", "view")
+
+    def __init__(self, root: int, k: int, view: "View"):
+        self.root = root
+        self.k = k
+        self.view = view
+
+    def expand(self, uids) -> set[str]:
+        """ UID des sous-arbres des membres `uids`."""
+        view, root = self.view, self.root
+        n = len(view)
+        out = set()
+        for uid in uids:
+            i = view.index(uid)
+            if i >= 0:
+                out.update(view.members[(root + r) % n] for r in subtree((i - root) % n, self.k, n))
+        return out
+
+class FanoutEngine:
+    """
+    Diffusion directe (défaut) : l'émetteur livre lui-même les N-1 copies et attend
+    N-1 ACK. Quel que soit son mode, un `Com` relaie les `TreeMessage` /
+    `GossipMessage` qu'il reçoit (`on_relay`) : le mode ne concerne que ses envois.
+    """
+
+    def __init__(self, com: "Com", k: int = FANOUT_K):
+        """ Rattache le moteur à son `Com` ; `k` : arité / fanout de ses envois."""
+        if k < 1:
+            raise ValueError(f"fanout_k doit être >= 1: {k!r}")
+        self.com = com
+        self.k = k
+        self._lock = threading.Lock()
+        self._rng = getattr(com.bus, "rng", random)  # tirages reproductibles sous `SimBus`
+        # (UID d'origine, lamport) -> plus grand TTL reçu (gossip) ou 0
+        self._seen: OrderedDict[tuple[str, int], int] = OrderedDict()
+
+    def broadcast(self, msg: BroadcastMessage):
+        """ Diffusion asynchrone d'un message déjà estampillé."""
+        self.com.bus.broadcast(msg, exclude_uid=self.com.node_uid)
+
+    def broadcast_sync(self, msg: BroadcastMessage, timeout, retries) -> Future:
+        """ Diffusion 'sync' : la `Future` est résolue quand tous ont acquitté."""
+        com = self.com
+        remaining = set(com.bus.view.members)
+        remaining.discard(com.node_uid)
+        fut = com._track_acks(msg, remaining, timeout, retries)
+        com.bus.broadcast(msg, exclude_uid=com.node_uid)
+        return fut
+
+    def on_relay(self, msg: BroadcastMessage) -> bool:
+        """ `TreeMessage` / `GossipMessage` reçu : relaie et acquitte si besoin.
+        Retourne True s'il faut le déposer en BAL (première réception)."""
+        if isinstance(msg, GossipMessage):
+            first, better = self._mark((msg.origin, msg.lamport), msg.ttl)
+            if better and msg.ttl > 0:
+                self._gossip(GossipMessage(msg.payload, msg.lamport, msg.sender, msg.origin, msg.ttl - 1))
+            return first
+        first = self._first((msg.origin, msg.lamport))
+        com = self.com
+        ack_seq = getattr(msg, "ack_seq", None)
+        parent = msg.relay
+        if not first or msg.k == 0:
+            # doublon ou copie directe : personne à relayer, ACK immédiat
+            if ack_seq is not None:
+                com.bus.sendto(parent, AckMessage(seq=ack_seq, sender=com.id, uid=com.node_uid))
+            return first
+        # racine de l'arbre par son UID, dans la vue courante (son id a pu changer)
+        root = com.bus.view.index(msg.origin)
+        fut = self._forward(msg, root, msg.k, ack_seq is not None, com.ack_timeout, com.ack_retries)
+        if fut is not None:
+            # ACK agrégé : le parent n'est acquitté qu'une fois tout le sous-arbre servi,
+            # par UID (les ids peuvent avoir changé entre-temps)
+            parent_uid = com.bus.view.uid(parent)
+            def ack_parent(f: Future):
+                if f.exception() is None:
+                    com._send_to_uids([(parent_uid, AckMessage(seq=ack_seq, sender=com.id, uid=com.node_uid))])
+            fut.add_done_callback(ack_parent)
+        return True
+
+    # === Helpers ===
+    def _first(self, key: tuple[str, int]) -> bool:
+        """ True à la première réception de `key` = (UID d'origine, lamport)."""
+        return self._mark(key, 0)[0]
+
+    def _mark(self, key: tuple[str, int], ttl: int) -> tuple[bool, bool]:
+        """ Note la réception de `key` avec `ttl` : (première réception, TTL meilleur
+        que tous les précédents). Une copie arrivée d'abord par un long chemin est
+        ainsi relayée de nouveau si une plus fraîche la suit."""
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and seen >= ttl:
+                return False, False
+            self._seen[key] = ttl
+            if seen is None and len(self._seen) > RELAY_DEDUP_WINDOW:
+                self._seen.popitem(last=False)
+            return seen is None, True
+
+    def _forward(self, msg: BroadcastMessage, root: int, k: int, ack: bool,
+                 timeout, retries) -> Future | None:
+        """ Envoie `msg` aux enfants de ce nœud dans l'arbre k-aire enraciné en `root`.
+        Avec `ack`, retourne la `Future` résolue quand leurs sous-arbres ont acquitté.
+        Si la vue a changé depuis l'envoi de la racine (ou si elle est partie), son
+        arbre n'est plus calculable ici : copie directe à tous les membres (les
+        doublons sont ignorés à la réception)."""
+        com = self.com
+        view = com.bus.view
+        n = len(view)
+        me = view.index(com.node_uid)
+        epoch = getattr(msg, "epoch", view.epoch)
+        origin = getattr(msg, "origin", com.node_uid)
+        if epoch == view.epoch and root >= 0:
+            children = [(root + r) % n for r in tree_children((me - root) % n, k, n)]
+            copy = TreeMessage(msg.payload, msg.lamport, msg.sender, origin, me, k, epoch)
+            tree = _Tree(root, k, view)
+        else:
+            children = [i for i in range(n) if i != me]
+            copy = TreeMessage(msg.payload, msg.lamport, msg.sender, origin, me, 0, epoch)
+            tree = None
+        fut = None
+        if ack:
+            remaining = {view.members[c] for c in children}
+            fut = com._track_acks(copy, remaining, timeout, retries, tree=tree)
+        for c in children:
+            com.bus.sendto(c, copy)
+        return fut
+
+    def _gossip(self, msg: GossipMessage):
+        """ Envoie `msg` à k pairs tirés au hasard (hors soi-même)."""
+        com = self.com
+        n, me = com.world_size, com.id
+        peers = self._rng.sample(range(n), min(n, self.k + 1))
+        for dest in [p for p in peers if p != me][:self.k]:
+            com.bus.sendto(dest, msg)
+
+class TreeFanout(FanoutEngine):
+    """
+    Diffusion le long d'un arbre k-aire construit sur les ids logiques (rangs relatifs
+    à l'émetteur) : chaque nœud relaie à ses k enfants, soit O(k) envois par nœud et
+    O(log_k N) sauts. En 'sync', un relais n'acquitte son parent qu'une fois son
+    sous-arbre acquitté : l'émetteur attend k ACK au lieu de N-1.
+    Le sous-arbre d'un enfant qui part, ou qui n'a pas acquitté au timeout, est aplati :
+    ses membres reçoivent une copie directe (`k=0`) et acquittent un par un.
+    Les copies relayées ne portent pas de crédit : avec des BAL bornées, la réservation
+    de l'émetteur attend seulement la place, puis est soldée dès l'envoi (chaque BAL
+    applique ensuite sa politique à l'arrivée).
+    """
+
+    def broadcast(self, msg: BroadcastMessage):
+        com = self.com
+        self._first((com.node_uid, msg.lamport))
+        self._forward(msg, com.id, self.k, False, None, 0)
+        settle((msg,))
+
+    def broadcast_sync(self, msg: BroadcastMessage, timeout, retries) -> Future:
+        com = self.com
+        self._first((com.node_uid, msg.lamport))
+        fut = self._forward(msg, com.id, self.k, True, timeout, retries)
+        settle((msg,))
+        return fut
+
+class GossipFanout(TreeFanout):
+    """
+    Variante épidémique de `broadcast()` : l'émetteur contacte k pairs au hasard,
+    qui relaient à leur tour pendant ceil(log_k N) + GOSSIP_TTL_EXTRA sauts (les
+    doublons sont ignorés). Probabiliste et sans ACK : les envois 'sync' suivent l'arbre.
+    """
+
+    def broadcast(self, msg: BroadcastMessage):
+        com = self.com
+        ttl = math.ceil(math.log(max(com.world_size, 2), max(self.k, 2))) + GOSSIP_TTL_EXTRA
+        self._mark((com.node_uid, msg.lamport), ttl)
+        self._gossip(GossipMessage(msg.payload, msg.lamport, msg.sender, com.node_uid, ttl))
+        settle((msg,))
+
+# Moteurs sélectionnables via `Com(..., fanout=...)`
+FANOUT_MODES: dict[str, type[FanoutEngine]] = {
+    "direct": FanoutEngine,
+    "tree": TreeFanout,
+    "gossip": GossipFanout,
+}
@@ -0,0 +1,11 @@
+from BroadcastMessage import BroadcastMessage
+
+class GroupMessage(BroadcastMessage):
+    """ Message applicatif diffusé aux seuls membres d'un groupe (`Com.broadcastGroup`).
+        `group` est le nom du groupe destinataire."""
+    __slots__ = ("group",)
+
+    def __init__(self, payload, lamport, sender, group: str):
+        """ Crée un message de groupe."""
+        super().__init__(payload, lamport, sender)
+        self.group = group
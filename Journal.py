@@ -0,0 +1,440 @@
+from __future__ import annotations
+import argparse, bisect, mmap, os, pickle, struct, threading, time
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+
+from Codec import Codec, DEFAULT_CODEC
+from Message import Message, MsgKind
+
+if TYPE_CHECKING:
+    from Bus import Bus
+    from Com import Com
+
+SEGMENT_SIZE = 64 * 1024 * 1024  # taille d'un segment (octets) avant rotation
+INDEX_FILE = "journal.idx"
+
+# Opération du bus qui a émis le message
+OP_BROADCAST, OP_SENDTO, OP_GROUP = 0, 1, 2
+JOURNAL_OPS = {OP_BROADCAST: "broadcast", OP_SENDTO: "sendto", OP_GROUP: "group"}
+
+_MAGIC = b"JRNL"
+_VERSION = 1
+_SEGMENT = struct.Struct("!4sHI")  # magic, version, n° de segment
+_RECORD = struct.Struct("!IBid")   # longueur du message encodé (0 = fin), op, dest, instant
+
+@dataclass
+class JournalRecord:
+    """
+    Un message journalisé (champs lus dans l'en-tête `Codec`, payload non décodé).
+        op (int): opération du bus (`OP_BROADCAST`, `OP_SENDTO`, `OP_GROUP`)
+        dest (int): id logique du destinataire d'un `sendto` (-1 sinon)
+        time (float): instant d'émission, horloge du scheduler du bus
+        kind (MsgKind|None): type du message (None : classe inconnue du codec)
+        lamport (int): horloge Lamport du message
+        sender (int): id logique de l'émetteur (-1 si aucun)
+        seq (int): n° de séquence (-1 si aucun)
+        segment (int) / offset (int): position de l'enregistrement dans le journal
+        data (bytes): message encodé (`Codec`)
+    """
+    op: int
+    dest: int
+    time: float
+    kind: MsgKind | None
+    lamport: int
+    sender: int
+    seq: int
+    segment: int
+    offset: int
+    data: bytes
+
+    def message(self, codec: Codec | None = None) -> Message:
+        """ Décode le message (nouvel objet à chaque appel)."""
+        return (codec or DEFAULT_CODEC).decode(self.data)
+
+class Journal:
+    """
+    Journal en ajout seul des messages émis sur un bus (`Bus(journal=...)`) : une
+    entrée par envoi (une diffusion est journalisée une fois, pas par destinataire),
+    avec l'opération, le destinataire, l'instant et le message au format `Codec`.
+    - segments `NNNNNN.jnl` projetés en mémoire (`mmap`) et pré-alloués : un ajout est
+      un encodage plus une copie, sans appel système ; un segment plein est fermé
+      (tronqué à sa taille utile) et le suivant est ouvert
+    - un nouveau journal sur un répertoire existant continue dans un nouveau segment
+    - les écritures restent dans le cache de pages : `flush()` / `close()` les forcent
+      sur disque ; après un arrêt brutal, la lecture s'arrête au premier trou (zéros)
+    Lecture : `JournalReader` ; index Lamport / émetteur : `JournalIndex` ; rejeu : `replay`.
+    """
+
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE, codec: Codec | None = None):
+        """ Ouvre (ou crée) le répertoire `directory` et son premier segment."""
+        self.directory = directory
+        self.segment_size = segment_size
+        self.codec = codec or DEFAULT_CODEC
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._pos = 0
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        existing = _segment_numbers(directory)
+        self._segment = existing[-1] if existing else -1
+        self._open(self._segment + 1, segment_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # === Contrat appelé par le bus (sous son verrou) ===
+    def broadcast(self, msg: Message, t: float):
+        self._append(OP_BROADCAST, -1, (msg,), t)
+
+    def sendto(self, dest_id: int, msg: Message, t: float):
+        self._append(OP_SENDTO, dest_id, (msg,), t)
+
+    def broadcast_group(self, msg: Message, t: float):
+        self._append(OP_GROUP, -1, (msg,), t)
+
+    def broadcast_many(self, msgs: list[Message], t: float):
+        self._append(OP_BROADCAST, -1, msgs, t)
+
+    def sendto_many(self, dest_id: int, msgs: list[Message], t: float):
+        self._append(OP_SENDTO, dest_id, msgs, t)
+
+    def flush(self):
+        """ Force l'écriture sur disque du segment courant."""
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def close(self):
+        """ Ferme le segment courant ; les ajouts suivants sont ignorés."""
+        with self._lock:
+            self._close_segment()
+
+    # === Helpers ===
+    def _append(self, op: int, dest: int, msgs, t: float):
+        """ Encode et copie `msgs` à la suite du segment courant (rotation au besoin)."""
+        encode = self.codec.encode
+        datas = [encode(m) for m in msgs]
+        with self._lock:
+            if self._mm is None:
+                return
+            for data in datas:
+                end = self._pos + _RECORD.size + len(data)
+                if end > self._size:
+                    self._close_segment()
+                    self._open(self._segment + 1, max(self.segment_size, _SEGMENT.size + _RECORD.size + len(data)))
+                    end = self._pos + _RECORD.size + len(data)
+                mm = self._mm
+                _RECORD.pack_into(mm, self._pos, len(data), op, dest, t)
+                mm[self._pos + _RECORD.size:end] = data
+                self._pos = end
+            self.records += len(datas)
+
+    def _open(self, number: int, size: int):
+        """ Crée et projette le segment `number` (pré-alloué à `size` octets)."""
+        self._segment = number
+        self._file = open(_segment_path(self.directory, number), "w+b")
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        _SEGMENT.pack_into(self._mm, 0, _MAGIC, _VERSION, number)
+        self._pos = _SEGMENT.size
+        self._size = size
+
+    def _close_segment(self):
+        """ Démonte le segment courant et le tronque à sa taille utile."""
+        if self._mm is None:
+            return
+        self._mm.flush()
+        self._mm.close()
+        self._mm = None
+        self._file.truncate(self._pos)
+        self._file.close()
+        self._file = None
+
+class JournalReader:
+    """ Lecture séquentielle ou par position d'un journal (segments projetés en lecture)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.segments = _segment_numbers(directory)
+        self._maps: dict[int, mmap.mmap] = {}
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        """ Tous les enregistrements, dans l'ordre d'écriture."""
+        for number in self.segments:
+            mm = self._map(number)
+            if mm is None:
+                continue
+            pos = _SEGMENT.size
+            while True:
+                rec = self._read(number, mm, pos)
+                if rec is None:
+                    break
+                yield rec
+                pos += _RECORD.size + len(rec.data)
+
+    def read_at(self, segment: int, offset: int) -> JournalRecord | None:
+        """ Enregistrement à la position (`segment`, `offset`)."""
+        mm = self._map(segment)
+        return None if mm is None else self._read(segment, mm, offset)
+
+    def close(self):
+        for mm in self._maps.values():
+            mm.close()
+        for f in self._files:
+            f.close()
+        self._maps.clear()
+        self._files.clear()
+
+    # === Helpers ===
+    def _map(self, number: int) -> mmap.mmap | None:
+        """ Projection (en cache) du segment `number` ; None s'il est vide ou invalide."""
+        mm = self._maps.get(number)
+        if mm is not None:
+            return mm
+        f = open(_segment_path(self.directory, number), "rb")
+        if os.fstat(f.fileno()).st_size < _SEGMENT.size:
+            f.close()
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = _SEGMENT.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            mm.close()
+            f.close()
+            raise ValueError(f"segment de journal invalide: {_segment_path(self.directory, number)}")
+        self._maps[number] = mm
+        self._files.append(f)
+        return mm
+
+    @staticmethod
+    def _read(number: int, mm: mmap.mmap, pos: int) -> JournalRecord | None:
+        """ Enregistrement en `pos`, ou None en fin de segment (ou sur un trou)."""
+        if pos + _RECORD.size > len(mm):
+            return None
+        length, op, dest, t = _RECORD.unpack_from(mm, pos)
+        start = pos + _RECORD.size
+        if length == 0 or start + length > len(mm):
+            return None
+        data = mm[start:start + length]
+        _, kind, _, lamport, sender, _, _, seq, _, _ = Codec.HEADER.unpack_from(data)
+        return JournalRecord(op, dest, t, _KINDS.get(kind), lamport, sender, seq, number, pos, data)
+
+class JournalIndex:
+    """
+    Index hors ligne d'un journal, trié par (Lamport, position) : une requête par
+    intervalle de Lamport et/ou par émetteur est une recherche dichotomique, puis une
+    lecture directe des seuls enregistrements retenus.
+    Enregistré dans `INDEX_FILE` avec la liste des segments indexés ; `JournalIndex.open`
+    le reconstruit si le journal a changé depuis.
+    """
+
+    def __init__(self, directory: str, segments: list[tuple[int, int]],
+                 lamport: array, sender: array, kind: array, segment: array, offset: array):
+        self.directory = directory
+        self.segments = segments  # (n°, taille) des segments indexés
+        self.lamport = lamport
+        self.sender = sender
+        self.kind = kind
+        self.segment = segment
+        self.offset = offset
+        # émetteur -> positions dans l'index (donc triées par Lamport)
+        self.by_sender: dict[int, array] = {}
+        for i, s in enumerate(sender):
+            positions = self.by_sender.get(s)
+            if positions is None:
+                positions = self.by_sender[s] = array("I")
+            positions.append(i)
+        self._reader: JournalReader | None = None
+
+    def __len__(self) -> int:
+        return len(self.lamport)
+
+    @classmethod
+    def build(cls, directory: str) -> "JournalIndex":
+        """ Parcourt tout le journal (sans décoder les payloads) et construit l'index."""
+        entries = []
+        with JournalReader(directory) as reader:
+            for rec in reader:
+                kind = 0 if rec.kind is None else rec.kind.value
+                entries.append((rec.lamport, rec.segment, rec.offset, rec.sender, kind))
+        entries.sort()
+        return cls(directory, _segment_sizes(directory),
+                   array("q", (e[0] for e in entries)), array("i", (e[3] for e in entries)),
+                   array("B", (e[4] for e in entries)), array("I", (e[1] for e in entries)),
+                   array("Q", (e[2] for e in entries)))
+
+    @classmethod
+    def load(cls, directory: str) -> "JournalIndex":
+        """ Relit l'index enregistré par `save()`."""
+        with open(os.path.join(directory, INDEX_FILE), "rb") as f:
+            state = pickle.load(f)
+        return cls(directory, state["segments"], state["lamport"], state["sender"],
+                   state["kind"], state["segment"], state["offset"])
+
+    @classmethod
+    def open(cls, directory: str) -> "JournalIndex":
+        """ Index à jour du journal : relu s'il correspond aux segments, reconstruit
+        (et enregistré) sinon."""
+        try:
+            index = cls.load(directory)
+            if index.segments == _segment_sizes(directory):
+                return index
+        except (OSError, pickle.UnpicklingError, KeyError, EOFError):
+            pass
+        index = cls.build(directory)
+        index.save()
+        return index
+
+    def save(self):
+        with open(os.path.join(self.directory, INDEX_FILE), "wb") as f:
+            pickle.dump({"segments": self.segments, "lamport": self.lamport, "sender": self.sender,
+                         "kind": self.kind, "segment": self.segment, "offset": self.offset},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def query(self, lamport_min: int | None = None, lamport_max: int | None = None,
+              sender: int | None = None, kind: MsgKind | None = None) -> Iterator[JournalRecord]:
+        """ Enregistrements de Lamport dans [`lamport_min`, `lamport_max`] (bornes
+        incluses, None = ouverte), éventuellement d'un seul émetteur / kind, par Lamport
+        croissant (ordre d'écriture à Lamport égal)."""
+        lamport = self.lamport
+        lo = -(1 << 63) if lamport_min is None else lamport_min
+        hi = (1 << 63) - 1 if lamport_max is None else lamport_max
+        if sender is None:
+            positions = range(bisect.bisect_left(lamport, lo), bisect.bisect_right(lamport, hi))
+        else:
+            positions = self.by_sender.get(sender, ())
+            key = lamport.__getitem__
+            positions = positions[bisect.bisect_left(positions, lo, key=key):
+                                  bisect.bisect_right(positions, hi, key=key)]
+        want = None if kind is None else kind.value
+        if self._reader is None:
+            self._reader = JournalReader(self.directory)
+        for i in positions:
+            if want is None or self.kind[i] == want:
+                yield self._reader.read_at(self.segment[i], self.offset[i])
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+def replay(directory: str, coms: list["Com"] | None = None, bus: "Bus | None" = None,
+           kinds: tuple[MsgKind, ...] | None = (MsgKind.USER,), speed: float | None = None,
+           codec: Codec | None = None) -> list["Com"]:
+    """
+    Rejoue un journal dans des `Com` neufs : chaque message retenu repasse par le bus
+    (horloge de Lamport, BAL, `on_receive`) comme à l'origine, avec les ids journalisés.
+    - `coms` : destinataires déjà créés sur `bus` ; par défaut autant de `Com(bus)` que
+      d'ids vus dans le journal, sur un `Bus()` neuf (à fermer par l'appelant)
+    - `kinds` : types rejoués (par défaut les messages applicatifs ; les messages système
+      d'origine, jetons ou ACKs, perturberaient les protocoles des `Com` neufs) ; None = tous
+    - `speed` : None = au plus vite ; sinon respecte les écarts d'origine divisés par `speed`
+    Les ids sont ceux des vues d'origine (un journal couvrant des départs s'y rejoue tel
+    quel) ; une diffusion de groupe n'atteint que les membres ayant rejoint le groupe.
+    """
+    from Bus import Bus
+    from Com import Com
+    with JournalReader(directory) as reader:
+        if coms is None:
+            bus = bus or Bus()
+            n = 1 + max((max(rec.sender, rec.dest) for rec in reader), default=-1)
+            coms = [Com(bus) for _ in range(n)]
+        elif bus is None:
+            bus = coms[0].bus
+        start = origin = None
+        for rec in reader:
+            if kinds is not None and rec.kind not in kinds:
+                continue
+            if speed is not None:
+                if origin is None:
+                    start, origin = time.monotonic(), rec.time
+                delay = start + (rec.time - origin) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            msg = rec.message(codec)
+            exclude = None if rec.sender < 0 else bus.view.uid(rec.sender)
+            if rec.op == OP_SENDTO:
+                bus.sendto(rec.dest, msg)
+            elif rec.op == OP_GROUP:
+                bus.broadcast_group(msg.group, msg, exclude_uid=exclude)
+            else:
+                bus.broadcast(msg, exclude_uid=exclude)
+    return coms
+
+# === Helpers ===
+_KINDS = {k.value: k for k in MsgKind}
+
+def _segment_path(directory: str, number: int) -> str:
+    return os.path.join(directory, f"{number:06d}.jnl")
+
+def _segment_numbers(directory: str) -> list[int]:
+    """ N° des segments présents, dans l'ordre."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(name[:-4]) for name in os.listdir(directory)
+                  if name.endswith(".jnl") and name[:-4].isdigit())
+
+def _segment_sizes(directory: str) -> list[tuple[int, int]]:
+    return [(n, os.path.getsize(_segment_path(directory, n))) for n in _segment_numbers(directory)]
+
+def _describe(rec: JournalRecord) -> str:
+    kind = rec.kind.name if rec.kind is not None else "?"
+    dest = f" -> {rec.dest}" if rec.op == OP_SENDTO else ""
+    return (f"t={rec.time:.6f} {JOURNAL_OPS.get(rec.op, '?'):9s} {kind:12s} "
+            f"L={rec.lamport:<6d} from={rec.sender}{dest} ({len(rec.data)} o)")
+
+def main():
+    """ Outil en ligne de commande : dump / index / query / replay d'un journal."""
+    parser = argparse.ArgumentParser(description="Journal des messages d'un bus")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("dump", help="affiche tous les enregistrements")
+    p.add_argument("directory")
+    p = sub.add_parser("index", help="construit (ou met à jour) l'index Lamport / émetteur")
+    p.add_argument("directory")
+    p = sub.add_parser("query", help="enregistrements par intervalle de Lamport / émetteur")
+    p.add_argument("directory")
+    p.add_argument("--from", dest="lamport_min", type=int)
+    p.add_argument("--to", dest="lamport_max", type=int)
+    p.add_argument("--sender", type=int)
+    p.add_argument("--kind", choices=[k.name for k in MsgKind])
+    p = sub.add_parser("replay", help="rejoue les messages applicatifs dans des Com neufs")
+    p.add_argument("directory")
+    p.add_argument("--speed", type=float)
+    args = parser.parse_args()
+
+    if args.cmd == "dump":
+        with JournalReader(args.directory) as reader:
+            for rec in reader:
+                print(_describe(rec))
+    elif args.cmd == "index":
+        t0 = time.perf_counter()
+        index = JournalIndex.open(args.directory)
+        print(f"[JOURNAL] {len(index)} enregistrements, {len(index.by_sender)} émetteurs "
+              f"({time.perf_counter() - t0:.3f}s)")
+    elif args.cmd == "query":
+        index = JournalIndex.open(args.directory)
+        kind = MsgKind[args.kind] if args.kind else None
+        for rec in index.query(args.lamport_min, args.lamport_max, args.sender, kind):
+            print(_describe(rec))
+        index.close()
+    else:
+        coms = replay(args.directory, speed=args.speed)
+        for com in coms:
+            print(f"[REPLAY] Com {com.id}: {len(com.mailbox)} messages en BAL, horloge {com.clock}")
+        for com in coms:
+            com.close()
+
+if __name__ == "__main__":
+    main()
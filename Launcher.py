@@ -1,21 +1,53 @@
 from Bus import Bus
 from Process import Process
-import threading
+import argparse, threading
+import multiprocessing as mp
 
-def main():
+def main(n: int = 3, queued: bool = False):
     """ Démarre une petite démo :
     - crée un Bus
     - instancie N Process (ici 3)
     - lance leur scénario `run_example()`
     - attend la fin puis ferme proprement"""
-    bus = Bus()
-    procs = [Process(bus, name=f"P{i}") for i in range(3)]
+    bus = Bus(queued=queued)
+    procs = [Process(bus, name=f"P{i}") for i in range(n)]
     threads = [threading.Thread(target=p.run_example) for p in procs]
     for t in threads: t.start()
     for t in threads: t.join()
     for p in procs: p.close()
 
+def _worker(address: str, name: str):
+    """ Corps d'un processus OS : se connecte au serveur, joue le scénario et se ferme."""
+    from RemoteBus import RemoteBus
+    bus = RemoteBus(address)
+    p = Process(bus, name=name)
+    p.run_example()
+    p.com.synchronize()  # personne ne quitte le bus avant la fin de tous les scénarios
+    p.close()
+    bus.close()
+
+def main_multiprocess(n: int = 3):
+    """ Même démo, mais chaque `Process` tourne dans son propre processus OS :
+    - démarre un `BusServer` (socket Unix) qui attend `n` participants
+    - lance `n` workers qui utilisent un `RemoteBus`
+    - attend leur fin puis ferme le serveur"""
+    from RemoteBus import BusServer
+    server = BusServer(expected=n)
+    ctx = mp.get_context("spawn")
+    workers = [ctx.Process(target=_worker, args=(server.address, f"P{i}")) for i in range(n)]
+    for w in workers: w.start()
+    for w in workers: w.join()
+    server.close()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Démo du middleware")
+    parser.add_argument("-n", type=int, default=3, help="nombre de Process")
+    parser.add_argument("--procs", action="store_true", help="un processus OS par Process")
+    parser.add_argument("--queued", action="store_true", help="Bus(queued=True) en mode threads")
+    args = parser.parse_args()
     print("[MAIN] starting demo")
-    main()
-    print("[MAIN] done")
\ No newline at end of file
+    if args.procs:
+        main_multiprocess(args.n)
+    else:
+        main(args.n, args.queued)
+    print("[MAIN] done")
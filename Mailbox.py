@@ -0,0 +1,327 @@
+from __future__ import annotations
+import sys, threading, time
+from collections import OrderedDict, deque
+from typing import Callable, Container
+
+from Message import Message, MsgKind
+
+MAILBOX_POLICIES = ("block", "drop_oldest", "reject")
+MESSAGE_OVERHEAD = 64  # octets comptés par message en plus de son payload
+
+class MailboxFull(Exception):
+    """ BAL pleine avec la politique `"reject"` (levée chez l'émetteur, cf. `Mailbox.reserve`)."""
+
+def approx_size(payload: object) -> int:
+    """ Taille approximative d'un message de contenu `payload` : son `nbytes` s'il en a
+    un (ndarray, memoryview), sinon `sys.getsizeof` (superficiel), plus MESSAGE_OVERHEAD."""
+    n = getattr(payload, "nbytes", None)
+    return MESSAGE_OVERHEAD + (n if isinstance(n, int) else sys.getsizeof(payload))
+
+class Credit:
+    """
+    Ticket de réservation d'un message (`Bus.reserve`), porté par le message (`credit`) :
+    les BAL où sa place est réservée (BAL -> UID du destinataire) et sa taille, calculée
+    une seule fois. Chaque réservation est soldée une seule fois : par le dépôt du
+    message dans sa BAL, ou par `release` (perte, destinataire parti ou renuméroté).
+    """
+    __slots__ = ("nbytes", "boxes")
+
+    def __init__(self, nbytes: int, boxes: dict["Mailbox", str]):
+        self.nbytes = nbytes
+        self.boxes = boxes
+
+    def take(self, mb: "Mailbox") -> bool:
+        """ Solde la réservation de `mb` (dépôt) ; False si elle l'est déjà."""
+        return self.boxes.pop(mb, None) is not None
+
+    def release(self, keep: Container[str] = (), only: str | None = None):
+        """ Annule les réservations encore ouvertes, sauf celles des UID de `keep`
+        (avec `only` : celle de ce seul UID)."""
+        for mb, uid in list(self.boxes.items()):
+            if ((uid == only if only is not None else uid not in keep)
+                    and self.boxes.pop(mb, None) is not None):
+                mb.unreserve(1, self.nbytes)
+
+def settle(msgs, delivered: Container[str] = (), lost: str | None = None):
+    """ Solde les réservations de `msgs` pour tout destinataire hors de `delivered`
+    (UID), ou pour le seul `lost` : leur message ne sera jamais déposé (perte,
+    départ, renumérotation)."""
+    for m in msgs:
+        credit = getattr(m, "credit", None)
+        if credit is not None and credit.boxes:
+            credit.release(delivered, lost)
+
+class Mailbox:
+    """
+    Boîte aux lettres (BAL) indexée par (émetteur, kind), protégée par une seule condition.
+    - `_order` garde l'ordre global d'arrivée (n° d'arrivée -> message)
+    - `_queues[(sender, kind)]` garde les n° d'arrivée de chaque émetteur, en FIFO
+    Le plus ancien message global est toujours en tête de la file de son émetteur :
+    `get()` et `get(sender=..., kind=...)` sont donc en O(1), sans jeter ni re-parcourir
+    les autres messages ; un filtre partiel ne compare que les têtes de files.
+    Un `predicate` quelconque parcourt dans l'ordre d'arrivée.
+    Capacité optionnelle, en messages (`capacity`) et/ou en octets approximatifs
+    (`max_bytes`, cf. `approx_size`). Pleine, la BAL applique `policy` :
+    - `"block"` : l'émetteur attend qu'un lecteur libère de la place
+    - `"drop_oldest"` : les plus anciens messages sont jetés (compteur `dropped`)
+    - `"reject"` : `MailboxFull`
+    Contrôle de flux par crédits : l'émetteur réserve la place (`reserve`) *avant*
+    d'envoyer, hors du verrou du bus ; le message porte son ticket (`Credit`) et son
+    dépôt solde la réservation sans attendre. Un dépôt non réservé (ex. message venu
+    d'un autre processus, copie relayée) applique la politique à l'arrivée, sans
+    jamais attendre (il a lieu dans un thread du bus) : un rejet compte dans
+    `dropped`, `"block"` l'accepte au-delà de la capacité.
+    Un message plus gros que `max_bytes` est accepté dans une BAL vide ; un lot ne
+    dépasse jamais `capacity` (plus grand qu'elle, il est refusé à la réservation).
+    """
+
+    def __init__(self, capacity: int | None = None, max_bytes: int | None = None,
+                 policy: str = "block"):
+        """ BAL vide ; sans `capacity` ni `max_bytes`, elle est non bornée."""
+        if policy not in MAILBOX_POLICIES:
+            raise ValueError(f"politique de BAL inconnue: {policy!r}")
+        self._cond = threading.Condition(threading.Lock())
+        self._order: OrderedDict[int, Message] = OrderedDict()
+        self._queues: dict[tuple[int | None, MsgKind], deque[int]] = {}
+        self._next = 0
+        self._listeners: list[Callable[[], None]] = []
+        # --- Capacité ---
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.bounded = capacity is not None or max_bytes is not None
+        self.dropped = 0
+        self._bytes = 0
+        self._reserved = 0        # messages réservés par des émetteurs, pas encore déposés
+        self._reserved_bytes = 0
+        self._sizes: dict[int, int] = {}  # n° d'arrivée -> taille comptée au dépôt (max_bytes)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def nbytes(self) -> int:
+        """ Taille approximative des messages en attente (BAL bornée en octets)."""
+        return self._bytes
+
+    def reserve(self, count: int, nbytes: int = 0, timeout: float | None = None):
+        """ Réserve la place de `count` messages (`nbytes` octets) avant leur envoi.
+        `"block"` : attend la place (`MailboxFull` si `timeout` expire) ;
+        `"reject"` : `MailboxFull` tout de suite ; `"drop_oldest"` : rien à réserver.
+        Un lot de plus de `capacity` messages ne tiendra jamais : `MailboxFull`.
+        La réservation est soldée par le dépôt d'un message qui porte son `Credit`,
+        sinon par `unreserve`."""
+        if not self.bounded or self.policy == "drop_oldest":
+            return
+        if self.capacity is not None and count > self.capacity:
+            raise MailboxFull(f"lot de {count} messages plus grand que la capacité ({self.capacity})")
+        if self.max_bytes is None:
+            nbytes = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._fits(count, nbytes):
+                if self.policy == "reject":
+                    raise MailboxFull(f"BAL pleine ({len(self._order)} messages, {self._bytes} octets)")
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    raise MailboxFull("BAL pleine : délai d'attente dépassé")
+                self._cond.wait(left)
+            self._reserved += count
+            self._reserved_bytes += nbytes
+
+    def unreserve(self, count: int, nbytes: int = 0):
+        """ Annule une réservation dont l'envoi n'aura pas lieu."""
+        if not self.bounded or self.policy == "drop_oldest":
+            return
+        if self.max_bytes is None:
+            nbytes = 0
+        with self._cond:
+            self._reserved = max(0, self._reserved - count)
+            self._reserved_bytes = max(0, self._reserved_bytes - nbytes)
+            self._cond.notify_all()
+
+    def put(self, msg: Message):
+        """ Dépose un message et réveille les lecteurs en attente."""
+        with self._cond:
+            if self.bounded:
+                size = self._admit(msg)
+                if size is None:
+                    return
+                self._insert(msg, size)
+            else:
+                self._insert(msg, 0)
+            self._cond.notify_all()
+        for cb in self._listeners:
+            cb()
+
+    def put_many(self, msgs: list[Message]):
+        """ Dépose plusieurs messages (dans l'ordre) sous une seule prise du verrou :
+        un seul réveil des lecteurs et des listeners pour tout le lot. Bornée, la BAL
+        admet chaque message après les précédents du lot (capacité jamais dépassée)."""
+        if not msgs:
+            return
+        with self._cond:
+            if self.bounded:
+                before = self._next
+                for msg in msgs:
+                    size = self._admit(msg)
+                    if size is not None:
+                        self._insert(msg, size)
+                if self._next == before:
+                    return
+            else:
+                n = self._next
+                self._next += len(msgs)
+                order, queues = self._order, self._queues
+                last, q = None, None
+                for msg in msgs:
+                    order[n] = msg
+                    key = (msg.sender, msg.kind)
+                    if key != last:
+                        # un lot vient le plus souvent d'un seul émetteur
+                        q = queues.get(key)
+                        if q is None:
+                            q = queues[key] = deque()
+                        last = key
+                    q.append(n)
+                    n += 1
+            self._cond.notify_all()
+        for cb in self._listeners:
+            cb()
+
+    def add_listener(self, cb: Callable[[], None]):
+        """ Enregistre `cb()`, appelé (hors verrou) après chaque dépôt. Sert de pont
+        vers d'autres mécanismes d'attente (ex. boucle asyncio) sans thread bloqué."""
+        self._listeners = self._listeners + [cb]
+
+    def remove_listener(self, cb: Callable[[], None]):
+        """ Retire un listener enregistré par `add_listener`."""
+        self._listeners = [c for c in self._listeners if c is not cb]
+
+    def get(self, block: bool = True, timeout: float | None = None,
+            sender: int | None = None, kind: MsgKind | None = None,
+            predicate: Callable[[Message], bool] | None = None) -> Message | None:
+        """
+        Retire et retourne le premier message correspondant (ordre d'arrivée), ou None.
+        - `sender` / `kind` : filtres indexés
+        - `predicate` : filtre libre, évalué dans l'ordre d'arrivée
+        Les messages qui ne correspondent pas restent dans la BAL.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                m = self._take(sender, kind, predicate)
+                if m is not None or not block:
+                    return m
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+
+    # === Helpers (sous self._cond) ===
+    def _fits(self, count: int, nbytes: int) -> bool:
+        """ True si `count` messages (`nbytes` octets) de plus tiennent dans la BAL."""
+        used = len(self._order) + self._reserved
+        if self.capacity is not None and used + count > self.capacity:
+            return False
+        # un message (ou lot) plus gros que `max_bytes` passe dans une BAL vide
+        return (self.max_bytes is None or used == 0
+                or self._bytes + self._reserved_bytes + nbytes <= self.max_bytes)
+
+    def _admit(self, msg: Message) -> int | None:
+        """ Fait de la place pour `msg` : solde sa réservation s'il en porte une, sinon
+        applique la politique (sans attendre). Retourne la taille comptée (0 sans
+        `max_bytes`), ou None si le message est rejeté (politique `"reject"`)."""
+        credit = getattr(msg, "credit", None)
+        if credit is not None and credit.take(self):
+            # place réservée par l'émetteur, à la taille calculée à la réservation
+            nbytes = credit.nbytes if self.max_bytes is not None else 0
+            self._reserved -= 1
+            self._reserved_bytes -= nbytes
+        else:
+            nbytes = approx_size(msg.payload) if self.max_bytes is not None else 0
+            if not self._fits(1, nbytes):
+                if self.policy == "reject":
+                    self.dropped += 1
+                    return None
+                if self.policy == "drop_oldest":
+                    while self._order and not self._fits(1, nbytes):
+                        self._evict()
+                # "block" : accepté au-delà de la capacité (dépôt dans un thread du bus)
+        self._bytes += nbytes
+        return nbytes
+
+    def _insert(self, msg: Message, size: int):
+        """ Ajoute un message admis à l'ordre global et à la file de son émetteur."""
+        n = self._next
+        self._next += 1
+        self._order[n] = msg
+        if self.max_bytes is not None:
+            self._sizes[n] = size
+        key = (msg.sender, msg.kind)
+        q = self._queues.get(key)
+        if q is None:
+            q = self._queues[key] = deque()
+        q.append(n)
+
+    def _evict(self):
+        """ Jette le plus ancien message (politique `"drop_oldest"`)."""
+        n = next(iter(self._order))
+        m = self._order[n]
+        key = (m.sender, m.kind)
+        q = self._queues[key]
+        q.popleft()
+        self._pop(n, q, key)
+        self.dropped += 1
+
+    def _take(self, sender, kind, predicate) -> Message | None:
+        """ Sélectionne et retire le message à retourner, s'il existe."""
+        if not self._order:
+            return None
+        if predicate is not None:
+            for n, m in self._order.items():
+                if ((sender is None or m.sender == sender)
+                        and (kind is None or m.kind == kind) and predicate(m)):
+                    q = self._queues[(m.sender, m.kind)]
+                    if q[0] == n:
+                        q.popleft()
+                    else:
+                        q.remove(n)
+                    return self._pop(n, q, (m.sender, m.kind))
+            return None
+        if sender is None and kind is None:
+            n = next(iter(self._order))
+            m = self._order[n]
+            key = (m.sender, m.kind)
+            q = self._queues[key]
+            q.popleft()
+            return self._pop(n, q, key)
+        if sender is not None and kind is not None:
+            best_key = (sender, kind)
+            if best_key not in self._queues:
+                return None
+        else:
+            # filtre partiel : plus ancienne tête parmi les files correspondantes
+            best_key, best_n = None, None
+            for key, q in self._queues.items():
+                if ((sender is None or key[0] == sender) and (kind is None or key[1] == kind)
+                        and (best_n is None or q[0] < best_n)):
+                    best_key, best_n = key, q[0]
+            if best_key is None:
+                return None
+        q = self._queues[best_key]
+        return self._pop(q.popleft(), q, best_key)
+
+    def _pop(self, n: int, q: deque, key: tuple) -> Message:
+        """ Retire le n° `n` de l'ordre global (déjà retiré de `q`)."""
+        if not q:
+            del self._queues[key]
+        m = self._order.pop(n)
+        if self.bounded:
+            if self.max_bytes is not None:
+                self._bytes -= self._sizes.pop(n, 0)
+            self._cond.notify_all()  # place libérée : réveille émetteurs et dépôts en attente
+        return m
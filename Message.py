@@ -8,15 +8,27 @@ class MsgKind(Enum):
     - ACK: accusé de réception (pour les primitives synchrones)
     - BARRIER: (réservé) messages de barrière
     - HEARTBEAT: (optionnel) vie/santé d'un Com
-    - RENUMBER: mapping {uid->id} (si renumérotation dynamique)
+    - VIEW: changement de vue de membres (UID des partants)
     - TOKEN: jeton de section critique
+    - SC_REQUEST: requête d'entrée en SC (algorithmes à la demande)
+    - TOKEN_CENSUS: recensement du jeton avant régénération
+    - ORDERED: message applicatif à ordre total (délivré une fois stable)
+    - CLOCK: diffusion d'horloge de Lamport (stabilité de l'ordre total)
+    - CAUSAL: message applicatif à délivrance causale (horloge vectorielle)
+    - COLLECTIVE: étape d'une opération collective (reduce, allreduce, gather, ...)
     """
     USER = auto()
     ACK = auto()
     BARRIER = auto()
     HEARTBEAT = auto()
-    RENUMBER = auto()
+    VIEW = auto()
     TOKEN = auto()
+    SC_REQUEST = auto()
+    TOKEN_CENSUS = auto()
+    ORDERED = auto()
+    CLOCK = auto()
+    CAUSAL = auto()
+    COLLECTIVE = auto()
 
 @dataclass
 class Message:
@@ -26,7 +38,12 @@ class Message:
         payload (object|None): contenu applicatif ou système
         lamport (int): horloge Lamport apposée à l'envoi (0 pour messages système)
         sender (int|None): id logique de l'émetteur (None pour certains systèmes)
+    Les messages utilisent `__slots__` (pas de `__dict__`) ; `ack_seq` n'est posé
+    que sur les messages 'sync' (lire via `getattr(msg, "ack_seq", None)`), `credit`
+    que sur ceux dont la place est réservée dans des BAL bornées (`Mailbox.Credit`,
+    local au processus : jamais encodé).
     """
+    __slots__ = ("kind", "payload", "lamport", "sender", "ack_seq", "credit")
     kind: MsgKind
     payload: object | None
     lamport: int
@@ -36,9 +53,25 @@ class Message:
 class AckMessage(Message):
     """
     Accusé de réception d’un message 'sync'.
-    La séquence `seq` permet de réveiller le bon émetteur.
+    La séquence `seq` permet de réveiller le bon émetteur ; `uid` (UID de l'acquitteur)
+    identifie l'acquitteur même si les ids ont changé depuis l'envoi de l'ACK.
     """
+    __slots__ = ("seq", "uid")
     seq: int
-    def __init__(self, seq: int, sender: int):
+    uid: str | None
+    def __init__(self, seq: int, sender: int, uid: str | None = None):
         super().__init__(MsgKind.ACK, None, 0, sender)
-        self.seq = seq
\ No newline at end of file
+        self.seq = seq
+        self.uid = uid
+
+@dataclass
+class AckRangeMessage(AckMessage):
+    """
+    Accusé de réception cumulatif : acquitte tous les `ack_seq` de `seq` à `upto`
+    (inclus), reçus d'un même émetteur dans un même lot (`Com.broadcastMany`).
+    """
+    __slots__ = ("upto",)
+    upto: int
+    def __init__(self, seq: int, upto: int, sender: int, uid: str | None = None):
+        super().__init__(seq, sender, uid)
+        self.upto = upto
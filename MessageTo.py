@@ -5,6 +5,7 @@ class MessageTo(Message):
     Message applicatif adressé à UN destinataire (point-à-point).
     `dest` est l'id logique du destinataire.
     """
+    __slots__ = ("dest",)
     def __init__(self, payload, lamport, sender, dest):
         super().__init__(MsgKind.USER, payload, lamport, sender)
         self.dest = dest
\ No newline at end of file
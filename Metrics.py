@@ -0,0 +1,135 @@
+from __future__ import annotations
+import threading
+from typing import Callable
+
+COUNTERS = ("sent", "received", "acked")
+HISTOGRAMS = ("ack_rtt", "sc_wait", "sc_hold", "barrier_wait")
+HIST_BUCKETS = 40  # seaux log2 en microsecondes : le dernier couvre >= 2^38 µs (~76 h)
+
+class _Buffer:
+    """ Compteurs et histogrammes d'un thread (écrits par lui seul)."""
+    __slots__ = ("counts", "hists")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        # nom -> [nombre, somme (s), max (s), seau 0, ..., seau HIST_BUCKETS - 1]
+        self.hists = {name: [0, 0.0, 0.0] + [0] * HIST_BUCKETS for name in HISTOGRAMS}
+
+class _Local(threading.local):
+    """ Tampon propre à chaque thread, enregistré auprès des `Metrics` à sa création."""
+
+    def __init__(self, metrics: "Metrics"):
+        self.buf = metrics._register()
+
+class Metrics:
+    """
+    Métriques d'un `Com` (`com.metrics`), sans verrou sur le chemin chaud : chaque
+    thread écrit dans son propre tampon ; `snapshot()` additionne les tampons.
+    - compteurs (`COUNTERS`) : messages applicatifs envoyés, reçus (déposés en BAL),
+      envois 'sync' entièrement acquittés
+    - histogrammes (`HISTOGRAMS`, en secondes) : aller-retour des ACKs, attente et
+      tenue de la SC, attente aux barrières ; seaux log2 en microsecondes, d'où des
+      quantiles approchés (borne haute du seau, à un facteur 2 près)
+    - jauges : fonctions lues au moment du `snapshot()` (ex. profondeur de BAL)
+    Un `snapshot()` concurrent des écritures peut manquer les toutes dernières.
+    Le tampon d'un thread terminé est additionné à un agrégat puis oublié (à
+    l'enregistrement d'un nouveau thread et à chaque `snapshot()`) : la mémoire ne
+    croît pas avec le nombre de threads qui se succèdent.
+    """
+
+    def __init__(self, gauges: dict[str, Callable[[], object]] | None = None):
+        """ Métriques vides ; `gauges` : nom -> fonction sans argument."""
+        self.gauges = dict(gauges or {})
+        self._lock = threading.Lock()  # enregistrements et agrégats, pas le chemin chaud
+        self._buffers: list[tuple[threading.Thread, _Buffer]] = []
+        self._retired = _Buffer()  # somme des tampons des threads terminés
+        self._local = _Local(self)
+
+    def inc(self, name: str, n: int = 1):
+        """ Ajoute `n` au compteur `name`."""
+        self._local.buf.counts[name] += n
+
+    def observe(self, name: str, seconds: float):
+        """ Ajoute une durée à l'histogramme `name`."""
+        h = self._local.buf.hists[name]
+        h[0] += 1
+        h[1] += seconds
+        if seconds > h[2]:
+            h[2] = seconds
+        h[3 + min(int(seconds * 1e6).bit_length(), HIST_BUCKETS - 1)] += 1
+
+    def snapshot(self) -> dict:
+        """ Agrégat (sérialisable en JSON) : {"counters": ..., "histograms": ..., "gauges": ...}.
+        Chaque histogramme : count, sum, mean, max, p50, p90, p99 (secondes)."""
+        total = _Buffer()
+        with self._lock:
+            self._prune()
+            _merge(total, self._retired)
+            for _, buf in self._buffers:
+                _merge(total, buf)
+        return {
+            "counters": total.counts,
+            "histograms": {name: _summary(h) for name, h in total.hists.items()},
+            "gauges": {name: fn() for name, fn in self.gauges.items()},
+        }
+
+    def reset(self):
+        """ Remet compteurs et histogrammes à zéro (tampons de tous les threads)."""
+        with self._lock:
+            self._prune()
+            self._retired = _Buffer()
+            for _, buf in self._buffers:
+                fresh = _Buffer()
+                buf.counts, buf.hists = fresh.counts, fresh.hists
+
+    # === Helpers ===
+    def _register(self) -> _Buffer:
+        """ Crée et enregistre le tampon du thread courant (première écriture)."""
+        buf = _Buffer()
+        with self._lock:
+            self._prune()
+            self._buffers.append((threading.current_thread(), buf))
+        return buf
+
+    def _prune(self):
+        """ Additionne à `_retired` les tampons des threads terminés, qui n'écrivent
+        plus, et les oublie (sous `self._lock`)."""
+        live = []
+        for thread, buf in self._buffers:
+            if thread.is_alive():
+                live.append((thread, buf))
+            else:
+                _merge(self._retired, buf)
+        self._buffers = live
+
+def _merge(acc: _Buffer, buf: _Buffer):
+    """ Ajoute les compteurs et histogrammes de `buf` à `acc`."""
+    for name, v in buf.counts.items():
+        acc.counts[name] += v
+    for name, h in buf.hists.items():
+        a = acc.hists[name]
+        a[0] += h[0]
+        a[1] += h[1]
+        a[2] = max(a[2], h[2])
+        for i in range(3, 3 + HIST_BUCKETS):
+            a[i] += h[i]
+
+def _summary(h: list) -> dict:
+    """ Résumé d'un histogramme agrégé [nombre, somme, max, seaux...]."""
+    count, total, top = h[0], h[1], h[2]
+    out = {"count": count, "sum": total, "mean": total / count if count else 0.0, "max": top}
+    for q, key in ((0.5, "p50"), (0.9, "p90"), (0.99, "p99")):
+        out[key] = _quantile(h, count, q)
+    return out
+
+def _quantile(h: list, count: int, q: float) -> float:
+    """ Borne haute (s) du seau contenant le quantile q, plafonnée au max observé."""
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i in range(HIST_BUCKETS):
+        seen += h[3 + i]
+        if seen >= rank:
+            return min((1 << i) * 1e-6, h[2])
+    return h[2]
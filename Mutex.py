@@ -0,0 +1,491 @@
+from __future__ import annotations
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
+from Message import Message, MsgKind
+from Token import DEFAULT_RESOURCE, Token, SKToken, PermitToken, SCRequestMessage, CensusMessage
+
+if TYPE_CHECKING:
+    from Com import Com
+
+TOKEN_IDLE_HOP_SEC = 0.001  # délai d'un saut de jeton quand personne ne veut la SC
+TOKEN_TIMEOUT_SEC = 2.0     # attente du jeton au-delà de laquelle on le suspecte perdu
+
+class _Census:
+    """ Recensement en cours (côté coordinateur) : génération visée et réponses
+    reçues, par UID."""
+    __slots__ = ("epoch", "replies")
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.replies: dict[str, dict] = {}
+
+class MutexEngine:
+    """
+    Moteur d'exclusion mutuelle utilisé par `Com.requestSC()` / `Com.releaseSC()`,
+    un par ressource nommée (`resource`) : chaque ressource a son propre jeton, ses
+    requêtes et ses recensements, indépendants de ceux des autres.
+    Machine d'états commune (demandée par le prof) : idle -> request -> sc -> release -> idle.
+    Les sous-classes décident de la circulation du jeton.
+
+    Perte du jeton (détenteur parti, envoi vers un id devenu invalide) : un demandeur
+    qui attend plus de TOKEN_TIMEOUT_SEC obtient du bus la génération suivante
+    (`claim_token(epoch=...)`, un seul gagnant) et recense les processus :
+    - chacun adopte la nouvelle génération (les jetons plus anciens seront détruits)
+      et répond s'il détient le jeton ; le détenteur éventuel le fait passer à la
+      nouvelle génération
+    - si personne ne le détient, le coordinateur crée le jeton de cette génération
+    Il reste donc toujours au plus un jeton vivant.
+    """
+
+    def __init__(self, com: "Com", resource: str = DEFAULT_RESOURCE):
+        """ Rattache le moteur à son `Com` et initialise l'état SC de `resource`."""
+        self.com = com
+        self.resource = resource
+        self.lock = threading.RLock()
+        self.state = "idle"
+        self.has_token = False
+        self.epoch = 0                       # génération de jeton courante
+        self._waiter: Future | None = None  # résolue au passage en "sc"
+        self._timer = None
+        self._census: _Census | None = None
+        self._claim_hint = 0                 # génération la plus haute refusée par le bus
+
+    def start(self):
+        """ Appelé une fois le `Com` enregistré sur le bus (injection du jeton initial)."""
+
+    def stop(self):
+        """ Appelé avant que le `Com` quitte le bus (cède un jeton parqué)."""
+
+    def request(self, shared: bool = False):
+        """ Demande d'entrée en SC : bloque jusqu'à l'état "sc"."""
+        self.request_async(shared).result()
+
+    def request_async(self, shared: bool = False) -> Future:
+        """ Demande d'entrée en SC sans bloquer : la `Future` est résolue à l'entrée en "sc".
+        `shared` : accès partagé (moteur `"shared"` seulement ; exclusif ailleurs)."""
+        raise NotImplementedError
+
+    def release(self):
+        """ Sortie de SC."""
+        raise NotImplementedError
+
+    def on_message(self, msg: Message):
+        """ Traite un message système adressé au moteur (TOKEN, SC_REQUEST, TOKEN_CENSUS).
+        Un jeton d'une génération dépassée est détruit."""
+        if msg.kind == MsgKind.TOKEN_CENSUS:
+            self._on_census(msg)
+            return
+        if isinstance(msg, Token):
+            with self.lock:
+                if msg.seq < self.epoch:
+                    return
+                self.epoch = msg.seq
+                self._on_token(msg)
+            return
+        self._on_request(msg)
+
+    def on_view(self):
+        """ La vue a perdu des membres : un recensement ne les attend plus."""
+        with self.lock:
+            done = self._census_done()
+        self._finish_census(done)
+
+    # === Hooks des sous-classes (sous self.lock) ===
+    def _on_token(self, tok: Token):
+        """ Réception d'un jeton de la génération courante."""
+        raise NotImplementedError
+
+    def _on_request(self, msg: Message):
+        """ Message système autre que jeton / recensement (hors verrou)."""
+
+    def _census_report(self) -> dict:
+        """ État local joint à une réponse de recensement."""
+        return {}
+
+    def _upgrade(self, epoch: int):
+        """ Fait passer le jeton détenu à la génération `epoch`."""
+
+    def _regenerate(self, epoch: int, replies: dict[str, dict]) -> Token:
+        """ Crée le jeton de la génération `epoch` (personne ne le détient)."""
+        return Token(holder=self.com.id, seq=epoch, resource=self.resource)
+
+    # === Helpers ===
+    def _new_waiter(self) -> Future:
+        """ Crée la `Future` de la demande en cours et arme la détection de perte
+        du jeton. À appeler sous `self.lock`."""
+        fut: Future = Future()
+        fut.set_running_or_notify_cancel()
+        self._waiter = fut
+        self._arm_timeout(fut)
+        return fut
+
+    def _enter(self):
+        """ Passe en "sc" et résout la demande en attente. À appeler sous `self.lock`."""
+        self.state = "sc"
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None:
+            waiter.set_result(None)
+
+    def _arm_timeout(self, fut: Future):
+        """ Programme la suspicion de perte du jeton pour la demande `fut`."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self.com.bus.scheduler.call_later(TOKEN_TIMEOUT_SEC, self._on_timeout, fut)
+
+    def _on_timeout(self, fut: Future):
+        """ Échéance (thread du scheduler) : la demande attend toujours le jeton."""
+        with self.lock:
+            if self._waiter is not fut or fut.done():
+                return
+            self._arm_timeout(fut)
+        # `claim_token` peut être un appel distant : hors du thread du scheduler
+        self.com.bus.defer(self._suspect)
+
+    def _suspect(self):
+        """ Tente de coordonner la régénération du jeton (génération suivante)."""
+        com = self.com
+        with self.lock:
+            if self.has_token:
+                return
+            epoch = max(self.epoch, self._claim_hint) + 1
+        if not com.bus.claim_token(self.resource, epoch):
+            with self.lock:
+                self._claim_hint = max(self._claim_hint, epoch)
+            return
+        with self.lock:
+            if self.epoch >= epoch:
+                return
+            self.epoch = epoch
+            self._census = _Census(epoch)
+            probe = CensusMessage(seq=epoch, sender=com.id, resource=self.resource)
+        com.bus.broadcast(probe, exclude_uid=com.node_uid)
+        self.on_view()
+
+    def _on_census(self, msg: CensusMessage):
+        """ Sonde : adopte la génération et répond. Réponse : comptée si elle
+        concerne le recensement en cours."""
+        com = self.com
+        if msg.payload is None:
+            with self.lock:
+                if msg.seq < self.epoch:
+                    return
+                self.epoch = msg.seq
+                if self._census is not None and self._census.epoch < msg.seq:
+                    self._census = None
+                if self.has_token:
+                    self._upgrade(msg.seq)
+                report = {"uid": com.node_uid, "id": com.id, "has_token": self.has_token,
+                          "requesting": self.state == "request", **self._census_report()}
+                reply = CensusMessage(seq=msg.seq, sender=com.id, payload=report,
+                                      resource=self.resource)
+            com.bus.sendto(msg.sender, reply)
+            return
+        with self.lock:
+            census = self._census
+            if census is None or census.epoch != msg.seq:
+                return
+            census.replies[msg.payload["uid"]] = msg.payload
+            done = self._census_done()
+        self._finish_census(done)
+
+    def _census_done(self) -> Token | bool | None:
+        """ Clôt le recensement si tous les membres de la vue ont répondu.
+        Retourne le jeton régénéré, True si le jeton existe déjà, None sinon.
+        À appeler sous `self.lock`."""
+        census = self._census
+        if census is None:
+            return None
+        me = self.com.node_uid
+        for uid in self.com.bus.view.members:
+            if uid != me and uid not in census.replies:
+                return None
+        self._census = None
+        if any(r["has_token"] for r in census.replies.values()):
+            return True
+        return self._regenerate(census.epoch, census.replies)
+
+    def _finish_census(self, done: Token | bool | None):
+        """ Injecte localement le jeton régénéré (hors verrou)."""
+        if isinstance(done, Token):
+            self.com._post(done)
+
+class RingMutex(MutexEngine):
+    """
+    Jeton sur anneau : le jeton circule en permanence de id en id+1.
+    Un processus qui veut la SC le garde jusqu'à `release()`.
+    """
+
+    def start(self):
+        """ Le premier processus à rejoindre le bus injecte le jeton initial."""
+        if self.com.bus.claim_token(self.resource):
+            self.com._post(self._initial_token())
+
+    def request_async(self, shared: bool = False) -> Future:
+        """ Place l'état à "request" ; le passage du jeton résoudra la `Future`."""
+        with self.lock:
+            fut = self._new_waiter()
+            self.state = "request"
+        return fut
+
+    def release(self):
+        """ Passe par "release", remet "idle" et transmet immédiatement le jeton."""
+        with self.lock:
+            if self.state != "sc":
+                return
+            self.state = "release"
+            self.has_token = False
+            self._forward()
+            self.state = "idle"
+
+    def _on_token(self, tok: Token):
+        """ Réception du jeton : entrée en SC si demandée, sinon forward au suivant."""
+        if self.state == "request":
+            self.has_token = True
+            self._enter()
+            return
+        self._forward(idle=True)
+
+    def _initial_token(self) -> Token:
+        """ Jeton injecté par le premier processus (`start`)."""
+        return Token(holder=self.com.id, resource=self.resource)
+
+    def _forward(self, idle: bool = False, tok: Token | None = None):
+        """Envoi du token *asynchrone* (via l'exécuteur partagé du bus) pour éviter
+        une chaîne de `_deliver` récursive. Le successeur est calculé au moment de
+        l'envoi ; la génération est celle du jeton cédé (un recensement entre-temps
+        doit le périmer). Un saut 'à vide' est espacé de TOKEN_IDLE_HOP_SEC (minuteur
+        du scheduler du bus) pour qu'un anneau inactif ne monopolise pas un cœur.
+        `tok` : jeton reçu à faire suivre tel quel (sinon un jeton neuf)."""
+        com = self.com
+        seq = self.epoch
+        if tok is None:
+            tok = Token(holder=-1, resource=self.resource)
+        def _send():
+            next_id = (com.id + 1) % com.world_size
+            tok.holder = next_id
+            tok.seq = seq
+            com.bus.sendto(next_id, tok)
+        if idle and TOKEN_IDLE_HOP_SEC > 0:
+            com.bus.scheduler.call_later(TOKEN_IDLE_HOP_SEC, com.bus.defer, _send)
+        else:
+            com.bus.defer(_send)
+
+class SuzukiKasamiMutex(MutexEngine):
+    """
+    Algorithme de Suzuki–Kasami : le jeton ne bouge que s'il existe une demande.
+    - `rn[j]` : plus grand numéro de requête connu pour j
+    - le jeton porte `ln[j]` (numéro de la dernière requête servie) et la file d'attente
+    Une demande coûte une diffusion + au plus un envoi du jeton ; un système
+    inactif n'échange aucun message.
+    `rn`, `ln` et la file sont indexés par UID (stables) : les ids logiques changent
+    à chaque arrivée / départ ; l'id du destinataire n'est résolu qu'à l'envoi.
+    """
+
+    def __init__(self, com: "Com", resource: str = DEFAULT_RESOURCE):
+        super().__init__(com, resource)
+        self.rn: dict[str, int] = {}
+        self.token: SKToken | None = None
+
+    def start(self):
+        """ Le premier processus à rejoindre le bus détient le jeton initial
+        (parqué, sans circulation)."""
+        if self.com.bus.claim_token(self.resource):
+            with self.lock:
+                self.token = SKToken(holder=self.com.id, resource=self.resource)
+                self.has_token = True
+
+    def stop(self):
+        """ Un jeton parqué ici est cédé au premier demandeur en file, sinon au suivant."""
+        with self.lock:
+            if not self.has_token or self.state != "idle" or self.com.world_size < 2:
+                return
+            tok = self.token
+            self._send_token(tok.queue.pop(0) if tok.queue else self._others()[0])
+
+    def request_async(self, shared: bool = False) -> Future:
+        """ Entre directement si le jeton est là, sinon diffuse une requête numérotée
+        (hors verrou : la livraison peut être synchrone chez les autres)."""
+        com = self.com
+        me = com.node_uid
+        with self.lock:
+            fut = self._new_waiter()
+            self.state = "request"
+            if self.has_token:
+                self._enter()
+                return fut
+            seq = self.rn.get(me, 0) + 1
+            self.rn[me] = seq
+            req = SCRequestMessage(seq=seq, sender=com.id, resource=self.resource, uid=me)
+        com.bus.broadcast(req, exclude_uid=me)
+        return fut
+
+    def release(self):
+        """ Met à jour `ln`, ajoute les demandeurs en attente à la file du jeton
+        (dans l'ordre de l'anneau à partir d'ici) et l'envoie au premier d'entre eux
+        (sinon le garde)."""
+        with self.lock:
+            if self.state != "sc":
+                return
+            self.state = "release"
+            me = self.com.node_uid
+            tok = self.token
+            tok.ln[me] = self.rn.get(me, 0)
+            for j in self._others():
+                if j not in tok.queue and self.rn.get(j, 0) == tok.ln.get(j, 0) + 1:
+                    tok.queue.append(j)
+            if tok.queue:
+                self._send_token(tok.queue.pop(0))
+            self.state = "idle"
+
+    def _on_request(self, msg: Message):
+        """ SC_REQUEST : met à jour `rn` et cède le jeton s'il est libre."""
+        if msg.kind != MsgKind.SC_REQUEST or msg.uid is None:
+            return
+        j = msg.uid
+        with self.lock:
+            self.rn[j] = max(self.rn.get(j, 0), msg.seq)
+            if (self.has_token and self.state == "idle"
+                    and self.rn[j] == self.token.ln.get(j, 0) + 1):
+                self._send_token(j)
+
+    def _on_token(self, tok: Token):
+        """ TOKEN : entre en SC si demandée, sinon sert la file ou garde le jeton."""
+        if not isinstance(tok, SKToken):
+            return
+        self.token = tok
+        self.has_token = True
+        if self.state == "request":
+            self._enter()
+        elif tok.queue:
+            self._send_token(tok.queue.pop(0))
+
+    def _census_report(self) -> dict:
+        """ Numéro de la dernière requête de ce processus (pour reconstruire `ln`)."""
+        return {"rn": self.rn.get(self.com.node_uid, 0)}
+
+    def _upgrade(self, epoch: int):
+        self.token.seq = epoch
+
+    def _regenerate(self, epoch: int, replies: dict[str, dict]) -> SKToken:
+        """ Reconstruit `ln` : la dernière requête d'un processus est servie, sauf
+        s'il attend encore ; les demandeurs en attente forment la file."""
+        me = self.com.node_uid
+        tok = SKToken(holder=self.com.id, seq=epoch, resource=self.resource)
+        reports = list(replies.values())
+        reports.append({"uid": me, "requesting": self.state == "request", **self._census_report()})
+        for r in reports:
+            j = r["uid"]
+            self.rn[j] = max(self.rn.get(j, 0), r["rn"])
+            tok.ln[j] = r["rn"] - 1 if r["requesting"] else r["rn"]
+            if r["requesting"] and j != me:
+                tok.queue.append(j)
+        return tok
+
+    def _others(self) -> list[str]:
+        """ UID des autres membres, dans l'ordre de l'anneau à partir d'ici."""
+        members = self.com.bus.view.members
+        me = self.com.node_uid
+        if me not in members:
+            return list(members)
+        i = members.index(me)
+        return list(members[i + 1:] + members[:i])
+
+    def _send_token(self, dest: str):
+        """ Cède le jeton au membre d'UID `dest` (envoi différé, id résolu à l'envoi).
+        À appeler sous `self.lock`."""
+        tok = self.token
+        self.token = None
+        self.has_token = False
+        com = self.com
+        def _send():
+            tok.holder = com.bus.view.index(dest)
+            com._send_to_uids([(dest, tok)])
+        com.bus.defer(_send)
+
+class SharedRingMutex(RingMutex):
+    """
+    Anneau à permis (k-exclusion et lecteurs / rédacteur) : le jeton (`PermitToken`)
+    porte `permits` permis (`Com(sc_permits=k)`) et ne s'arrête jamais.
+    - une demande partagée (`shared=True`) prend un permis au passage du jeton :
+      au plus k détenteurs simultanés (k-exclusion, ou lecteurs d'un verrou RW)
+    - une demande exclusive les prend tous (rédacteur) ; faute de permis, elle réserve
+      le jeton, qui n'en cède plus d'autres jusqu'à son entrée
+    - `release()` est local : les permis sont rendus au passage suivant du jeton
+    Une régénération compte les permis encore pris ou à rendre (`_census_report`) :
+    le nouveau jeton porte le reste, les permis d'un partant sont récupérés.
+    """
+
+    def __init__(self, com: "Com", resource: str = DEFAULT_RESOURCE):
+        super().__init__(com, resource)
+        self.permits = com.sc_permits  # taille du jeton (mise à jour à chaque passage)
+        self.want = 0                  # permis demandés (0 : tous)
+        self.held = 0                  # permis pris, SC en cours
+        self.returns = 0               # permis libérés, à rendre au jeton
+
+    def request_async(self, shared: bool = False) -> Future:
+        with self.lock:
+            fut = self._new_waiter()
+            self.state = "request"
+            self.want = 1 if shared else 0
+        return fut
+
+    def release(self):
+        """ Sortie de SC : les permis seront rendus au prochain passage du jeton."""
+        with self.lock:
+            if self.state != "sc":
+                return
+            self.state = "release"
+            self.returns += self.held
+            self.held = 0
+            self.state = "idle"
+
+    def _initial_token(self) -> Token:
+        return PermitToken(holder=self.com.id, permits=self.permits, resource=self.resource)
+
+    def _on_token(self, tok: Token):
+        """ Rend les permis libérés, en prend si une demande est en attente (ou
+        réserve le jeton pour un rédacteur), puis fait suivre le jeton."""
+        if not isinstance(tok, PermitToken):
+            return
+        self.permits = tok.permits
+        changed = self.returns > 0
+        tok.free += self.returns
+        self.returns = 0
+        if tok.reserved is not None and tok.reserved not in self.com.bus.view:
+            tok.reserved = None  # rédacteur parti
+        if self.state == "request":
+            me = self.com.node_uid
+            need = self.want or tok.permits
+            if tok.free >= need and tok.reserved in (None, me):
+                tok.free -= need
+                tok.reserved = None
+                self.held = need
+                self._enter()
+                changed = True
+            elif not self.want and tok.reserved is None:
+                tok.reserved = me
+        self._forward(idle=not changed, tok=tok)
+
+    def _census_report(self) -> dict:
+        """ Permis pris ou pas encore rendus (absents de tout jeton régénéré)."""
+        return {"out": self.held + self.returns, "permits": self.permits}
+
+    def _regenerate(self, epoch: int, replies: dict[str, dict]) -> PermitToken:
+        """ Jeton de la génération `epoch` avec les permis que personne n'a."""
+        mine = self._census_report()
+        permits = max([r["permits"] for r in replies.values()] + [mine["permits"]])
+        out = mine["out"] + sum(r["out"] for r in replies.values())
+        return PermitToken(holder=self.com.id, permits=permits, seq=epoch,
+                           resource=self.resource, free=max(0, permits - out))
+
+# Moteurs sélectionnables via `Com(..., sc_mode=...)`
+SC_MODES: dict[str, type[MutexEngine]] = {
+    "ring": RingMutex,
+    "suzuki": SuzukiKasamiMutex,
+    "shared": SharedRingMutex,
+}
@@ -0,0 +1,291 @@
+from __future__ import annotations
+import heapq, threading
+from array import array
+from typing import TYPE_CHECKING
+
+from Message import Message, MsgKind
+from Mailbox import Mailbox
+
+if TYPE_CHECKING:
+    from Com import Com
+
+ORDER_GOSSIP_SEC = 0.001  # regroupement des diffusions d'horloge (ordre total)
+
+class OrderedMessage(Message):
+    """
+    Message applicatif à ordre total (`Com.broadcastOrdered`).
+    `origin` est l'UID de l'émetteur : la clé d'ordre (lamport, origin) est la même
+    chez tous, même si les ids logiques changent entre-temps.
+    """
+    __slots__ = ("origin",)
+
+    def __init__(self, payload, lamport: int, sender: int, origin: str):
+        super().__init__(MsgKind.ORDERED, payload, lamport, sender)
+        self.origin = origin
+
+class ClockMessage(Message):
+    """
+    Diffusion d'horloge (ordre total) : `origin` n'enverra plus de message
+    ordonné d'estampille <= `lamport`.
+    """
+    __slots__ = ("origin",)
+
+    def __init__(self, lamport: int, sender: int, origin: str):
+        super().__init__(MsgKind.CLOCK, None, lamport, sender)
+        self.origin = origin
+
+class CausalMessage(Message):
+    """
+    Message applicatif à délivrance causale (`Com.broadcastCausal`).
+    `seq` est son numéro chez l'émetteur ; `deps` l'en-tête d'horloge compressé :
+    `array('Q')` sérialisé [slot de l'émetteur, puis couples (slot, valeur)] des seules
+    entrées de son horloge vectorielle modifiées depuis son message précédent.
+    """
+    __slots__ = ("seq", "deps")
+
+    def __init__(self, payload, lamport: int, sender: int, seq: int, deps: bytes):
+        super().__init__(MsgKind.CAUSAL, payload, lamport, sender)
+        self.seq = seq
+        self.deps = deps
+
+class TotalOrder:
+    """
+    Diffusion à ordre total par estampilles de Lamport.
+    - les messages reçus (et les siens) attendent dans un tas de rétention,
+      clé (lamport, UID d'origine)
+    - `_latest[u]` : plus grande estampille reçue de u ; les canaux étant FIFO,
+      u n'enverra plus rien en dessous. Un tas paresseux donne le minimum sur les
+      membres de la vue
+    - la tête du tas est stable (délivrable) dès que ce minimum l'atteint
+    - chaque processus qui voit son horloge avancer la diffuse (`ClockMessage`),
+      regroupée sur ORDER_GOSSIP_SEC, pour que les autres puissent délivrer
+    Coût : O(log n) par message et par mise à jour d'horloge.
+    Les messages délivrés vont dans une BAL dédiée (`Com.receiveOrdered`).
+    """
+
+    def __init__(self, com: "Com"):
+        """ Rattache l'ordre total à son `Com`."""
+        self.com = com
+        self.mailbox = Mailbox()
+        self.send_lock = threading.Lock()  # estampille + envoi atomiques (FIFO par émetteur)
+        self._lock = threading.Lock()
+        self._holdback: list[tuple[int, str, OrderedMessage]] = []
+        self._latest: dict[str, int] = {}
+        self._peers: list[tuple[int, str]] = []  # tas paresseux (estampille, UID)
+        self._view = None
+        self._gossiped = 0
+        self._gossip_timer = None
+
+    def send(self, payload: object) -> OrderedMessage:
+        """ Estampille, retient localement et diffuse un message ordonné."""
+        com = self.com
+        with self.send_lock:
+            ts = com.inc_clock()
+            msg = OrderedMessage(payload, ts, com.id, com.node_uid)
+            self._gossiped = max(self._gossiped, ts)
+            with self._lock:
+                heapq.heappush(self._holdback, (ts, com.node_uid, msg))
+                self._drain()
+            com.bus.broadcast(msg, exclude_uid=com.node_uid)
+        return msg
+
+    def on_message(self, msg: Message):
+        """ Message ordonné ou diffusion d'horloge reçu d'un autre processus."""
+        com = self.com
+        ts = msg.lamport
+        if msg.kind == MsgKind.ORDERED:
+            com.update_clock_on_recv(ts)
+        else:
+            with com.clock_lock:
+                com.clock = max(com.clock, ts)
+        with self._lock:
+            if ts > self._latest.get(msg.origin, 0):
+                self._latest[msg.origin] = ts
+                heapq.heappush(self._peers, (ts, msg.origin))
+            if msg.kind == MsgKind.ORDERED:
+                heapq.heappush(self._holdback, (ts, msg.origin, msg))
+            self._drain()
+            if self._gossip_timer is None and com.clock > self._gossiped:
+                self._gossip_timer = com.bus.scheduler.call_later(ORDER_GOSSIP_SEC, self._gossip)
+
+    def on_view(self):
+        """ Départs : un partant n'est plus attendu, des messages retenus peuvent
+        devenir stables sans attendre un nouveau message."""
+        with self._lock:
+            self._drain()
+
+    # === Helpers ===
+    def _drain(self):
+        """ Délivre, dans l'ordre, les messages stables. À appeler sous `self._lock`."""
+        holdback = self._holdback
+        if not holdback:
+            return
+        view = self.com.bus.view
+        peers = self._peers
+        if view is not self._view:
+            me = self.com.node_uid
+            self._view = view
+            self._peers = peers = [(self._latest.get(u, 0), u) for u in view.members if u != me]
+            heapq.heapify(peers)
+        while peers:
+            ts, uid = peers[0]
+            if self._latest.get(uid, 0) != ts or view.index(uid) < 0:
+                heapq.heappop(peers)
+                continue
+            break
+        stable = peers[0][0] if peers else None
+        put = self.mailbox.put
+        n = 0
+        while holdback and (stable is None or holdback[0][0] <= stable):
+            put(heapq.heappop(holdback)[2])
+            n += 1
+        if n:
+            self.com.metrics.inc("received", n)
+
+    def _gossip(self):
+        """ Diffuse l'horloge locale si elle a avancé depuis la dernière diffusion."""
+        com = self.com
+        with self.send_lock:
+            with self._lock:
+                self._gossip_timer = None
+            ts = com.clock
+            if ts <= self._gossiped:
+                return
+            self._gossiped = ts
+            com.bus.broadcast(ClockMessage(ts, com.id, com.node_uid), exclude_uid=com.node_uid)
+
+class CausalOrder:
+    """
+    Diffusion causale par horloges vectorielles compactes (`array('Q')`), indexées par
+    le numéro stable des membres (`View.slots`) et étendues au fil des arrivées.
+    - `_vc[k]` : nombre de messages de k délivrés ici (pour soi : envoyés)
+    - un message n'emporte que les entrées modifiées depuis le message précédent du
+      même émetteur : les autres ont déjà été vérifiées pour ce précédent, qui est
+      délivré avant lui (FIFO par émetteur)
+    - un message non délivrable attend sous la *première* dépendance manquante
+      (slot, valeur) ; il n'est re-vérifié que quand cette entrée atteint la valeur
+    Les messages délivrés vont dans la BAL du `Com`, dans l'ordre causal.
+    Les dépendances envers un membre parti sont considérées satisfaites. Un membre
+    doit avoir rejoint avant les premiers messages causaux de ses pairs.
+    """
+
+    def __init__(self, com: "Com"):
+        """ Rattache la diffusion causale à son `Com`."""
+        self.com = com
+        self.send_lock = threading.Lock()  # numéro + envoi atomiques (FIFO par émetteur)
+        self._lock = threading.Lock()
+        self._vc = array("Q")
+        self._slot = -1
+        self._dirty: set[int] = set()  # entrées délivrées depuis notre dernier envoi
+        self._waiting: dict[tuple[int, int], list[tuple[int, int, array, CausalMessage]]] = {}
+        self._gone: set[int] = set()
+
+    def send(self, payload: object, credit=None) -> CausalMessage:
+        """ Numérote et diffuse un message causal (en-tête delta) ; `credit` : ticket
+        de réservation dans les BAL bornées (`Bus.reserve`)."""
+        com = self.com
+        with self.send_lock:
+            ts = com.inc_clock()
+            with self._lock:
+                me = self._my_slot()
+                vc = self._vc
+                vc[me] += 1
+                hdr = array("Q", (me,))
+                for k in self._dirty:
+                    hdr.append(k)
+                    hdr.append(vc[k])
+                self._dirty.clear()
+                msg = CausalMessage(payload, ts, com.id, vc[me], hdr.tobytes())
+            if credit is not None:
+                msg.credit = credit
+            com.bus.broadcast(msg, exclude_uid=com.node_uid)
+        return msg
+
+    def on_message(self, msg: CausalMessage):
+        """ Message causal reçu : délivré s'il est prêt, sinon mis en attente."""
+        com = self.com
+        com.update_clock_on_recv(msg.lamport)
+        hdr = array("Q")
+        hdr.frombytes(msg.deps)
+        with self._lock:
+            self._my_slot()
+            delivered = self._process([(hdr[0], msg.seq, hdr, msg)])
+        self._notify(delivered)
+
+    def on_view(self, view):
+        """ Départs : les dépendances envers les partants ne bloquent plus."""
+        gone = set(range(view.next_slot)).difference(view.slots)
+        with self._lock:
+            new = gone - self._gone
+            if not new:
+                return
+            self._gone |= new
+            work = []
+            for key in [key for key in self._waiting if key[0] in new]:
+                work.extend(self._waiting.pop(key))
+            delivered = self._process(work)
+        self._notify(delivered)
+
+    # === Helpers (sous self._lock) ===
+    def _my_slot(self) -> int:
+        """ Slot de ce `Com` ; agrandit l'horloge à la taille de la vue courante."""
+        view = self.com.bus.view
+        if self._slot < 0:
+            self._slot = view.slot(self.com.node_uid)
+        self._grow(view.next_slot - 1)
+        return self._slot
+
+    def _grow(self, k: int):
+        """ Garantit que l'entrée `k` existe dans l'horloge vectorielle."""
+        if k >= len(self._vc):
+            self._vc.extend([0] * (k + 1 - len(self._vc)))
+
+    def _missing(self, origin: int, seq: int, hdr: array) -> tuple[int, int] | None:
+        """ Première dépendance non satisfaite (slot, valeur attendue), ou None."""
+        vc = self._vc
+        if vc[origin] + 1 < seq:
+            return (origin, seq - 1)
+        gone = self._gone
+        for i in range(1, len(hdr), 2):
+            k, v = hdr[i], hdr[i + 1]
+            if k >= len(vc):
+                self._grow(k)
+            if vc[k] < v and k not in gone:
+                return (k, v)
+        return None
+
+    def _process(self, work: list) -> list[CausalMessage]:
+        """ Délivre ce qui est prêt (et ce que chaque délivrance débloque), met le
+        reste en attente sous sa dépendance manquante."""
+        delivered = []
+        vc = self._vc
+        put = self.com.mailbox.put
+        while work:
+            origin, seq, hdr, msg = entry = work.pop()
+            self._grow(origin)
+            if vc[origin] >= seq:
+                continue  # doublon
+            key = self._missing(origin, seq, hdr)
+            if key is not None:
+                self._waiting.setdefault(key, []).append(entry)
+                continue
+            vc[origin] = seq
+            self._dirty.add(origin)
+            put(msg)
+            delivered.append(msg)
+            woken = self._waiting.pop((origin, seq), None)
+            if woken:
+                work.extend(woken)
+        if delivered:
+            self.com.metrics.inc("received", len(delivered))
+        return delivered
+
+    def _notify(self, delivered: list[CausalMessage]):
+        """ Callback applicatif éventuel (hors verrou)."""
+        cb = self.com.on_receive
+        if cb:
+            for msg in delivered:
+                try:
+                    cb(msg)
+                except Exception:
+                    pass
@@ -12,9 +12,10 @@ class Process:
     def __init__(self, bus: Bus, name: str = ""):
         """
         Construit le processus applicatif, crée son `Com` et s'enregistre
-        comme subscriber PyBus pour recevoir les `UserEvent`.
+        comme subscriber PyBus pour recevoir les `UserEvent` (publiés pour chaque
+        envoi : `event_sample=1.0`, la valeur par défaut étant 0).
         """
-        self.com = Com(bus, on_receive=None)
+        self.com = Com(bus, on_receive=None, event_sample=1.0)
         self.name = name or f"P{self.com.id}"
         PyBus.Instance().register(self, self)
 
@@ -36,13 +37,13 @@ class Process:
         - synchronize() (barrière globale)
         - requestSC()/releaseSC() (SC via jeton, handler onToken)
         """
-        print(f"[{self.name}] start, world_size={len(self.com.bus._directory)}")
+        print(f"[{self.name}] start, world_size={self.com.world_size}")
 
         # ASYNC
         self.com.broadcast({"BONJOUR": f"from {self.com.id}"})
         self.com.sendTo(
-            {"dm": f"to {(self.com.id + 1) % len(self.com.bus._directory)}"},
-            dest=(self.com.id + 1) % len(self.com.bus._directory)
+            {"dm": f"to {(self.com.id + 1) % self.com.world_size}"},
+            dest=(self.com.id + 1) % self.com.world_size
         )
 
         # SYNC
@@ -51,10 +52,10 @@ class Process:
             from_id=self.com.id
         )
         self.com.sendToSync(
-            {"sync_one": f"to {(self.com.id + 1) % len(self.com.bus._directory)}"},
-            dest=(self.com.id + 1) % len(self.com.bus._directory)
+            {"sync_one": f"to {(self.com.id + 1) % self.com.world_size}"},
+            dest=(self.com.id + 1) % self.com.world_size
         )
-        _ = self.com.recvFromSync(from_id=(self.com.id - 1) % len(self.com.bus._directory), timeout=2)
+        _ = self.com.recvFromSync(from_id=(self.com.id - 1) % self.com.world_size, timeout=2)
 
         # BARRIÈRE
         print(f"[{self.name}] waiting barrier")
@@ -0,0 +1,596 @@
+from __future__ import annotations
+import copy, itertools, os, queue, socket, threading, uuid
+from multiprocessing.connection import Client, Connection, Listener
+from typing import TYPE_CHECKING, Callable
+
+from Bus import Bus, _EXECUTOR
+from Codec import DEFAULT_CODEC, Codec
+from Message import Message
+from Scheduler import SCHEDULER
+from ShmPayload import SHM_THRESHOLD, ShmHandle, attach, export, shareable, unlink
+from Synchronize import GLOBAL_BARRIER
+from View import View
+
+if TYPE_CHECKING:
+    from Com import Com
+    from Journal import Journal
+
+CLOSE_TIMEOUT_SEC = 2.0  # attente des threads lecteur / écrivain à la fermeture
+
+def _shutdown(conn: Connection):
+    """ Coupe le socket de `conn` sans fermer son descripteur : un `recv()` bloqué
+    dans un autre thread lit EOF au lieu de voir le descripteur disparaître."""
+    try:
+        sock = socket.socket(fileno=os.dup(conn.fileno()))
+    except (OSError, ValueError):
+        return  # déjà fermée
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+class _Peer:
+    """
+    Côté serveur : une connexion vers un processus OS (qui peut héberger plusieurs `Com`).
+    Les envois passent par une file et un thread écrivain dédié, pour que le `Bus`
+    du serveur n'attende jamais un socket plein.
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.outbox: queue.SimpleQueue = queue.SimpleQueue()
+        self.proxies: dict[str, "_RemoteCom"] = {}
+        self.view_epoch: int | None = None  # dernière vue transmise à ce processus
+        self.shm: dict[str, int] = {}         # segment partagé -> références tenues par ce processus
+        self.reader: threading.Thread | None = None
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def send(self, frame: tuple):
+        """ Enfile une trame vers le processus distant."""
+        self.outbox.put(frame)
+
+    def close(self):
+        """ Arrête le thread écrivain."""
+        self.outbox.put(None)
+
+    def join(self, timeout: float):
+        """ Attend la fin des threads lecteur et écrivain (sauf depuis l'un d'eux)."""
+        for t in (self.reader, self._writer):
+            if t is not None and t is not threading.current_thread():
+                t.join(timeout)
+
+    def _write_loop(self):
+        """ Vide la file d'envoi vers la connexion (une trame à la fois)."""
+        while True:
+            frame = self.outbox.get()
+            if frame is None:
+                return
+            try:
+                self.conn.send(frame)
+            except (OSError, EOFError, TypeError, ValueError):
+                return  # connexion fermée (éventuellement pendant l'envoi)
+
+class _RemoteCom:
+    """
+    Représentant, dans le `Bus` du serveur, d'un `Com` vivant dans un autre processus.
+    Expose les callbacks attendus par `Bus` et les traduit en trames.
+    """
+
+    def __init__(self, server: "BusServer", peer: _Peer, node_uid: str):
+        self.server = server
+        self.peer = peer
+        self.node_uid = node_uid
+
+    def _post(self, msg: Message):
+        if type(msg.payload) is ShmHandle:
+            self.server._shm_add(self.peer, (msg.payload.name,), 1)
+        self.peer.send(("deliver", self.node_uid, self.server._encoded(msg)))
+
+    _deliver = _post
+
+    def _post_many(self, msgs: list[Message]):
+        names = [m.payload.name for m in msgs if type(m.payload) is ShmHandle]
+        if names:
+            self.server._shm_add(self.peer, names, 1)
+        self.peer.send(("deliver_many", self.node_uid, self.server._encoded_many(msgs)))
+
+    def _start_dispatcher(self):
+        """ La file d'entrée est gérée côté processus distant."""
+
+    def _onView(self, view: View, left: tuple[str, ...]):
+        """ Rien à faire : la vue est relayée une fois par processus (`BusServer._on_view`)."""
+
+    def _onBarrierRelease(self, name: str, generation: int):
+        self.peer.send(("barrier_release", self.node_uid, name, generation))
+
+class BusServer:
+    """
+    Serveur de transport multi-processus : héberge le `Bus` de référence et relaie
+    les appels des `RemoteBus` reçus sur un socket Unix (ou un pipe nommé).
+    - `expected` : si fourni, les réponses aux `join` sont retenues jusqu'à ce que
+      `expected` participants aient rejoint (démarrage synchronisé)
+    - les messages voyagent au format binaire de `Codec` ; un message diffusé est
+      décodé une fois et ses octets reçus sont réutilisés pour chaque destinataire
+    - chaque changement de vue est relayé une fois par processus, sous forme de delta
+      (arrivées / départs) ; un processus sans vue à jour reçoit la vue complète
+    - les adhésions aux groupes sont relayées à tous les processus, qui en gardent
+      une copie locale (membres attendus par un `broadcastSync` de groupe)
+    - un payload en mémoire partagée (`ShmHandle`) compte une référence par
+      destinataire ; le segment est supprimé quand tous l'ont relâché (ou sont partis)
+    """
+
+    def __init__(self, address: str | None = None, expected: int | None = None,
+                 authkey: bytes | None = None, codec: Codec | None = None,
+                 journal: "Journal | None" = None):
+        """ Ouvre l'écoute et démarre le thread d'acceptation.
+        `journal` : journal des envois de tous les processus (cf. `Bus(journal=...)`)."""
+        self.bus = Bus(journal=journal)
+        self.codec = codec or DEFAULT_CODEC
+        self._tls = threading.local()
+        self.expected = expected
+        self._listener = Listener(address, family="AF_UNIX", authkey=authkey)
+        self.address = self._listener.address
+        self._lock = threading.Lock()
+        self._peers: list[_Peer] = []
+        self._held_joins: list[tuple[_Peer, int]] = []
+        self._joined = 0
+        self._holding = expected is not None
+        self._closed = False
+        self._shm_lock = threading.Lock()
+        self._shm_refs: dict[str, int] = {}  # segment partagé -> références en cours
+        self.bus.add_view_listener(self._on_view)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        """ Ferme l'écoute et toutes les connexions."""
+        self._closed = True
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        with self._lock:
+            peers = list(self._peers)
+        for p in peers:
+            p.close()
+            _shutdown(p.conn)  # le lecteur lit EOF, l'écrivain échoue : ils s'arrêtent
+        for p in peers:
+            p.join(CLOSE_TIMEOUT_SEC)
+            try:
+                p.conn.close()
+            except OSError:
+                pass
+        with self._shm_lock:
+            names, self._shm_refs = list(self._shm_refs), {}
+        for name in names:
+            unlink(name)
+
+    def _accept_loop(self):
+        """ Accepte les connexions et démarre un lecteur par processus distant."""
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                return
+            peer = _Peer(conn)
+            peer.reader = threading.Thread(target=self._read_loop, args=(peer,), daemon=True)
+            with self._lock:
+                if self._closed:
+                    conn.close()
+                    return
+                self._peers.append(peer)
+            peer.reader.start()
+
+    def _read_loop(self, peer: _Peer):
+        """ Lit les trames d'un processus et les rejoue sur le `Bus` local."""
+        try:
+            while True:
+                self._handle(peer, peer.conn.recv())
+        except (OSError, EOFError):
+            pass
+        except Exception:
+            if not self._closed:
+                raise  # après close(), une connexion fermée sous le lecteur est un arrêt normal
+        finally:
+            for proxy in list(peer.proxies.values()):
+                self.bus.leave(proxy)
+            peer.proxies.clear()
+            for name, n in list(peer.shm.items()):
+                self._shm_add(peer, (name,) * n, -1)
+            peer.close()
+            with self._lock:
+                if peer in self._peers:
+                    self._peers.remove(peer)
+
+    def _handle(self, peer: _Peer, frame: tuple):
+        """ Aiguille une trame reçue vers la méthode correspondante du `Bus`."""
+        op = frame[0]
+        if op == "broadcast":
+            _, data, exclude_uid = frame
+            msg = self._decoded(data)
+            self._relay((msg,), self.bus.broadcast, msg, exclude_uid=exclude_uid)
+        elif op == "sendto":
+            _, dest_id, data = frame
+            msg = self._decoded(data)
+            self._relay((msg,), self.bus.sendto, dest_id, msg)
+        elif op == "broadcast_many":
+            _, datas, exclude_uid = frame
+            msgs = self._decoded_many(datas)
+            self._relay(msgs, self.bus.broadcast_many, msgs, exclude_uid=exclude_uid)
+        elif op == "sendto_many":
+            _, dest_id, datas = frame
+            msgs = self._decoded_many(datas)
+            self._relay(msgs, self.bus.sendto_many, dest_id, msgs)
+        elif op == "broadcast_group":
+            _, name, data, exclude_uid = frame
+            msg = self._decoded(data)
+            self._relay((msg,), self.bus.broadcast_group, name, msg, exclude_uid=exclude_uid)
+        elif op == "shm_release":
+            if peer.shm.get(frame[1], 0) > 0:
+                self._shm_add(peer, (frame[1],), -1)
+        elif op in ("join_group", "leave_group"):
+            _, uid, name = frame
+            getattr(self.bus, op)(uid, name)
+            with self._lock:
+                peers = list(self._peers)
+            for p in peers:
+                p.send(("group", uid, name, op == "join_group"))
+        elif op == "barrier":
+            self.bus.barrier_arrive(*frame[1:])
+        elif op == "heartbeat":
+            self.bus.heartbeat(frame[1])
+        elif op == "call":
+            _, rid, name, args = frame
+            if name == "join":
+                proxy = _RemoteCom(self, peer, args[0])
+                peer.proxies[proxy.node_uid] = proxy
+                self.bus.join(proxy)
+                self._reply_join(peer, rid)
+                return
+            if name == "leave":
+                proxy = peer.proxies.pop(args[0], None)
+                if proxy is not None:
+                    self.bus.leave(proxy)
+                result = None
+            elif name == "claim_token":
+                result = self.bus.claim_token(*args)
+            else:
+                result = None
+            peer.send(("reply", rid, result))
+
+    def _relay(self, msgs, fn: Callable, *args, **kwargs):
+        """ Appelle `fn` (envoi sur le `Bus`) ; les segments partagés de `msgs` sont
+        retenus pendant la livraison : un destinataire qui relâche vite ne peut pas
+        faire supprimer le segment avant qu'il ne soit livré aux suivants, et un
+        segment livré à personne est supprimé tout de suite."""
+        names = [m.payload.name for m in msgs if type(m.payload) is ShmHandle]
+        if not names:
+            fn(*args, **kwargs)
+            return
+        self._shm_add(None, names, 1)
+        try:
+            fn(*args, **kwargs)
+        finally:
+            self._shm_add(None, names, -1)
+
+    def _shm_add(self, peer: _Peer | None, names, delta: int):
+        """ Ajoute `delta` aux références des segments `names` (tenues par `peer`, ou
+        par le serveur lui-même) ; supprime ceux qui n'en ont plus."""
+        dead = []
+        with self._shm_lock:
+            for name in names:
+                if peer is not None:
+                    n = peer.shm.get(name, 0) + delta
+                    if n > 0:
+                        peer.shm[name] = n
+                    else:
+                        peer.shm.pop(name, None)
+                n = self._shm_refs.get(name, 0) + delta
+                if n > 0:
+                    self._shm_refs[name] = n
+                else:
+                    self._shm_refs.pop(name, None)
+                    dead.append(name)
+        for name in dead:
+            unlink(name)
+
+    def _decoded(self, data: bytes) -> Message:
+        """ Décode un message reçu et mémorise ses octets pour ce thread lecteur :
+        le `Bus` livre de façon synchrone, les proxies les retrouvent sans ré-encoder."""
+        msg = self.codec.decode(data)
+        self._tls.last = (msg, data)
+        return msg
+
+    def _encoded(self, msg: Message) -> bytes:
+        """ Octets d'un message à relayer (réutilise ceux du décodage si possible)."""
+        last = getattr(self._tls, "last", None)
+        if last is not None and last[0] is msg:
+            return last[1]
+        return self.codec.encode(msg)
+
+    def _decoded_many(self, datas: list[bytes]) -> list[Message]:
+        """ Comme `_decoded`, pour un lot."""
+        msgs = [self.codec.decode(d) for d in datas]
+        self._tls.last_many = (msgs, datas)
+        return msgs
+
+    def _encoded_many(self, msgs: list[Message]) -> list[bytes]:
+        """ Comme `_encoded`, pour un lot."""
+        last = getattr(self._tls, "last_many", None)
+        if last is not None and last[0] is msgs:
+            return last[1]
+        return [self.codec.encode(m) for m in msgs]
+
+    def _reply_join(self, peer: _Peer, rid: int):
+        """ Répond à un `join`, ou le retient tant que `expected` n'est pas atteint.
+        Pendant la retenue, les vues ne sont pas relayées : à la libération, chaque
+        processus reçoit une seule vue complète, avant ses réponses (démarrage en O(N)).
+        L'id logique se lit ensuite dans la vue, côté client."""
+        with self._lock:
+            self._joined += 1
+            self._held_joins.append((peer, rid))
+            if self.expected is not None and self._joined < self.expected:
+                return
+            held, self._held_joins = self._held_joins, []
+            if self._holding:
+                self._holding = False
+                view = self.bus.view
+                for p in self._peers:
+                    self._send_view(p, view)
+        for p, r in held:
+            p.send(("reply", r, None))
+
+    def _on_view(self, view: View, joined: tuple, left: tuple):
+        """ Listener de vue du `Bus` (sous son verrou) : relaie le delta à chaque processus."""
+        with self._lock:
+            if self._holding:
+                return
+            for p in self._peers:
+                self._send_view(p, view, (joined, left))
+
+    def _send_view(self, peer: _Peer, view: View, delta: tuple | None = None):
+        """ Envoie `delta` si le processus a la vue précédente, sinon la vue complète
+        (à appeler sous `self._lock`, pour garder les époques dans l'ordre)."""
+        if peer.view_epoch is not None and view.epoch <= peer.view_epoch:
+            return
+        if delta is not None and peer.view_epoch == view.epoch - 1:
+            peer.send(("view", view.epoch, *delta))
+        else:
+            peer.send(("view_full", view.epoch, view.members, view.slots, view.next_slot))
+        peer.view_epoch = view.epoch
+
+class RemoteBus:
+    """
+    Implémentation côté processus du contrat de `Bus` (join / leave / broadcast /
+    sendto / barrier_arrive / heartbeat), reliée à un `BusServer` par socket Unix.
+    Les `Com` locaux sont toujours en mode file d'entrée : le thread lecteur ne fait
+    qu'enfiler, il ne bloque jamais sur un callback applicatif.
+    Un payload volumineux (bytes, bytearray, memoryview, ndarray d'au moins
+    `shm_threshold` octets) est copié une fois en mémoire partagée (`ShmPayload`) et
+    seule sa référence voyage ; chaque destinataire le reçoit en lecture seule, sans
+    copie (`memoryview` ou `ndarray`), et le relâche quand il n'y fait plus référence.
+    Pas de contrôle de flux par crédits entre processus (cf. `reserve`).
+    """
+    queued = True
+
+    def __init__(self, address: str, authkey: bytes | None = None, codec: Codec | None = None,
+                 shm_threshold: int | None = SHM_THRESHOLD):
+        """ Se connecte au serveur et démarre le thread lecteur.
+        `shm_threshold` : taille à partir de laquelle un payload passe en mémoire
+        partagée (None = jamais ; le sérialiseur doit accepter `ShmHandle`, cf. pickle)."""
+        self.codec = codec or DEFAULT_CODEC
+        self.shm_threshold = shm_threshold
+        self.scheduler = SCHEDULER
+        self.view = View()
+        self._groups: dict[str, set[str]] = {}
+        self._conn = Client(address, family="AF_UNIX", authkey=authkey)
+        self._send_lock = threading.Lock()
+        self._coms: dict[str, "Com"] = {}
+        self._rid = itertools.count(1)
+        self._replies: dict[int, queue.SimpleQueue] = {}
+        self._closed = False
+        self._lost = False  # plus de lecteur : aucune réponse ne viendra
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    # === Contrat de Bus ===
+    def new_uid(self) -> str:
+        """ UID d'un nouveau `Com`."""
+        return str(uuid.uuid4())
+
+    def join(self, com: "Com") -> int:
+        """ Enregistre `com` auprès du serveur et retourne son id logique."""
+        com._start_dispatcher()
+        self._coms[com.node_uid] = com
+        self._call("join", com.node_uid)
+        return com.id
+
+    def leave(self, com: "Com"):
+        """ Désenregistre `com` (attend l'acquittement du serveur)."""
+        self._call("leave", com.node_uid)
+        self._coms.pop(com.node_uid, None)
+
+    def broadcast(self, msg: Message, exclude_uid: str | None = None):
+        """ Diffuse `msg` via le serveur."""
+        self._send(("broadcast", self._encode(msg), exclude_uid))
+
+    def sendto(self, dest_id: int, msg: Message):
+        """ Envoie `msg` à un id logique via le serveur."""
+        self._send(("sendto", dest_id, self._encode(msg)))
+
+    def broadcast_many(self, msgs: list[Message], exclude_uid: str | None = None):
+        """ Diffuse un lot via le serveur (une seule trame)."""
+        encode = self._encode
+        self._send(("broadcast_many", [encode(m) for m in msgs], exclude_uid))
+
+    def sendto_many(self, dest_id: int, msgs: list[Message]):
+        """ Envoie un lot à un id logique via le serveur (une seule trame)."""
+        encode = self._encode
+        self._send(("sendto_many", dest_id, [encode(m) for m in msgs]))
+
+    def reserve(self, payloads: list, exclude_uid: str | None = None,
+                dest: int | None = None, group: str | None = None):
+        """ Pas de crédits entre processus (retourne toujours None) : une BAL bornée
+        applique sa politique à l'arrivée, sans attendre. `"reject"` et `"drop_oldest"`
+        la bornent ; `"block"` ne la borne pas (le thread lecteur ne bloque jamais, et
+        la file d'entrée du `Com` n'est pas bornée)."""
+        return None
+
+    def join_group(self, uid: str, name: str):
+        """ Cf. `Bus.join_group` (copie locale mise à jour tout de suite)."""
+        self._groups.setdefault(name, set()).add(uid)
+        self._send(("join_group", uid, name))
+
+    def leave_group(self, uid: str, name: str):
+        """ Cf. `Bus.leave_group`."""
+        self._groups.get(name, set()).discard(uid)
+        self._send(("leave_group", uid, name))
+
+    def group_members(self, name: str) -> tuple[str, ...]:
+        """ UID des membres du groupe `name` (copie locale, sans aller-retour)."""
+        return tuple(self._groups.get(name, ()))
+
+    def broadcast_group(self, name: str, msg: Message, exclude_uid: str | None = None):
+        """ Diffuse `msg` aux membres du groupe `name` via le serveur."""
+        self._send(("broadcast_group", name, self._encode(msg), exclude_uid))
+
+    def barrier_arrive(self, uid: str, name: str = GLOBAL_BARRIER, members: list[int] | None = None):
+        """ Signale l'arrivée de `uid` à la barrière `name` (cf. `Bus.barrier_arrive`)."""
+        self._send(("barrier", uid, name, members))
+
+    def heartbeat(self, sender_uid: str):
+        """ Transmet un heartbeat au détecteur du serveur."""
+        self._send(("heartbeat", sender_uid))
+
+    def claim_token(self, name: str = "default", epoch: int = 0) -> bool:
+        """ Cf. `Bus.claim_token` (arbitré par le serveur)."""
+        return self._call("claim_token", name, epoch)
+
+    def defer(self, fn: Callable[[], None]):
+        """ Exécute `fn` plus tard via l'exécuteur partagé."""
+        _EXECUTOR.submit(fn)
+
+    def close(self):
+        """ Ferme la connexion au serveur : le lecteur est réveillé (EOF) et attendu
+        avant la fermeture du descripteur ; les appels en attente reçoivent None."""
+        if self._closed:
+            return
+        self._closed = True
+        _shutdown(self._conn)
+        if self._reader is not threading.current_thread():
+            self._reader.join(CLOSE_TIMEOUT_SEC)
+        with self._send_lock:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+
+    # === Helpers ===
+    def _encode(self, msg: Message) -> bytes:
+        """ Encode `msg` ; un payload volumineux part en mémoire partagée (le message de
+        l'appelant n'est pas modifié : une copie superficielle porte la référence)."""
+        if shareable(msg.payload, self.shm_threshold):
+            handle = export(msg.payload)
+            msg = copy.copy(msg)
+            msg.payload = handle
+        return self.codec.encode(msg)
+
+    def _decode(self, data: bytes) -> Message:
+        """ Décode un message reçu ; une référence de mémoire partagée est projetée."""
+        msg = self.codec.decode(data)
+        if type(msg.payload) is ShmHandle:
+            msg.payload = attach(msg.payload, self._shm_release)
+        return msg
+
+    def _shm_release(self, name: str):
+        """ Plus aucune vue locale du segment `name` : le signale au serveur."""
+        try:
+            self._send(("shm_release", name))
+        except (OSError, ValueError):
+            pass
+
+    def _send(self, frame: tuple):
+        """ Envoie une trame (les envois concurrents sont sérialisés)."""
+        with self._send_lock:
+            self._conn.send(frame)
+
+    def _call(self, name: str, *args):
+        """ Appel bloquant : envoie une requête numérotée et attend la réponse
+        (None si la connexion est perdue ou fermée)."""
+        rid = next(self._rid)
+        box: queue.SimpleQueue = queue.SimpleQueue()
+        self._replies[rid] = box
+        try:
+            if self._lost:
+                return None
+            self._send(("call", rid, name, args))
+            return box.get()
+        except (OSError, ValueError):
+            return None
+        finally:
+            self._replies.pop(rid, None)
+
+    def _read_loop(self):
+        """ Lit les trames du serveur et les remet aux `Com` locaux."""
+        try:
+            while True:
+                frame = self._conn.recv()
+                op = frame[0]
+                if op == "reply":
+                    box = self._replies.get(frame[1])
+                    if box is not None:
+                        box.put(frame[2])
+                    continue
+                if op in ("view", "view_full"):
+                    self._on_view_frame(frame)
+                    continue
+                if op == "group":
+                    _, uid, name, joined = frame
+                    members = self._groups.setdefault(name, set())
+                    if joined:
+                        members.add(uid)
+                    else:
+                        members.discard(uid)
+                    continue
+                com = self._coms.get(frame[1])
+                if com is None:
+                    continue
+                if op == "deliver":
+                    com._post(self._decode(frame[2]))
+                elif op == "deliver_many":
+                    decode = self._decode
+                    com._post_many([decode(d) for d in frame[2]])
+                elif op == "barrier_release":
+                    com._onBarrierRelease(frame[2], frame[3])
+        except (OSError, EOFError):
+            pass
+        except Exception:
+            if not self._closed:
+                raise
+        finally:
+            self._lost = True
+            for box in list(self._replies.values()):
+                box.put(None)  # plus de réponse possible : débloque les appels en attente
+
+    def _on_view_frame(self, frame: tuple):
+        """ Applique une vue reçue (delta ou complète), partagée par les `Com` locaux,
+        et signale les départs à chacun."""
+        old = self.view
+        if frame[0] == "view":
+            _, epoch, joined, left = frame
+            if epoch != old.epoch + 1:
+                return
+            self.view = old.apply(joined, left)
+        else:
+            _, epoch, members, slots, next_slot = frame
+            if epoch <= old.epoch:
+                return
+            self.view = View(epoch, tuple(members), tuple(slots), next_slot)
+            left = tuple(set(old.members).difference(members))
+        if left:
+            for members in self._groups.values():
+                members.difference_update(left)
+            for com in list(self._coms.values()):
+                com._onView(self.view, left)
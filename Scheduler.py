@@ -0,0 +1,145 @@
+from __future__ import annotations
+import heapq, itertools, threading, time
+from typing import Callable
+
+class TimerHandle:
+    """ Échéance programmée ; `cancel()` l'annule (suppression paresseuse du tas)."""
+    __slots__ = ("deadline", "fn", "args", "cancelled")
+
+    def __init__(self, deadline: float, fn: Callable, args: tuple):
+        self.deadline = deadline
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Scheduler:
+    """
+    Minuteur partagé : un seul thread et un tas d'échéances, au lieu d'un thread
+    (ou d'un `threading.Timer`) par délai. Les callbacks s'exécutent dans ce thread
+    et doivent rester courts (un envoi, un `set_result`, ...).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+
+    def now(self) -> float:
+        """ Horloge monotone utilisée pour les échéances."""
+        return time.monotonic()
+
+    def call_later(self, delay: float, fn: Callable, *args) -> TimerHandle:
+        """ Programme `fn(*args)` dans `delay` secondes."""
+        handle = TimerHandle(self.now() + delay, fn, args)
+        with self._cond:
+            heapq.heappush(self._heap, (handle.deadline, next(self._seq), handle))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is handle:
+                self._cond.notify()
+        return handle
+
+    def in_timer(self) -> bool:
+        """ True dans le thread du scheduler (un callback ne doit jamais y attendre)."""
+        return threading.current_thread() is self._thread
+
+    def _run(self):
+        """ Boucle du thread : dort jusqu'à la prochaine échéance, puis l'exécute."""
+        while True:
+            with self._cond:
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    deadline, _, handle = self._heap[0]
+                    if handle.cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    delay = deadline - self.now()
+                    if delay <= 0:
+                        heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(delay)
+            try:
+                handle.fn(*handle.args)
+            except Exception:
+                pass
+
+class SimScheduler:
+    """
+    Scheduler à temps virtuel (simulation à évènements discrets, cf. `SimBus`) : même
+    contrat que `Scheduler` (`now`, `call_later`), sans thread. Les échéances sont
+    exécutées par `run()` / `step()`, dans l'ordre (instant, ordre de programmation) ;
+    l'horloge saute directement à l'échéance suivante. Un callback qui lève est ignoré,
+    comme avec `Scheduler` ; l'exception est gardée dans `errors`.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._now = 0.0
+        self.events = 0  # échéances exécutées
+        self.errors: list[Exception] = []
+
+    def now(self) -> float:
+        """ Instant virtuel courant (secondes depuis le début de la simulation)."""
+        return self._now
+
+    def call_later(self, delay: float, fn: Callable, *args) -> TimerHandle:
+        """ Programme `fn(*args)` à l'instant virtuel now + `delay`."""
+        handle = TimerHandle(self._now + max(0.0, delay), fn, args)
+        heapq.heappush(self._heap, (handle.deadline, next(self._seq), handle))
+        return handle
+
+    def in_timer(self) -> bool:
+        """ Toujours True : la simulation n'a qu'un thread, toute attente la bloquerait."""
+        return True
+
+    def pending(self) -> int:
+        """ Nombre d'échéances programmées (annulées comprises)."""
+        return len(self._heap)
+
+    def next_time(self) -> float | None:
+        """ Instant de la prochaine échéance non annulée (None s'il n'y en a plus)."""
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def step(self) -> bool:
+        """ Exécute la prochaine échéance non annulée ; False s'il n'y en a plus."""
+        heap = self._heap
+        while heap:
+            deadline, _, handle = heapq.heappop(heap)
+            if handle.cancelled:
+                continue
+            self._now = deadline
+            self.events += 1
+            try:
+                handle.fn(*handle.args)
+            except Exception as e:
+                self.errors.append(e)
+            return True
+        return False
+
+    def run(self, until: float | None = None, max_events: int | None = None) -> int:
+        """ Exécute les échéances jusqu'à épuisement, jusqu'à l'instant virtuel `until`
+        (l'horloge y est alors avancée) ou `max_events` ; retourne le nombre exécuté."""
+        heap = self._heap
+        done = 0
+        while heap and (max_events is None or done < max_events):
+            if until is not None and heap[0][0] > until:
+                break
+            if self.step():
+                done += 1
+        if until is not None and self._now < until and (max_events is None or done < max_events):
+            self._now = until
+        return done
+
+# Instance partagée par les bus en temps réel
+SCHEDULER = Scheduler()
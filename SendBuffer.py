@@ -0,0 +1,90 @@
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Com import Com
+
+SEND_BATCH = 64          # messages accumulés avant un envoi immédiat
+SEND_BATCH_DELAY = 0.001 # délai max (s) d'un message dans le tampon
+
+class SendBuffer:
+    """
+    Tampon d'envoi d'un `Com` (`Com.sendBuffer()`), pour producteurs à haut débit.
+    - `broadcast` / `sendTo` ne font qu'ajouter au tampon (pas d'estampille, pas
+      d'appel au bus)
+    - le tampon part dès `max_msgs` messages, ou `max_delay` secondes après le premier
+      message en attente (minuteur du scheduler du bus, qui confie l'envoi à
+      `bus.defer` : une BAL bornée pleine ne bloque jamais le thread des minuteurs),
+      ou sur `flush()`
+    - à l'envoi, les messages consécutifs vers une même cible forment un lot
+      (`Com.broadcastMany` / `Com.sendToMany`) : l'ordre des envois est conservé
+    `max_delay=None` : pas de minuteur, envoi sur taille ou `flush()` seulement.
+    Utilisable comme gestionnaire de contexte (`flush()` à la sortie).
+    """
+
+    def __init__(self, com: "Com", max_msgs: int = SEND_BATCH, max_delay: float | None = SEND_BATCH_DELAY):
+        """ Tampon vide rattaché à `com`."""
+        if max_msgs < 1:
+            raise ValueError(f"max_msgs doit être >= 1: {max_msgs!r}")
+        self.com = com
+        self.max_msgs = max_msgs
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # vidages sérialisés : l'ordre des lots est conservé
+        self._runs: list[tuple[int | None, list]] = []  # (destinataire ou None = tous, payloads)
+        self._size = 0
+        self._timer = None
+
+    def __enter__(self) -> "SendBuffer":
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def broadcast(self, payload: object):
+        """ Diffusion asynchrone différée (cf. `Com.broadcast`)."""
+        self._add(None, payload)
+
+    def sendTo(self, payload: object, dest: int):
+        """ Envoi point-à-point asynchrone différé (cf. `Com.sendTo`)."""
+        self._add(dest, payload)
+
+    def flush(self):
+        """ Envoie tout le contenu du tampon, par lots, dans l'ordre."""
+        with self._flush_lock:
+            with self._lock:
+                runs, self._runs, self._size = self._runs, [], 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            com = self.com
+            for dest, payloads in runs:
+                if dest is None:
+                    com.broadcastMany(payloads)
+                else:
+                    com.sendToMany(payloads, dest)
+
+    # === Helpers ===
+    def _on_timer(self):
+        """ Échéance du minuteur (thread du scheduler) : le vidage, qui peut attendre
+        la place dans une BAL bornée, part hors de ce thread."""
+        self.com.bus.defer(self.flush)
+
+    def _add(self, dest: int | None, payload: object):
+        """ Ajoute au tampon ; vide si `max_msgs` est atteint, sinon arme le minuteur."""
+        with self._lock:
+            runs = self._runs
+            if runs and runs[-1][0] == dest:
+                runs[-1][1].append(payload)
+            else:
+                runs.append((dest, [payload]))
+            self._size += 1
+            full = self._size >= self.max_msgs
+            if not full and self._timer is None and self.max_delay is not None:
+                self._timer = self.com.bus.scheduler.call_later(self.max_delay, self._on_timer)
+        if full:
+            self.flush()
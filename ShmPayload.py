@@ -0,0 +1,75 @@
+from __future__ import annotations
+import mmap, os, tempfile, uuid, weakref
+from dataclasses import dataclass
+from typing import Callable
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    _HAS_NUMPY = False
+
+SHM_THRESHOLD = 256 * 1024  # taille (octets) à partir de laquelle un payload passe en mémoire partagée
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+_PREFIX = "pybus-"
+
+@dataclass(frozen=True)
+class ShmHandle:
+    """
+    Référence vers un payload placé en mémoire partagée (voyage à sa place).
+        name (str): nom du segment (fichier de `SHM_DIR`)
+        nbytes (int): taille du contenu
+        dtype (str|None): dtype NumPy (None : tampon d'octets)
+        shape (tuple|None): forme du tableau NumPy
+    """
+    name: str
+    nbytes: int
+    dtype: str | None = None
+    shape: tuple | None = None
+
+def shareable(payload: object, threshold: int | None = SHM_THRESHOLD) -> bool:
+    """ True si `payload` (bytes, bytearray, memoryview, ndarray) atteint `threshold` octets
+    (None : jamais)."""
+    if threshold is None:
+        return False
+    threshold = max(threshold, 1)  # un segment vide ne se projette pas
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return memoryview(payload).nbytes >= threshold
+    if _HAS_NUMPY and isinstance(payload, np.ndarray):
+        return payload.dtype != object and payload.nbytes >= threshold
+    return False
+
+def export(payload: object) -> ShmHandle:
+    """ Copie `payload` (une seule fois) dans un nouveau segment et retourne sa référence.
+    Le segment vit jusqu'à `unlink` (par le `BusServer`, quand tous l'ont relâché)."""
+    if _HAS_NUMPY and isinstance(payload, np.ndarray):
+        arr = np.ascontiguousarray(payload)
+        buf, dtype, shape = memoryview(arr).cast("B"), arr.dtype.str, arr.shape
+    else:
+        view = memoryview(payload)
+        buf = view.cast("B") if view.c_contiguous else memoryview(view.tobytes())
+        dtype = shape = None
+    name = _PREFIX + uuid.uuid4().hex
+    with open(os.path.join(SHM_DIR, name), "xb") as f:
+        f.write(buf)
+    return ShmHandle(name, buf.nbytes, dtype, shape)
+
+def attach(handle: ShmHandle, on_release: Callable[[str], None]) -> object:
+    """
+    Projette le segment en lecture seule, sans copie : `memoryview` (tampon d'octets) ou
+    `ndarray` (même dtype / forme). Quand la dernière vue du segment disparaît (ramasse-
+    miettes), `on_release(handle.name)` est appelé, depuis un thread quelconque.
+    """
+    with open(os.path.join(SHM_DIR, handle.name), "rb") as f:
+        mm = mmap.mmap(f.fileno(), handle.nbytes, access=mmap.ACCESS_READ)
+    weakref.finalize(mm, on_release, handle.name)
+    if handle.dtype is not None and _HAS_NUMPY:
+        return np.frombuffer(mm, dtype=np.dtype(handle.dtype)).reshape(handle.shape)
+    return memoryview(mm)
+
+def unlink(name: str):
+    """ Supprime le segment `name` (les projections en cours restent valides)."""
+    try:
+        os.unlink(os.path.join(SHM_DIR, name))
+    except FileNotFoundError:
+        pass
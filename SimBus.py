@@ -0,0 +1,296 @@
+from __future__ import annotations
+import random, time, uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from Bus import Bus
+from FailureDetector import FailureDetector
+from Mailbox import settle
+from Message import Message
+from Scheduler import SimScheduler
+from Synchronize import GLOBAL_BARRIER
+
+if TYPE_CHECKING:
+    from Com import Com
+    from Journal import Journal
+
+@dataclass
+class LinkModel:
+    """
+    Comportement d'un lien émetteur -> destinataire dans un `SimBus` (secondes virtuelles).
+    - `latency` + tirage uniforme dans [0, `jitter`) : délai d'acheminement ; le lien
+      reste FIFO (un message n'en double jamais un autre plus ancien)
+    - `loss` : probabilité de perte d'un message (un lot part en une seule trame)
+    - `reorder` : probabilité qu'un message échappe au FIFO, retardé en plus d'un
+      tirage dans [0, `reorder_delay`)
+    """
+    latency: float = 0.001
+    jitter: float = 0.0
+    loss: float = 0.0
+    reorder: float = 0.0
+    reorder_delay: float = 0.005
+
+class SimBus(Bus):
+    """
+    `Bus` simulé à temps virtuel : même contrat que `Bus` (vue, groupes, barrières,
+    détecteur de pannes, crédits), mais chaque envoi devient une échéance du
+    `SimScheduler` (`scheduler`), livrée après le délai de son lien (`LinkModel`).
+    - un seul thread : des milliers de `Com` tournent en quelques secondes, minuteurs
+      (heartbeats, timeouts d'ACK, sauts de jeton, ...) compris, sans attendre
+    - déterministe : latences, pertes, réordonnancements, UID des `Com` (donc leurs
+      ids) et tirages du gossip viennent de `rng` (`random.Random(seed)`) ; un même
+      `seed` rejoue la même exécution (entre interpréteurs : fixer `PYTHONHASHSEED`)
+    - l'émetteur d'un message est son `sender` (son `relay` s'il est relayé), sans
+      émetteur connu le lien par défaut s'applique
+    - `crash(com)` : panne franche silencieuse, détectée par le détecteur de pannes
+    - barrière `"bus"` : le bus joue le coordinateur ; chaque arrivée voyage sur le lien
+      `uid -> None`, chaque libération sur le lien `None -> uid` (comme un message :
+      une perte bloque la barrière, faute de retransmission)
+    La simulation avance par `run()` / `run_for()` / `run_until(future)` : les appels
+    bloquants de `Com` (`requestSC`, `synchronize`, `broadcastSync`, collectives)
+    attendraient indéfiniment ; utiliser leurs variantes `...Async` et `run_until`.
+    Une BAL bornée en `"block"` pleine lève `MailboxFull` à l'envoi au lieu d'attendre.
+    """
+
+    def __init__(self, seed: int = 0, link: LinkModel | None = None,
+                 detector: FailureDetector | None = None, journal: "Journal | None" = None):
+        """ Bus vide à l'instant virtuel 0 ; `link` : modèle par défaut des liens.
+        `journal` : envois journalisés à leur émission (instants virtuels), pertes comprises."""
+        super().__init__(queued=False, detector=detector, journal=journal)
+        self.scheduler = SimScheduler()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.link = link or LinkModel()
+        self._links: dict[tuple[str | None, str], LinkModel] = {}
+        self._fifo: dict[tuple[str | None, str], float] = {}  # dernière arrivée par lien (jitter)
+        self._crashed: set[str] = set()
+        self.delivered = 0  # messages (ou lots) livrés
+        self.lost = 0       # perdus : modèle de lien, panne ou destinataire parti
+
+    def new_uid(self) -> str:
+        """ UID d'un nouveau `Com`, tiré de `rng` (ids reproductibles)."""
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def set_link(self, src_uid: str | None, dst_uid: str | None, model: LinkModel | None):
+        """ Modèle du lien `src_uid` -> `dst_uid` (None : revient au modèle par défaut).
+        Un UID None désigne le bus lui-même (coordinateur de la barrière `"bus"`)."""
+        if model is None:
+            self._links.pop((src_uid, dst_uid), None)
+        else:
+            self._links[(src_uid, dst_uid)] = model
+
+    def crash(self, com: "Com"):
+        """ Panne franche de `com` : il ne reçoit plus rien, ses envois sont perdus et
+        ses heartbeats cessent ; le détecteur le retirera de la vue."""
+        self._crashed.add(com.node_uid)
+        com._closed = True
+        if com._hb_timer is not None:
+            com._hb_timer.cancel()
+
+    # === Exécution ===
+    def run(self, until: float | None = None, max_events: int | None = None) -> int:
+        """ Exécute les échéances (cf. `SimScheduler.run`) ; retourne leur nombre."""
+        return self.scheduler.run(until, max_events)
+
+    def run_for(self, duration: float) -> int:
+        """ Avance la simulation de `duration` secondes virtuelles."""
+        return self.scheduler.run(until=self.scheduler.now() + duration)
+
+    def run_until(self, fut: Future, timeout: float | None = None) -> object:
+        """ Avance jusqu'à ce que `fut` soit terminée et retourne son résultat.
+        `TimeoutError` si elle ne l'est pas après `timeout` secondes virtuelles, ou si
+        plus rien n'est programmé."""
+        sched = self.scheduler
+        deadline = None if timeout is None else sched.now() + timeout
+        while not fut.done():
+            at = sched.next_time()
+            if at is None or (deadline is not None and at > deadline):
+                raise TimeoutError(f"non terminée à t={sched.now():.6f}s (virtuel)")
+            sched.step()
+        return fut.result()
+
+    # === Contrat de Bus (envois) ===
+    def broadcast(self, msg: Message, exclude_uid: str | None = None):
+        """ Une échéance par destinataire, au délai de son lien."""
+        if self.journal is not None:
+            self.journal.broadcast(msg, self.scheduler.now())
+        src = exclude_uid if exclude_uid is not None else self._src(msg)
+        for uid in list(self._subscribers):
+            if uid != exclude_uid:
+                self._transmit(src, uid, msg, False)
+        settle((msg,), self._subscribers)
+
+    def sendto(self, dest_id: int, msg: Message):
+        if self.journal is not None:
+            self.journal.sendto(dest_id, msg, self.scheduler.now())
+        uid = self.view.uid(dest_id)
+        if uid is not None and uid in self._subscribers:
+            settle((msg,), (uid,))
+            self._transmit(self._src(msg), uid, msg, False)
+        else:
+            settle((msg,))
+
+    def broadcast_many(self, msgs: list[Message], exclude_uid: str | None = None):
+        if self.journal is not None:
+            self.journal.broadcast_many(msgs, self.scheduler.now())
+        src = exclude_uid if exclude_uid is not None else self._src(msgs[0])
+        for uid in list(self._subscribers):
+            if uid != exclude_uid:
+                self._transmit(src, uid, msgs, True)
+        settle(msgs, self._subscribers)
+
+    def sendto_many(self, dest_id: int, msgs: list[Message]):
+        if self.journal is not None:
+            self.journal.sendto_many(dest_id, msgs, self.scheduler.now())
+        uid = self.view.uid(dest_id)
+        if uid is not None and uid in self._subscribers:
+            settle(msgs, (uid,))
+            self._transmit(self._src(msgs[0]), uid, msgs, True)
+        else:
+            settle(msgs)
+
+    def broadcast_group(self, name: str, msg: Message, exclude_uid: str | None = None):
+        if self.journal is not None:
+            self.journal.broadcast_group(msg, self.scheduler.now())
+        src = exclude_uid if exclude_uid is not None else self._src(msg)
+        members = self._groups.get(name, {})
+        for uid in list(members):
+            if uid != exclude_uid:
+                self._transmit(src, uid, msg, False)
+        settle((msg,), members)
+
+    def barrier_arrive(self, uid: str, name: str = GLOBAL_BARRIER, members: list[int] | None = None):
+        """ L'arrivée atteint le coordinateur (le bus) après le délai du lien `uid -> None`."""
+        delay = self._delay(uid, None)
+        if delay is None:
+            self.lost += 1
+            return
+        self.scheduler.call_later(delay, self._barrier_arrived, uid, name, members)
+
+    def defer(self, fn: Callable[[], None]):
+        """ Exécute `fn` à l'instant virtuel courant, après l'évènement en cours."""
+        self.scheduler.call_later(0.0, fn)
+
+    # === Helpers ===
+    def _src(self, msg: Message) -> str | None:
+        """ UID de l'émetteur physique de `msg` (None s'il est inconnu)."""
+        sender = getattr(msg, "relay", msg.sender)
+        return None if sender is None else self.view.uid(sender)
+
+    def _transmit(self, src: str | None, dst: str, msg, many: bool):
+        """ Applique le modèle du lien src -> dst et programme l'arrivée."""
+        delay = self._delay(src, dst)
+        if delay is None:
+            self._lose(dst, msg, many)
+            return
+        self.scheduler.call_later(delay, self._arrive, dst, msg, many)
+
+    def _delay(self, src: str | None, dst: str | None) -> float | None:
+        """ Délai du lien src -> dst pour un envoi à l'instant courant (None : perdu)."""
+        if src in self._crashed:
+            return None
+        link = self._links.get((src, dst), self.link) if self._links else self.link
+        rng = self.rng
+        if link.loss and rng.random() < link.loss:
+            return None
+        delay = link.latency
+        if link.jitter:
+            delay += rng.random() * link.jitter
+        if link.reorder and rng.random() < link.reorder:
+            delay += rng.random() * link.reorder_delay
+        elif link.jitter:
+            # FIFO : pas d'arrivée avant la précédente sur ce lien
+            now = self.scheduler.now()
+            key = (src, dst)
+            at = max(now + delay, self._fifo.get(key, 0.0))
+            self._fifo[key] = at
+            delay = at - now
+        return delay
+
+    def _arrive(self, dst: str, msg, many: bool):
+        """ Échéance d'arrivée : livre au `Com` s'il est toujours là."""
+        c = self._subscribers.get(dst)
+        if c is None or dst in self._crashed:
+            self._lose(dst, msg, many)
+            return
+        self.delivered += 1
+        if many:
+            c._post_many(msg)
+        else:
+            c._post(msg)
+
+    def _barrier_arrived(self, uid: str, name: str, members: list[int] | None):
+        """ Échéance : l'arrivée de `uid` atteint le coordinateur de la barrière."""
+        if uid in self._subscribers and uid not in self._crashed:
+            self.delivered += 1
+            Bus.barrier_arrive(self, uid, name, members)
+
+    def _release_barrier(self, uid: str, name: str, gen: int):
+        """ La libération part vers `uid` sur le lien `None -> uid`."""
+        delay = self._delay(None, uid)
+        if delay is None:
+            self.lost += 1
+            return
+        self.scheduler.call_later(delay, self._barrier_released, uid, name, gen)
+
+    def _barrier_released(self, uid: str, name: str, gen: int):
+        """ Échéance : la libération arrive chez `uid`, s'il est toujours là."""
+        if uid not in self._subscribers or uid in self._crashed:
+            self.lost += 1
+            return
+        self.delivered += 1
+        Bus._release_barrier(self, uid, name, gen)
+
+    def _lose(self, dst: str, msg, many: bool):
+        """ Message (ou lot) perdu pour `dst` : compté, et sa réservation soldée."""
+        self.lost += 1
+        settle(msg if many else (msg,), lost=dst)
+
+def main():
+    """ Démo : N `Com` simulés (anneau de SC par défaut) ; diffusion, barrière, tour
+    de SC et diffusion 'sync', avec temps virtuel et temps réel de chaque phase."""
+    import argparse
+    from Com import Com
+    parser = argparse.ArgumentParser(description="Simulation à temps virtuel")
+    parser.add_argument("-n", type=int, default=1000, help="nombre de Com")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.001, help="latence des liens (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilité de perte")
+    parser.add_argument("--sc-mode", default="ring", help="moteur de SC (ring, suzuki)")
+    parser.add_argument("--barrier-mode", default="bus", help="barrière (bus, dissemination)")
+    args = parser.parse_args()
+    bus = SimBus(args.seed, LinkModel(args.latency, args.jitter, args.loss))
+    coms = sorted((Com(bus, sc_mode=args.sc_mode, barrier_mode=args.barrier_mode,
+                       ack_timeout=0.1, ack_retries=5) for _ in range(args.n)), key=lambda c: c.id)
+
+    def phase(name: str, futs: list[Future]):
+        t0, v0 = time.perf_counter(), bus.scheduler.now()
+        try:
+            for fut in futs:
+                bus.run_until(fut, timeout=60)
+        except TimeoutError as e:
+            print(f"[SIM] {name:<14} {e}")
+            return
+        print(f"[SIM] {name:<14} virtuel {1000 * (bus.scheduler.now() - v0):9.3f} ms"
+              f"  réel {1000 * (time.perf_counter() - t0):8.1f} ms")
+
+    phase("broadcastSync", [coms[0].broadcastSyncAsync("hello")])
+    phase("synchronize", [c.synchronizeAsync() for c in coms])
+    # tour de SC : chaque Com demande, entre puis sort aussitôt
+    done: Future = Future()
+    left = [len(coms)]
+    def entered(_, com):
+        bus.defer(com.releaseSC)
+        left[0] -= 1
+        if not left[0]:
+            done.set_result(None)
+    for c in coms:
+        c.requestSCAsync().add_done_callback(lambda f, c=c: entered(f, c))
+    phase("SC (tous)", [done])
+    print(f"[SIM] n={args.n} seed={args.seed} : {bus.scheduler.events} évènements, "
+          f"{bus.delivered} livrés, {bus.lost} perdus")
+
+if __name__ == "__main__":
+    main()
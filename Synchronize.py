@@ -1,9 +1,17 @@
 from Message import Message, MsgKind
 
+GLOBAL_BARRIER = "global"  # nom de la barrière globale (tous les processus)
+
 class BarrierMessage(Message):
     """
-    Message système minimal pour une barrière (non indispensable ici car la
-    barrière est gérée par le Bus). Conservé pour clarté/extension éventuelle.
+    Message système de barrière, utilisé par la barrière à dissémination
+    (`Com(..., barrier_mode="dissemination")`) : au tour `round` de la génération
+    `generation` de la barrière `name`, chaque participant en notifie un autre.
+    Avec la barrière gérée par le Bus, il n'est pas utilisé.
     """
-    def __init__(self, sender):
-        super().__init__(MsgKind.BARRIER, payload=None, lamport=0, sender=sender)
\ No newline at end of file
+    __slots__ = ("name", "generation", "round")
+    def __init__(self, sender, name: str = GLOBAL_BARRIER, generation: int = 0, round: int = 0):
+        super().__init__(MsgKind.BARRIER, payload=None, lamport=0, sender=sender)
+        self.name = name
+        self.generation = generation
+        self.round = round
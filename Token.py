@@ -1,14 +1,98 @@
 from dataclasses import dataclass
 from Message import Message, MsgKind
 
+DEFAULT_RESOURCE = "default"  # ressource de `requestSC()` sans argument
+
 @dataclass
 class Token(Message):
     """
     Message système représentant le jeton de section critique.
     Le champ `holder` indique le 'propriétaire' prévu (id logique).
+    `seq` est le numéro de génération du jeton : il augmente à chaque régénération,
+    et un jeton de génération plus ancienne est détruit à la réception.
+    `resource` nomme la ressource protégée : un jeton indépendant par ressource.
     """
+    __slots__ = ("holder", "seq", "resource")
     holder: int
+    seq: int
+    resource: str
 
-    def __init__(self, holder: int):
+    def __init__(self, holder: int, seq: int = 0, resource: str = DEFAULT_RESOURCE):
         super().__init__(MsgKind.TOKEN, payload=None, lamport=0, sender=None)
-        self.holder = holder
\ No newline at end of file
+        self.holder = holder
+        self.seq = seq
+        self.resource = resource
+
+@dataclass
+class SKToken(Token):
+    """
+    Jeton de Suzuki–Kasami.
+    `ln[j]` est le numéro de la dernière requête de j servie, `queue` la file
+    des demandeurs en attente du jeton (j : UID).
+    """
+    __slots__ = ("ln", "queue")
+    ln: dict
+    queue: list
+
+    def __init__(self, holder: int, seq: int = 0, resource: str = DEFAULT_RESOURCE):
+        super().__init__(holder, seq, resource)
+        self.ln = {}
+        self.queue = []
+
+@dataclass
+class PermitToken(Token):
+    """
+    Jeton à permis (moteur `"shared"`) : il circule sur l'anneau en portant `free`
+    permis libres sur `permits`. Un détenteur partagé en prend un, un détenteur
+    exclusif les prend tous ; ils sont rendus au passage suivant du jeton.
+    `reserved` : UID d'un demandeur exclusif en attente, qui bloque les nouvelles
+    prises de permis jusqu'à son entrée (pas de famine des rédacteurs).
+    """
+    __slots__ = ("permits", "free", "reserved")
+    permits: int
+    free: int
+    reserved: str | None
+
+    def __init__(self, holder: int, permits: int, seq: int = 0,
+                 resource: str = DEFAULT_RESOURCE, free: int | None = None):
+        super().__init__(holder, seq, resource)
+        self.permits = permits
+        self.free = permits if free is None else free
+        self.reserved = None
+
+@dataclass
+class SCRequestMessage(Message):
+    """
+    Requête d'entrée en SC (Suzuki–Kasami), diffusée à tous.
+    `seq` est le numéro de requête de l'émetteur pour la ressource `resource`,
+    `uid` son UID (stable, contrairement à l'id logique `sender`).
+    """
+    __slots__ = ("seq", "resource", "uid")
+    seq: int
+    resource: str
+    uid: str | None
+
+    def __init__(self, seq: int, sender: int, resource: str = DEFAULT_RESOURCE,
+                 uid: str | None = None):
+        super().__init__(MsgKind.SC_REQUEST, payload=None, lamport=0, sender=sender)
+        self.seq = seq
+        self.resource = resource
+        self.uid = uid
+
+@dataclass
+class CensusMessage(Message):
+    """
+    Recensement du jeton (régénération après perte), pour la génération `seq`.
+    Sans payload : sonde diffusée par le coordinateur. Avec payload : réponse d'un
+    processus (son UID, s'il détient le jeton, et l'état propre au moteur de SC).
+    Un recensement ne concerne que le jeton de la ressource `resource`.
+    """
+    __slots__ = ("seq", "resource")
+    seq: int
+    resource: str
+
+    def __init__(self, seq: int, sender: int, payload: dict | None = None,
+                 resource: str = DEFAULT_RESOURCE):
+        super().__init__(MsgKind.TOKEN_CENSUS, payload=payload, lamport=0, sender=sender)
+        self.seq = seq
+        self.resource = resource
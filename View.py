@@ -0,0 +1,61 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Iterable
+
+class View:
+    """
+    Vue de membres immuable, numérotée par époque.
+    `members` est le tuple trié des UID ; l'id logique d'un membre est son rang.
+    `slots[i]` est le numéro stable de `members[i]`, attribué à l'arrivée et jamais
+    réutilisé (index des horloges vectorielles, insensible aux renumérotations).
+    Une vue est partagée telle quelle par tous les `Com` d'un même processus :
+    un changement de membres coûte une nouvelle vue, pas une table par abonné.
+    """
+    __slots__ = ("epoch", "members", "slots", "next_slot")
+
+    def __init__(self, epoch: int = 0, members: tuple[str, ...] = (),
+                 slots: tuple[int, ...] = (), next_slot: int = 0):
+        self.epoch = epoch
+        self.members = members
+        self.slots = slots
+        self.next_slot = next_slot
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, uid: str) -> bool:
+        return self.index(uid) >= 0
+
+    def __repr__(self) -> str:
+        return f"View(epoch={self.epoch}, size={len(self.members)})"
+
+    def index(self, uid: str) -> int:
+        """ Id logique de `uid` (recherche dichotomique), -1 s'il n'est pas membre."""
+        i = bisect_left(self.members, uid)
+        if i < len(self.members) and self.members[i] == uid:
+            return i
+        return -1
+
+    def uid(self, node_id: int) -> str | None:
+        """ UID du membre d'id logique `node_id`, None hors vue."""
+        if 0 <= node_id < len(self.members):
+            return self.members[node_id]
+        return None
+
+    def slot(self, uid: str) -> int:
+        """ Numéro stable de `uid`, -1 s'il n'est pas membre."""
+        i = self.index(uid)
+        return self.slots[i] if i >= 0 else -1
+
+    def apply(self, joined: Iterable[str] = (), left: Iterable[str] = ()) -> "View":
+        """ Nouvelle vue (époque + 1) après des arrivées / départs.
+        Coût linéaire : les membres restants et les arrivants forment deux suites
+        triées, que `sorted` fusionne sans re-trier. Les arrivants reçoivent les
+        numéros stables suivants, dans l'ordre de leurs UID (déterministe : un
+        processus qui applique le même delta obtient la même vue)."""
+        gone = set(left)
+        kept = [(m, s) for m, s in zip(self.members, self.slots) if m not in gone]
+        new = sorted(u for u in set(joined) if u not in gone and self.index(u) < 0)
+        pairs = sorted(kept + [(u, self.next_slot + k) for k, u in enumerate(new)]) if new else kept
+        return View(self.epoch + 1, tuple(p[0] for p in pairs), tuple(p[1] for p in pairs),
+                    self.next_slot + len(new))
@@ -0,0 +1,4 @@
+import os, sys
+
+# modules à plat à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
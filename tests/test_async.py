@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import Mutex
+from AsyncCom import AsyncCom
+from Bus import Bus
+from Com import Com
+
+
+@pytest.mark.parametrize("mode", ["ring", "suzuki", "shared"])
+def test_cancelled_critical_section_is_released(mode, monkeypatch):
+    monkeypatch.setattr(Mutex, "TOKEN_TIMEOUT_SEC", 30.0)
+    bus = Bus()
+    a, b = Com(bus, sc_mode=mode), Com(bus, sc_mode=mode)
+    entered = []
+
+    async def contender(acom):
+        async with acom.critical_section():
+            entered.append(True)
+
+    async def main():
+        acom = AsyncCom(b)
+        a.requestSC()
+        task = asyncio.ensure_future(contender(acom))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        a.releaseSC()  # la demande annulée de b aboutit ici
+        # b doit rendre la SC de lui-même : a y rentre
+        await asyncio.wait_for(asyncio.wrap_future(a.requestSCAsync()), 2)
+        a.releaseSC()
+        acom.close()
+
+    try:
+        asyncio.run(main())
+        assert entered == []
+    finally:
+        a.close()
+        b.close()
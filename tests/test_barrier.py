@@ -0,0 +1,65 @@
+import pytest
+
+from Com import Com
+from SimBus import LinkModel, SimBus
+
+MODES = ["bus", "dissemination"]
+
+
+def _coms(bus, n, mode):
+    return sorted((Com(bus, barrier_mode=mode) for _ in range(n)), key=lambda c: c.id)
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8])
+def test_released_only_when_all_arrive(mode, n):
+    bus = SimBus(seed=n, link=LinkModel(latency=0.01, jitter=0.01))
+    coms = _coms(bus, n, mode)
+    gens = []
+    for _ in range(3):
+        futs = [c.synchronizeAsync() for c in coms[:-1]]
+        bus.run_for(0.5)
+        assert n == 1 or not any(f.done() for f in futs)
+        futs.append(coms[-1].synchronizeAsync())
+        for f in futs:
+            bus.run_until(f, timeout=5)
+        results = {f.result() for f in futs}
+        assert len(results) == 1  # même génération chez tous
+        gens.append(results.pop())
+    assert gens == sorted(set(gens))  # générations successives, distinctes
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_fast_member_starts_next_generation_early(mode):
+    bus = SimBus(seed=0, link=LinkModel(latency=0.01))
+    coms = _coms(bus, 4, mode)
+    slow = coms[3]
+    for other in [None] + [c.node_uid for c in coms[:3]]:  # None : le bus (barrière centrale)
+        bus.set_link(other, slow.node_uid, LinkModel(latency=0.3))
+        bus.set_link(slow.node_uid, other, LinkModel(latency=0.3))
+    first = [c.synchronizeAsync() for c in coms]
+    for f in first[:3]:
+        bus.run_until(f, timeout=5)
+    second = [c.synchronizeAsync() for c in coms[:3]]  # le lent n'a pas fini la première
+    bus.run_until(first[3], timeout=5)
+    bus.run_for(0.5)
+    assert not any(f.done() for f in second)
+    second.append(slow.synchronizeAsync())
+    for f in second:
+        bus.run_until(f, timeout=5)
+    assert len({f.result() for f in first}) == 1 and len({f.result() for f in second}) == 1
+    assert second[0].result() != first[0].result()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_named_barriers_are_independent(mode):
+    bus = SimBus(seed=0)
+    coms = _coms(bus, 4, mode)
+    sub = [c.synchronizeAsync("pair", members=[0, 1]) for c in coms[:2]]
+    glob = [c.synchronizeAsync() for c in coms[:3]]
+    for f in sub:
+        bus.run_until(f, timeout=5)
+    assert not any(f.done() for f in glob)
+    glob.append(coms[3].synchronizeAsync())
+    for f in glob:
+        bus.run_until(f, timeout=5)
@@ -0,0 +1,133 @@
+import uuid
+
+import pytest
+
+from Codec import Codec, DEFAULT_CODEC, JsonSerializer
+from Message import AckMessage, AckRangeMessage, Message, MsgKind
+from BroadcastMessage import BroadcastMessage
+from MessageTo import MessageTo
+from GroupMessage import GroupMessage
+from Synchronize import BarrierMessage
+from Token import Token, SKToken, PermitToken, SCRequestMessage, CensusMessage
+from Ordering import OrderedMessage, ClockMessage, CausalMessage
+from Fanout import TreeMessage, GossipMessage
+from Collectives import CollectiveMessage
+
+UID = str(uuid.UUID(int=7, version=4))
+
+
+def _fields(msg) -> dict:
+    """ Champs posés d'un message (tous ses `__slots__`, hors `credit`)."""
+    out = {}
+    for klass in type(msg).__mro__:
+        for name in getattr(klass, "__slots__", ()):
+            if name != "credit" and hasattr(msg, name):
+                out[name] = getattr(msg, name)
+    return out
+
+
+def _sync(msg, ack_seq=5):
+    msg.ack_seq = ack_seq
+    return msg
+
+
+def _sk():
+    t = SKToken(holder=1, seq=3, resource="db")
+    t.ln[2] = 4
+    t.queue.append(2)
+    return t
+
+
+def _permit():
+    t = PermitToken(holder=0, permits=3, free=1)
+    t.reserved = UID
+    return t
+
+
+# un échantillon par classe enregistrée
+SAMPLES = {
+    "message": lambda: Message(MsgKind.HEARTBEAT, payload=None, lamport=0, sender=2),
+    "broadcast": lambda: BroadcastMessage({"k": [1, 2]}, lamport=9, sender=0),
+    "broadcast_sync": lambda: _sync(BroadcastMessage("x", lamport=3, sender=1)),
+    "message_to": lambda: _sync(MessageTo(b"raw", lamport=4, sender=1, dest=3)),
+    "ack": lambda: AckMessage(seq=7, sender=1, uid=UID),
+    "ack_no_uid": lambda: AckMessage(seq=7, sender=1),
+    "ack_range": lambda: AckRangeMessage(seq=3, upto=9, sender=2, uid=UID),
+    "token": lambda: Token(holder=2, seq=4),
+    "token_resource": lambda: Token(holder=2, resource="db"),
+    "sk_token": _sk,
+    "permit_token": _permit,
+    "sc_request": lambda: SCRequestMessage(seq=4, sender=1, resource="db", uid=UID),
+    "census": lambda: CensusMessage(seq=2, sender=0, payload={"held": False}),
+    "barrier": lambda: BarrierMessage(1, name="phase", generation=2, round=1),
+    "ordered": lambda: OrderedMessage("o", lamport=6, sender=1, origin=UID),
+    "clock": lambda: ClockMessage(lamport=6, sender=1, origin=UID),
+    "causal": lambda: CausalMessage("c", lamport=2, sender=1, seq=3, deps=b"\x01\x02"),
+    "group": lambda: GroupMessage("g", lamport=1, sender=0, group="workers"),
+    "tree": lambda: TreeMessage("t", lamport=1, sender=0, origin=UID, relay=2, k=2, epoch=3),
+    "gossip": lambda: GossipMessage("p", lamport=1, sender=0, origin=UID, ttl=4),
+    "collective": lambda: CollectiveMessage([1.0, 2.0], sender=1, seq=5, step=2),
+}
+
+
+def test_every_registered_class_is_sampled():
+    classes = {type(make()) for make in SAMPLES.values()}
+    assert classes == set(DEFAULT_CODEC._by_cls)
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+def test_round_trip(name):
+    msg = SAMPLES[name]()
+    back = DEFAULT_CODEC.decode(DEFAULT_CODEC.encode(msg))
+    assert type(back) is type(msg)
+    assert _fields(back) == _fields(msg)
+
+
+def test_extras_go_through_pickle_flag():
+    data = DEFAULT_CODEC.encode(_sk())
+    flags = Codec.HEADER.unpack_from(data)[2]
+    assert flags & Codec._FLAG_EXTRA
+    assert not DEFAULT_CODEC.encode(Token(holder=1))[2] & Codec._FLAG_EXTRA
+
+
+def test_credit_is_never_encoded():
+    msg = BroadcastMessage("x", lamport=1, sender=0)
+    msg.credit = object()  # non picklable : ferait échouer l'encodage
+    back = DEFAULT_CODEC.decode(DEFAULT_CODEC.encode(msg))
+    assert not hasattr(back, "credit")
+
+
+class Unregistered(Message):
+    __slots__ = ("note",)
+
+    def __init__(self, note):
+        super().__init__(MsgKind.USER, payload=None, lamport=1, sender=0)
+        self.note = note
+
+
+@pytest.mark.parametrize("msg", [Unregistered("n"), AckMessage(seq=1, sender=0, uid="b"),
+                                 Token(holder=0, resource="r" * 300)],
+                         ids=["unregistered", "non_uuid_uid", "long_resource"])
+def test_pickle_fallback(msg):
+    data = DEFAULT_CODEC.encode(msg)
+    assert Codec.HEADER.unpack_from(data)[2] & Codec._FLAG_OBJECT
+    assert _fields(DEFAULT_CODEC.decode(data)) == _fields(msg)
+
+
+@pytest.mark.parametrize("name, size", [("ack_no_uid", 43), ("token", 43), ("message", 43),
+                                        ("ack", 43 + 16), ("ack_range", 43 + 16 + 8),
+                                        ("token_resource", 43 + 1 + 2)])
+def test_header_only_sizes(name, size):
+    data = DEFAULT_CODEC.encode(SAMPLES[name]())
+    assert Codec.HEADER.size == 43
+    assert len(data) == size
+    assert not Codec.HEADER.unpack_from(data)[2] & (Codec._FLAG_EXTRA | Codec._FLAG_OBJECT)
+
+
+def test_raw_bytes_and_json_serializer():
+    raw = MessageTo(b"\x00\xff", lamport=1, sender=0, dest=1)
+    data = DEFAULT_CODEC.encode(raw)
+    assert len(data) == 43 + 2 and DEFAULT_CODEC.decode(data).payload == b"\x00\xff"
+    codec = Codec(JsonSerializer())
+    msg = BroadcastMessage({"a": [1, 2]}, lamport=2, sender=1)
+    assert codec.decode(codec.encode(msg)).payload == {"a": [1, 2]}
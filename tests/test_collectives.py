@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from Bus import Bus
+from Com import Com
+
+CASES = [(n, root) for n in (1, 2, 3, 5, 7, 8) for root in range(n)]
+
+
+def _run(coms, fn):
+    """ `fn(com)` dans un thread par membre ; résultats indexés par id."""
+    with ThreadPoolExecutor(len(coms)) as pool:
+        futs = [pool.submit(fn, c) for c in coms]
+        return [f.result(timeout=10) for f in futs]
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "queued"])
+def world(request):
+    coms = []
+
+    def make(n):
+        bus = Bus(queued=request.param)
+        coms.extend(Com(bus, heartbeat_sec=None) for _ in range(n))
+        return sorted(coms, key=lambda c: c.id)
+    yield make
+    for c in coms:
+        c.close()
+
+
+@pytest.mark.parametrize("n, root", CASES)
+def test_rooted_collectives(world, n, root):
+    coms = world(n)
+
+    def run(c):
+        got = {"bcast": c.bcast(("v", c.id), root=root, timeout=5),
+               "reduce": c.reduce(c.id + 1, root=root, timeout=5),
+               "gather": c.gather(c.id * 10, root=root, timeout=5)}
+        values = [f"s{i}" for i in range(n)] if c.id == root else None
+        got["scatter"] = c.scatter(values, root=root, timeout=5)
+        return got
+
+    results = _run(coms, run)
+    for i, got in enumerate(results):
+        assert got["bcast"] == ("v", root)
+        assert got["reduce"] == (n * (n + 1) // 2 if i == root else None)
+        assert got["gather"] == ([10 * k for k in range(n)] if i == root else None)
+        assert got["scatter"] == f"s{i}"
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 7, 8])
+@pytest.mark.parametrize("schedule", ["tree", "doubling"])
+def test_allreduce(world, n, schedule):
+    coms = world(n)
+
+    def run(c):
+        return (c.allreduce([c.id, 1], timeout=5, schedule=schedule),
+                c.allreduce(c.id, op="max", timeout=5, schedule=schedule))
+
+    for vec, top in _run(coms, run):
+        assert vec == [n * (n - 1) // 2, n]
+        assert top == n - 1
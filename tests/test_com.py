@@ -0,0 +1,34 @@
+import pytest
+
+from Bus import Bus
+from Com import Com
+from BroadcastMessage import BroadcastMessage
+from Message import AckMessage, AckRangeMessage
+
+
+class OrderedUidBus(Bus):
+    """ Bus dont les UID sont fournis par le test (pour forcer une renumérotation)."""
+
+    def __init__(self, uids, **kwargs):
+        super().__init__(**kwargs)
+        self._uids = iter(uids)
+
+    def new_uid(self) -> str:
+        return next(self._uids)
+
+
+@pytest.mark.parametrize("ack_cls", [AckMessage, AckRangeMessage])
+def test_ack_credits_sender_after_renumbering(ack_cls):
+    bus = OrderedUidBus(["b", "d", "c"])
+    a, x = Com(bus), Com(bus)
+    fut = a._track_acks(BroadcastMessage("m", 0, a.id), {"d"}, None, 0)
+    seq = max(a._pending_acks)
+    ack = (AckMessage(seq, x.id, x.node_uid) if ack_cls is AckMessage
+           else AckRangeMessage(seq, seq, x.id, x.node_uid))
+    # une arrivée renumérote x (id 1 -> 2) avant le traitement de son ACK
+    y = Com(bus)
+    assert (x.id, y.id) == (2, 1)
+    a._deliver(ack)
+    assert fut.done() and fut.result() is None
+    for c in (a, x, y):
+        c.close()
@@ -0,0 +1,194 @@
+import threading, time
+
+import pytest
+
+from Bus import Bus
+from Com import Com
+from Mailbox import Mailbox, MailboxFull
+from Message import Message, MsgKind
+from SimBus import LinkModel, SimBus
+
+
+class OrderedUidBus(Bus):
+    """ Bus dont les UID sont fournis par le test (pour forcer une renumérotation)."""
+
+    def __init__(self, uids, **kwargs):
+        super().__init__(**kwargs)
+        self._uids = iter(uids)
+
+    def new_uid(self) -> str:
+        return next(self._uids)
+
+
+class Shifty:
+    """ Payload dont la taille change à chaque lecture (le dépôt ne doit pas la relire)."""
+
+    def __init__(self):
+        self.reads = 0
+
+    @property
+    def nbytes(self):
+        self.reads += 1
+        return 100 * self.reads
+
+
+def _msg(i):
+    return Message(MsgKind.USER, i, 0, 0)
+
+
+def _balanced(mb: Mailbox):
+    return (mb._reserved, mb._reserved_bytes) == (0, 0)
+
+
+def _drain(com):
+    while com.receive(block=False) is not None:
+        pass
+
+
+@pytest.mark.parametrize("queued", [False, True])
+@pytest.mark.parametrize("fanout", ["direct", "tree", "gossip"])
+def test_credits_return_to_zero(queued, fanout):
+    bus = Bus(queued=queued)
+    coms = [Com(bus, mailbox_capacity=64, mailbox_bytes=1 << 20, fanout=fanout)
+            for _ in range(5)]
+    try:
+        a = coms[0]
+        for c in coms[1:3]:
+            c.joinGroup("g")
+        for i in range(10):
+            a.broadcast(i)
+            a.sendTo(i, 1)
+            a.broadcastGroup("g", i)
+            a.broadcastCausal(i)
+        a.broadcastMany(range(10))
+        a.sendToMany(range(10), 2)
+        a.broadcastSyncAsync("s").result(timeout=5)
+        a.sendToSyncAsync("s", 3).result(timeout=5)  # en file : tout le reste est délivré
+        for c in coms[1:]:
+            _drain(c)
+            assert _balanced(c.mailbox)
+            assert (len(c.mailbox), c.mailbox.nbytes) == (0, 0)
+    finally:
+        for c in coms:
+            c.close()
+
+
+def test_deposit_uses_reserved_size():
+    bus = Bus()
+    a, b = Com(bus), Com(bus, mailbox_bytes=1 << 20)
+    payload = Shifty()
+    a.sendTo(payload, b.id)
+    assert b.mailbox.nbytes == 100 + 64  # taille lue une seule fois, à la réservation
+    assert b.receive(block=False).payload is payload
+    assert b.mailbox.nbytes == 0 and _balanced(b.mailbox)
+    a.close()
+    b.close()
+
+
+def test_lost_messages_release_credits():
+    bus = SimBus(seed=1)
+    a, b = Com(bus), Com(bus, mailbox_capacity=1, mailbox_policy="reject")
+    bus.set_link(a.node_uid, b.node_uid, LinkModel(loss=1.0))
+    for i in range(5):
+        a.broadcast(i)  # sans solde à la perte : MailboxFull dès le 2e envoi
+        a.sendTo(i, b.id)
+        bus.run_for(0.1)
+    assert bus.lost == 10 and _balanced(b.mailbox)
+
+
+def test_renumbering_between_reserve_and_send_releases_credit():
+    bus = OrderedUidBus(["b", "d", "c"])
+    a, x = Com(bus), Com(bus, mailbox_capacity=1, mailbox_policy="reject")
+    late = []
+    reserve = bus.reserve
+
+    def reserve_then_join(*args, **kwargs):
+        credits = reserve(*args, **kwargs)
+        if not late:
+            late.append(Com(bus))  # x passe de l'id 1 à l'id 2
+        return credits
+
+    bus.reserve = reserve_then_join
+    a.sendTo("m", 1)
+    assert late[0].receive(block=False).payload == "m"
+    assert len(x.mailbox) == 0 and _balanced(x.mailbox)
+    for c in (a, x, late[0]):
+        c.close()
+
+
+def test_unreserved_deposit_never_waits():
+    mb = Mailbox(capacity=1, policy="block")
+    done = threading.Event()
+
+    def put_two():
+        mb.put_many([_msg(1), _msg(2)])
+        mb.put(_msg(3))
+        done.set()
+
+    threading.Thread(target=put_two, daemon=True).start()
+    assert done.wait(2)
+    assert len(mb) == 3
+
+
+def test_reject_leaves_no_reservation():
+    bus = Bus()
+    a, b = Com(bus), Com(bus, mailbox_capacity=2, mailbox_policy="reject")
+    a.broadcastMany([1, 2])
+    with pytest.raises(MailboxFull):
+        a.broadcast(3)
+    assert _balanced(b.mailbox) and len(b.mailbox) == 2
+    a.close()
+    b.close()
+
+
+
+def test_timer_flush_never_blocks_the_scheduler():
+    bus = Bus()
+    a, b = Com(bus), Com(bus, mailbox_capacity=2, mailbox_policy="block")
+    x, y = Com(bus), Com(bus)
+    try:
+        a.sendToMany([1, 2], b.id)  # BAL de b pleine, personne ne lit
+        buf = a.sendBuffer(max_msgs=100, max_delay=0.01)
+        buf.sendTo(3, b.id)
+        time.sleep(0.1)  # le vidage du minuteur attend la place (hors scheduler)
+        fired = threading.Event()
+        bus.scheduler.call_later(0.01, fired.set)
+        assert fired.wait(2)
+        x.requestSCAsync().result(timeout=2)  # saut du jeton inactif : un minuteur
+        x.releaseSC()
+        assert [b.receive(timeout=2).payload for _ in range(3)] == [1, 2, 3]
+    finally:
+        for c in (a, b, x, y):
+            c.close()
+
+
+def test_reserve_from_scheduler_thread_does_not_wait():
+    bus = Bus()
+    a, b = Com(bus), Com(bus, mailbox_capacity=1, mailbox_policy="block")
+    a.sendTo(1, b.id)
+    errors = []
+    done = threading.Event()
+
+    def send():
+        try:
+            a.sendTo(2, b.id)
+        except MailboxFull as e:
+            errors.append(e)
+        done.set()
+
+    bus.scheduler.call_later(0, send)
+    assert done.wait(2) and len(errors) == 1
+    assert _balanced(b.mailbox)
+    a.close()
+    b.close()
+
+
+def test_batch_larger_than_capacity_is_refused():
+    bus = Bus()
+    a, b = Com(bus), Com(bus, mailbox_capacity=2, mailbox_policy="block")
+    with pytest.raises(MailboxFull):
+        a.sendToMany([1, 2, 3], b.id)
+    a.sendToMany([1, 2], b.id)
+    assert len(b.mailbox) == 2 and _balanced(b.mailbox)
+    a.close()
+    b.close()
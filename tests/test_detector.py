@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+from Com import Com
+from FailureDetector import FailureDetector
+from SimBus import SimBus
+
+
+def test_fixed_timeout_and_lazy_reinsertion():
+    d = FailureDetector(timeout=1.0)
+    d.watch("a", 0.0)
+    d.watch("b", 0.0)
+    assert d.next_deadline() == 1.0
+    d.heartbeat("a", 0.8)
+    assert d.expired(0.9) == []
+    assert d.expired(1.0) == ["b"]  # a est ré-empilé avec sa nouvelle échéance
+    assert d.next_deadline() == pytest.approx(1.8)
+    assert d.expired(1.7) == []
+    assert d.expired(1.8) == ["a"]
+    assert d.next_deadline() is None
+
+
+def test_forgotten_or_unknown_nodes_are_ignored():
+    d = FailureDetector(timeout=1.0)
+    d.watch("a", 0.0)
+    d.forget("a")
+    d.heartbeat("zz", 0.5)
+    assert d.next_deadline() is None
+    assert d.expired(10.0) == []
+    assert d.phi("a", 1.0) == math.inf
+
+
+def test_phi_deadline_follows_observed_interval():
+    thr = 3.0
+    d = FailureDetector(phi_threshold=thr, interval=1.0)
+    d.watch("fast", 0.0)
+    d.watch("slow", 0.0)
+    for i in range(1, 11):
+        d.heartbeat("fast", 0.1 * i)
+        d.heartbeat("slow", 0.5 * i)
+    # phi(t) = t / moyenne * log10(e) : seuil atteint à last + thr * moyenne * ln(10)
+    assert d.phi("fast", 1.0 + 0.1) == pytest.approx(1.0 * math.log10(math.e))
+    fast_at = 1.0 + thr * 0.1 * math.log(10)
+    slow_at = 5.0 + thr * 0.5 * math.log(10)
+    assert d.expired(fast_at - 1e-6) == []
+    assert d.expired(fast_at + 1e-6) == ["fast"]
+    assert d.expired(slow_at - 1e-6) == []
+    assert d.expired(slow_at + 1e-6) == ["slow"]
+
+
+def test_phi_uses_default_interval_until_enough_samples():
+    d = FailureDetector(phi_threshold=1.0, interval=2.0)
+    d.watch("a", 0.0)
+    d.heartbeat("a", 0.1)
+    assert d.phi("a", 0.1 + 2.0) == pytest.approx(math.log10(math.e))
+
+
+@pytest.mark.parametrize("phi", [None, 8.0])
+def test_crashed_member_is_evicted(phi):
+    bus = SimBus(seed=0, detector=FailureDetector(phi_threshold=phi))
+    coms = [Com(bus) for _ in range(4)]
+    victim = coms[1]
+    bus.run_for(20)  # heartbeats réguliers : personne n'est évincé
+    assert len(bus.view) == 4
+    bus.crash(victim)
+    bus.run_for(60)
+    assert len(bus.view) == 3 and victim.node_uid not in bus.view
+    assert all(c.world_size == 3 for c in coms if c is not victim)
+
+
+def test_phi_eviction_is_not_delayed_by_initial_estimate():
+    # heartbeats toutes les 0.1 s, intervalle supposé 1 s : la première échéance
+    # (8 * 1 * ln 10 ~ 18 s) doit avancer dès que les intervalles sont observés
+    bus = SimBus(seed=0, detector=FailureDetector(phi_threshold=8.0, interval=1.0))
+    coms = [Com(bus, heartbeat_sec=0.1) for _ in range(3)]
+    bus.run_for(1.0)
+    bus.crash(coms[0])
+    bus.run_for(3.0)  # 8 * 0.1 * ln 10 ~ 1.8 s
+    assert coms[0].node_uid not in bus.view
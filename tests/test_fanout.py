@@ -0,0 +1,109 @@
+import pytest
+
+from Com import Com
+from Message import AckMessage
+from SimBus import LinkModel, SimBus
+
+
+def _tree(bus, n, k=2, **kw):
+    return sorted((Com(bus, fanout="tree", fanout_k=k, **kw) for _ in range(n)), key=lambda c: c.id)
+
+
+@pytest.mark.parametrize("seed", range(16))
+@pytest.mark.parametrize("change", ["join", "leave"])
+@pytest.mark.parametrize("sync", [False, True])
+def test_tree_broadcast_survives_view_change(seed, change, sync):
+    # la vue change entre l'envoi de la racine et le premier relais
+    bus = SimBus(seed=seed)
+    coms = _tree(bus, 8, ack_timeout=0.05, ack_retries=3)
+    root = coms[seed % 8]
+    fut = root.broadcastSyncAsync("x") if sync else root.broadcast("x")
+    gone = None
+    if change == "join":
+        Com(bus, fanout="tree", fanout_k=2)
+    else:
+        gone = coms[(seed + 3) % 8]
+        gone.close()
+    if sync:
+        bus.run_until(fut, timeout=5)
+    bus.run_for(1.0)
+    for c in coms:
+        if c is not root and c is not gone:
+            assert c.receive(block=False).payload == "x", c.id
+            assert c.receive(block=False) is None  # doublons ignorés
+
+
+def _payloads(com):
+    return [m.payload for m in iter(lambda: com.receive(block=False), None)]
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 8])
+@pytest.mark.parametrize("k", [1, 2, 4])
+@pytest.mark.parametrize("sync", [False, True])
+def test_tree_reaches_every_member_once(n, k, sync):
+    bus = SimBus(seed=n)
+    coms = _tree(bus, n, k)
+    for root in coms:
+        if sync:
+            bus.run_until(root.broadcastSyncAsync(root.id), timeout=5)
+        else:
+            root.broadcast(root.id)
+    bus.run_for(1.0)
+    for c in coms:
+        assert sorted(_payloads(c)) == [r.id for r in coms if r is not c]
+
+
+def test_sync_acks_are_aggregated_along_the_tree():
+    bus = SimBus(seed=0)
+    coms = _tree(bus, 8, k=2)
+    root = coms[0]
+    acks = []
+    post = root._post
+    root._post = lambda msg: (acks.append(msg.sender) if isinstance(msg, AckMessage) else None, post(msg))
+    bus.run_until(root.broadcastSyncAsync("x"), timeout=5)
+    assert sorted(acks) == [1, 2]  # ses 2 enfants, pas les 7 membres
+    assert all(_payloads(c) == ["x"] for c in coms[1:])
+
+
+def test_silent_child_subtree_is_flattened():
+    # n=7, k=2, racine 0 : 1 a pour enfants 3 et 4
+    bus = SimBus(seed=0)
+    coms = _tree(bus, 7, k=2, ack_timeout=0.05, ack_retries=10)
+    root, child = coms[0], coms[1]
+    bus.set_link(root.node_uid, child.node_uid, LinkModel(latency=0.2))
+    fut = root.broadcastSyncAsync("x")
+    bus.run_for(0.1)  # timeout passé, 1 n'a encore rien reçu
+    assert child.receive(block=False) is None
+    assert _payloads(coms[3]) == ["x"] and _payloads(coms[4]) == ["x"]  # copies directes
+    assert all(_payloads(c) == ["x"] for c in (coms[2], coms[5], coms[6]))
+    bus.run_until(fut, timeout=5)
+    bus.run_for(1.0)
+    assert _payloads(child) == ["x"]
+    assert all(_payloads(c) == [] for c in coms[2:])  # pas de doublon après l'aplatissement
+
+
+def test_duplicate_relay_is_not_delivered_twice():
+    bus = SimBus(seed=0)
+    coms = _tree(bus, 4, k=2)
+    coms[0].broadcast("x")
+    bus.run_for(0.1)
+    msg = coms[3].receive(block=False)
+    coms[3]._post(msg)
+    bus.run_for(0.1)
+    assert msg.payload == "x" and coms[3].receive(block=False) is None
+
+
+def test_gossip_reaches_nearly_every_member_once():
+    # épidémique (chaque nœud relaie une fois à k pairs) : couverture probabiliste
+    received = 0
+    for seed in range(20):
+        bus = SimBus(seed=seed)
+        coms = [Com(bus, fanout="gossip", fanout_k=3) for _ in range(16)]
+        coms[0].broadcast("g")
+        bus.run_for(1.0)
+        assert _payloads(coms[0]) == []
+        for c in coms[1:]:
+            got = _payloads(c)
+            assert got in ([], ["g"])  # jamais deux fois
+            received += len(got)
+    assert received >= 0.9 * 20 * 15
@@ -0,0 +1,106 @@
+import random, threading
+
+import pytest
+
+from Mailbox import Mailbox
+from Message import Message, MsgKind
+
+KINDS = (MsgKind.USER, MsgKind.TOKEN)
+
+
+def _msg(sender, i, kind=MsgKind.USER):
+    return Message(kind, i, 0, sender)
+
+
+def _check_index(mb: Mailbox):
+    """ Invariants : chaque file (émetteur, kind) liste, en ordre croissant, exactement
+    les n° d'arrivée de ses messages ; pas de file vide ; octets = somme des tailles."""
+    seen = []
+    for (sender, kind), q in mb._queues.items():
+        assert q and list(q) == sorted(q)
+        for n in q:
+            m = mb._order[n]
+            assert (m.sender, m.kind) == (sender, kind)
+        seen.extend(q)
+    assert sorted(seen) == list(mb._order)
+    if mb.max_bytes is not None:
+        assert mb._bytes == sum(mb._sizes.values()) and set(mb._sizes) == set(mb._order)
+
+
+def test_sender_and_kind_filters():
+    mb = Mailbox()
+    for i, (s, k) in enumerate([(0, MsgKind.USER), (1, MsgKind.USER), (0, MsgKind.TOKEN),
+                                (1, MsgKind.TOKEN), (0, MsgKind.USER)]):
+        mb.put(_msg(s, i, k))
+    assert mb.get(block=False, sender=1).payload == 1
+    assert mb.get(block=False, kind=MsgKind.TOKEN).payload == 2
+    assert mb.get(block=False, sender=0, kind=MsgKind.USER).payload == 0
+    assert mb.get(block=False, sender=2) is None
+    assert [mb.get(block=False).payload for _ in range(2)] == [3, 4]
+    _check_index(mb)
+
+
+def test_predicate_scans_in_arrival_order_and_combines_with_filters():
+    mb = Mailbox()
+    mb.put_many([_msg(i % 3, i) for i in range(9)])
+    odd = lambda m: m.payload % 2 == 1
+    assert mb.get(block=False, predicate=odd).payload == 1
+    assert mb.get(block=False, sender=0, predicate=odd).payload == 3
+    assert mb.get(block=False, sender=0, predicate=lambda m: m.payload > 100) is None
+    assert [m.payload for m in iter(lambda: mb.get(block=False), None)] == [0, 2, 4, 5, 6, 7, 8]
+    _check_index(mb)
+
+
+def test_blocking_get_waits_for_a_match():
+    mb = Mailbox()
+    got = []
+    t = threading.Thread(target=lambda: got.append(mb.get(timeout=5, sender=2)))
+    t.start()
+    mb.put(_msg(1, "other"))
+    mb.put(_msg(2, "mine"))
+    t.join(5)
+    assert got[0].payload == "mine" and len(mb) == 1
+    assert mb.get(timeout=0.01, sender=3) is None
+
+
+@pytest.mark.parametrize("policy, kept, dropped", [("reject", [0, 1, 2, 3, 4], 2),
+                                                   ("drop_oldest", [2, 3, 4, 5, 6], 2)])
+def test_unreserved_batch_never_exceeds_capacity(policy, kept, dropped):
+    mb = Mailbox(capacity=5, policy=policy)
+    mb.put_many([_msg(0, i) for i in range(3)])
+    mb.put_many([_msg(1, i) for i in range(3, 7)])
+    assert [m.payload for m in mb._order.values()] == kept and mb.dropped == dropped
+    _check_index(mb)
+
+
+def _alive(model, mb):
+    live = {id(m) for m in mb._order.values()}
+    return [m for m in model if id(m) in live]
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("bounded", [False, True])
+def test_index_stays_consistent_under_random_removals(seed, bounded):
+    rng = random.Random(seed)
+    mb = Mailbox(capacity=40, max_bytes=4000, policy="drop_oldest") if bounded else Mailbox()
+    model = []  # messages présents, dans l'ordre d'arrivée
+    sent = 0
+    for _ in range(400):
+        if rng.random() < 0.4:
+            batch = [_msg(rng.randrange(4), sent + k, rng.choice(KINDS)) for k in range(rng.randint(1, 5))]
+            sent += len(batch)
+            mb.put_many(batch) if len(batch) > 1 else mb.put(batch[0])
+            model = _alive(model + batch, mb)  # "drop_oldest" : les plus anciens ont pu partir
+        else:
+            sender = rng.choice([None, rng.randrange(4)])
+            kind = rng.choice([None, *KINDS])
+            pred = rng.choice([None, lambda m: m.payload % 3 == 0])
+            got = mb.get(block=False, sender=sender, kind=kind, predicate=pred)
+            expect = next((m for m in model if (sender is None or m.sender == sender)
+                           and (kind is None or m.kind == kind) and (pred is None or pred(m))), None)
+            assert got is expect
+            if got is not None:
+                model.remove(got)
+        assert list(mb._order.values()) == model
+        assert len(mb) <= 40 or not bounded
+        _check_index(mb)
@@ -0,0 +1,33 @@
+import threading
+
+from Metrics import Metrics
+
+
+def _run_threads(m, n):
+    def work():
+        m.inc("sent")
+        m.observe("ack_rtt", 0.001)
+    for _ in range(n):
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+
+
+def test_dead_thread_buffers_are_folded():
+    m = Metrics()
+    _run_threads(m, 200)
+    assert len(m._buffers) <= 2  # thread créateur + dernier thread terminé
+    snap = m.snapshot()
+    assert snap["counters"]["sent"] == 200
+    assert snap["histograms"]["ack_rtt"]["count"] == 200
+    assert len(m._buffers) == 1
+
+
+def test_reset_clears_folded_buffers():
+    m = Metrics()
+    _run_threads(m, 5)
+    m.inc("received", 3)
+    m.reset()
+    snap = m.snapshot()
+    assert snap["counters"] == {"sent": 0, "received": 0, "acked": 0}
+    assert snap["histograms"]["ack_rtt"]["count"] == 0
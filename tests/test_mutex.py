@@ -0,0 +1,129 @@
+import itertools, threading, time
+
+import pytest
+
+import Mutex
+from Bus import Bus
+from Com import Com
+
+
+class OrderedUidBus(Bus):
+    """ Bus dont les UID sont fournis par le test (pour forcer une renumérotation)."""
+
+    def __init__(self, uids, **kwargs):
+        super().__init__(**kwargs)
+        self._uids = iter(uids)
+
+    def new_uid(self) -> str:
+        return next(self._uids)
+
+
+@pytest.fixture
+def no_census(monkeypatch):
+    # une requête ne doit pas aboutir grâce à la régénération du jeton
+    monkeypatch.setattr(Mutex, "TOKEN_TIMEOUT_SEC", 30.0)
+
+
+def _close(coms):
+    for c in coms:
+        c.close()
+
+
+@pytest.mark.parametrize("mode", ["ring", "suzuki", "shared"])
+@pytest.mark.parametrize("queued", [False, True])
+def test_sc_after_renumbering(mode, queued, no_census):
+    bus = OrderedUidBus(["b", "d", "a", "c"], queued=queued)
+    b, d = Com(bus, sc_mode=mode), Com(bus, sc_mode=mode)
+    coms = [b, d]
+    try:
+        # tours inégaux : les numéros de requête de b et d divergent
+        for c in (d, b, d, d, b, d, d, d):
+            c.requestSCAsync().result(timeout=2)
+            c.releaseSC()
+        # "a" puis "c" décalent les ids des deux premiers
+        coms.append(Com(bus, sc_mode=mode))
+        coms.append(Com(bus, sc_mode=mode))
+        assert (b.id, d.id) == (1, 3)
+        for _ in range(3):
+            for c in (b, d, coms[2], coms[3]):
+                t0 = time.monotonic()
+                c.requestSCAsync().result(timeout=2)
+                assert time.monotonic() - t0 < 1.0
+                c.releaseSC()
+    finally:
+        _close(coms)
+
+
+@pytest.mark.parametrize("mode", ["ring", "suzuki", "shared"])
+def test_mutual_exclusion_under_churn(mode, no_census):
+    bus = Bus(queued=True)
+    coms = [Com(bus, sc_mode=mode) for _ in range(3)]
+    inside, overlaps, done = [0], [0], [0]
+    lock = threading.Lock()
+
+    def work(c):
+        for _ in range(15):
+            c.requestSCAsync().result(timeout=5)
+            with lock:
+                inside[0] += 1
+                overlaps[0] += inside[0] > 1
+            time.sleep(0.0005)
+            with lock:
+                inside[0] -= 1
+                done[0] += 1
+            c.releaseSC()
+
+    threads = [threading.Thread(target=work, args=(c,)) for c in coms]
+    for t in threads:
+        t.start()
+    joined = []
+    try:
+        for _ in range(3):  # arrivées pendant les échanges
+            joined.append(Com(bus, sc_mode=mode))
+            time.sleep(0.005)
+        for t in threads:
+            t.join(20)
+        assert not any(t.is_alive() for t in threads)
+        assert done[0] == 45 and overlaps[0] == 0
+    finally:
+        _close(coms + joined)
+
+
+def test_named_resources_are_independent():
+    bus = Bus()
+    a, b = Com(bus, sc_mode="suzuki"), Com(bus, sc_mode="suzuki")
+    try:
+        a.requestSC("x")
+        b.requestSCAsync("y").result(timeout=2)  # "x" tenue ne bloque pas "y"
+        fut = b.requestSCAsync("x")
+        assert not fut.done()
+        a.releaseSC("x")
+        fut.result(timeout=2)
+        b.releaseSC("x")
+        b.releaseSC("y")
+    finally:
+        _close([a, b])
+
+
+def test_shared_permits_and_writer():
+    bus = Bus(queued=True)
+    coms = [Com(bus, sc_mode="shared", sc_permits=2) for _ in range(3)]
+    try:
+        r1 = coms[0].requestSCAsync("db", shared=True)
+        r2 = coms[1].requestSCAsync("db", shared=True)
+        r1.result(timeout=2)
+        r2.result(timeout=2)
+        w = coms[2].requestSCAsync("db")
+        time.sleep(0.05)
+        assert not w.done()  # rédacteur exclu tant que des lecteurs tiennent des permis
+        coms[0].releaseSC("db")
+        coms[1].releaseSC("db")
+        w.result(timeout=2)
+        r3 = coms[0].requestSCAsync("db", shared=True)
+        time.sleep(0.05)
+        assert not r3.done()
+        coms[2].releaseSC("db")
+        r3.result(timeout=2)
+        coms[0].releaseSC("db")
+    finally:
+        _close(coms)
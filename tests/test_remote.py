@@ -0,0 +1,88 @@
+import os, tempfile, threading, time
+
+import pytest
+
+from Com import Com
+from RemoteBus import BusServer, RemoteBus
+
+
+@pytest.fixture
+def thread_errors(monkeypatch):
+    """ Exceptions non rattrapées dans des threads pendant le test."""
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", lambda args: errors.append(args.exc_value))
+    return errors
+
+
+def _start(n):
+    address = os.path.join(tempfile.mkdtemp(), "bus")
+    server = BusServer(address, expected=n)
+    buses = [RemoteBus(address) for _ in range(n)]
+    coms = [None] * n
+    threads = [threading.Thread(target=lambda i=i: coms.__setitem__(i, Com(buses[i])))
+               for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return server, buses, sorted(coms, key=lambda c: c.id)
+
+
+@pytest.mark.parametrize("round_", range(5))
+def test_shutdown_is_clean(round_, thread_errors):
+    server, buses, coms = _start(3)
+    coms[0].broadcast("hello")
+    for c in coms[1:]:
+        assert c.receive(timeout=5).payload == "hello"
+    for c in coms:
+        c.close()
+    for b in buses:
+        b.close()
+    server.close()
+    for b in buses:
+        assert not b._reader.is_alive()
+    for p in server._peers:
+        assert not p.reader.is_alive()
+    assert thread_errors == []
+
+
+def test_server_close_wakes_clients(thread_errors):
+    server, buses, coms = _start(2)
+    server.close()
+    for b in buses:
+        b._reader.join(5)
+        assert not b._reader.is_alive()
+        assert b._call("claim_token", "x", 0) is None  # ne bloque pas
+        b.close()
+    assert thread_errors == []
+
+
+@pytest.mark.parametrize("policy, kept", [("reject", 2), ("block", 6)])
+def test_bounded_mailbox_applies_policy_on_arrival(policy, kept, thread_errors):
+    # pas de crédits entre processus : la politique s'applique à l'arrivée, sans attendre
+    address = os.path.join(tempfile.mkdtemp(), "bus")
+    server = BusServer(address, expected=2)
+    buses = [RemoteBus(address) for _ in range(2)]
+    coms = [None, None]
+    kwargs = [{}, {"mailbox_capacity": 2, "mailbox_policy": policy}]
+    threads = [threading.Thread(target=lambda i=i: coms.__setitem__(i, Com(buses[i], **kwargs[i])))
+               for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    a, b = coms
+    assert buses[0].reserve([1], exclude_uid=a.node_uid) is None
+    for i in range(5):
+        a.broadcast(i)
+    a.broadcastSyncAsync("fin", timeout=None).result(timeout=5)
+    deadline = time.monotonic() + 5
+    while len(b.mailbox) + b.mailbox.dropped < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)  # l'ACK part avant le dépôt
+    assert (len(b.mailbox), b.mailbox.dropped) == (kept, 6 - kept)
+    for c in coms:
+        c.close()
+    for bus in buses:
+        bus.close()
+    server.close()
+    assert thread_errors == []
@@ -0,0 +1,103 @@
+from Bus import Bus
+from Com import Com
+from Message import AckMessage, AckRangeMessage
+from SimBus import SimBus
+
+
+def _coms(bus, n):
+    return sorted((Com(bus) for _ in range(n)), key=lambda c: c.id)
+
+
+def _payloads(com):
+    return [m.payload for m in iter(lambda: com.receive(block=False), None)]
+
+
+def test_size_triggered_flush():
+    bus = SimBus(seed=0)
+    a, b = _coms(bus, 2)
+    buf = a.sendBuffer(max_msgs=3, max_delay=None)
+    buf.broadcast(1)
+    buf.broadcast(2)
+    bus.run_for(1.0)
+    assert len(buf) == 2 and _payloads(b) == []
+    buf.broadcast(3)
+    assert len(buf) == 0
+    bus.run_for(0.1)
+    assert _payloads(b) == [1, 2, 3]
+
+
+def test_time_triggered_flush():
+    bus = SimBus(seed=0)
+    a, b = _coms(bus, 2)
+    buf = a.sendBuffer(max_msgs=100, max_delay=0.01)
+    buf.sendTo("x", b.id)
+    bus.run_for(0.005)
+    assert _payloads(b) == []
+    bus.run_for(0.01)
+    assert len(buf) == 0 and _payloads(b) == ["x"]
+
+
+def test_runs_keep_order_and_batch_by_target():
+    bus = Bus()
+    a, b, c = _coms(bus, 3)
+    calls = []
+    a.broadcastMany = lambda payloads: calls.append((None, list(payloads)))
+    a.sendToMany = lambda payloads, dest: calls.append((dest, list(payloads)))
+    with a.sendBuffer(max_delay=None) as buf:
+        buf.broadcast(1)
+        buf.sendTo(2, b.id)
+        buf.sendTo(3, b.id)
+        buf.broadcast(4)
+        buf.broadcast(5)
+    assert calls == [(None, [1]), (b.id, [2, 3]), (None, [4, 5])]
+
+
+def test_flushed_messages_arrive_in_order():
+    bus = Bus()
+    a, b, c = _coms(bus, 3)
+    with a.sendBuffer(max_delay=None) as buf:
+        buf.broadcast(1)
+        buf.sendTo(2, b.id)
+        buf.broadcast(3)
+    assert _payloads(b) == [1, 2, 3]
+    assert _payloads(c) == [1, 3]
+
+
+def test_send_to_many_is_ordered_and_stamped_consecutively():
+    bus = Bus()
+    a, b = _coms(bus, 2)
+    a.sendToMany(range(5), b.id)
+    msgs = list(iter(lambda: b.receive(block=False), None))
+    assert [m.payload for m in msgs] == [0, 1, 2, 3, 4]
+    assert [m.lamport for m in msgs] == list(range(msgs[0].lamport, msgs[0].lamport + 5))
+    assert all(m.dest == b.id for m in msgs)
+
+
+def _spy_acks(com):
+    acks = []
+    post = com._post
+    com._post = lambda msg: (acks.append(msg) if isinstance(msg, AckMessage) else None, post(msg))
+    return acks
+
+
+def test_batch_is_acknowledged_by_one_range_ack():
+    bus = Bus()
+    a, b, c = _coms(bus, 3)
+    acks = _spy_acks(a)
+    fut = a.broadcastMany(range(4), sync=True)
+    fut.result(timeout=5)
+    assert sorted(m.uid for m in acks) == sorted([b.node_uid, c.node_uid])
+    for m in acks:
+        assert type(m) is AckRangeMessage and m.upto - m.seq == 3
+
+
+def test_partial_range_ack_does_not_resolve_a_batch():
+    bus = Bus()
+    a, b = _coms(bus, 2)
+    b._post = b._post_many = lambda msg: None  # b ne délivre (ni n'acquitte) rien
+    fut = a.broadcastMany(range(3), sync=True)
+    seq = min(a._pending_acks)
+    a._post(AckRangeMessage(seq, seq + 1, b.id, b.node_uid))
+    assert not fut.done()
+    a._post(AckRangeMessage(seq, seq + 2, b.id, b.node_uid))
+    assert fut.done() and fut.exception() is None
@@ -0,0 +1,120 @@
+import gc, os, tempfile, threading, time
+
+import pytest
+
+from Com import Com
+from RemoteBus import BusServer, RemoteBus
+from ShmPayload import SHM_DIR, _PREFIX, attach, export, shareable, unlink
+
+PAYLOAD = bytes(range(256)) * 64  # 16 Kio
+
+
+def _segments():
+    return {f for f in os.listdir(SHM_DIR) if f.startswith(_PREFIX)}
+
+
+def _wait(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            return False
+        gc.collect()
+        time.sleep(0.01)
+    return True
+
+
+def _start(n, **kw):
+    address = os.path.join(tempfile.mkdtemp(), "bus")
+    server = BusServer(address, expected=n)
+    buses = [RemoteBus(address, **kw) for _ in range(n)]
+    coms = [None] * n
+    threads = [threading.Thread(target=lambda i=i: coms.__setitem__(i, Com(buses[i])))
+               for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return server, buses, sorted(coms, key=lambda c: c.id)
+
+
+def _stop(server, buses, coms):
+    for c in coms:
+        c.close()
+    for b in buses:
+        b.close()
+    server.close()
+
+
+def test_shareable_threshold():
+    assert shareable(b"x" * 10, 10) and not shareable(b"x" * 9, 10)
+    assert shareable(memoryview(bytearray(10)), 10)
+    assert not shareable(b"x" * 10, None)
+    assert not shareable("x" * 10, 1)  # seuls les tampons passent en mémoire partagée
+    assert not shareable(b"", 0)
+
+
+def test_export_attach_release_unlink():
+    handle = export(PAYLOAD)
+    released = []
+    view = attach(handle, released.append)
+    assert handle.name in _segments()
+    assert bytes(view) == PAYLOAD and view.readonly
+    copy = view[10:20]  # une tranche garde la projection vivante
+    del view
+    gc.collect()
+    assert released == []
+    del copy
+    assert _wait(lambda: released == [handle.name])
+    unlink(handle.name)
+    unlink(handle.name)  # idempotent
+    assert handle.name not in _segments()
+
+
+def test_segment_removed_after_last_release():
+    server, buses, coms = _start(3, shm_threshold=1024)
+    before = _segments()
+    try:
+        coms[0].broadcast(PAYLOAD)
+        got = [c.receive(timeout=5).payload for c in coms[1:]]
+        assert all(isinstance(p, memoryview) and bytes(p) == PAYLOAD for p in got)
+        (name,) = _segments() - before
+        assert _wait(lambda: server._shm_refs.get(name) == 2)  # une référence par livraison
+        del got[0]
+        assert _wait(lambda: server._shm_refs.get(name) == 1)
+        assert name in _segments()
+        del got[0]
+        assert _wait(lambda: name not in _segments())
+        assert server._shm_refs == {}
+    finally:
+        _stop(server, buses, coms)
+
+
+def test_small_payload_is_not_shared():
+    server, buses, coms = _start(2, shm_threshold=1024)
+    before = _segments()
+    try:
+        coms[0].sendTo(b"x" * 100, coms[1].id)
+        assert coms[1].receive(timeout=5).payload == b"x" * 100
+        assert _segments() == before
+    finally:
+        _stop(server, buses, coms)
+
+
+@pytest.mark.parametrize("who", ["client", "server"])
+def test_disconnect_releases_references(who):
+    server, buses, coms = _start(2, shm_threshold=1024)
+    before = _segments()
+    held = None
+    try:
+        coms[0].sendTo(PAYLOAD, coms[1].id)
+        held = coms[1].receive(timeout=5).payload  # jamais relâché explicitement
+        (name,) = _segments() - before
+        if who == "client":
+            coms[1].close()
+            coms[1].bus.close()
+        else:
+            server.close()
+        assert _wait(lambda: name not in _segments())
+        assert bytes(held[:4]) == PAYLOAD[:4]  # la projection reste lisible
+    finally:
+        _stop(server, buses, coms)
@@ -0,0 +1,27 @@
+import pytest
+
+from Com import Com
+from SimBus import LinkModel, SimBus
+
+
+def test_bus_barrier_follows_link_model():
+    bus = SimBus(seed=0, link=LinkModel(latency=0.01))
+    coms = [Com(bus) for _ in range(4)]
+    bus.set_link(coms[2].node_uid, None, LinkModel(latency=0.5))  # arrivée lente
+    t0 = bus.scheduler.now()
+    futs = [c.synchronizeAsync() for c in coms]
+    for fut in futs:
+        bus.run_until(fut, timeout=5)
+    # arrivée la plus lente (0.5 s) puis libération (0.01 s)
+    assert bus.scheduler.now() - t0 == pytest.approx(0.51)
+
+
+def test_lost_barrier_arrival_blocks():
+    bus = SimBus(seed=0)
+    a, b = Com(bus), Com(bus)
+    bus.set_link(b.node_uid, None, LinkModel(loss=1.0))
+    fut = a.synchronizeAsync()
+    b.synchronizeAsync()
+    with pytest.raises(TimeoutError):
+        bus.run_until(fut, timeout=1)
+    assert bus.lost == 1
@@ -0,0 +1,46 @@
+from Bus import Bus
+from Com import Com
+from View import View
+
+
+def test_apply_numbers_epochs_and_stable_slots():
+    v1 = View().apply(joined=["c", "a", "b"])
+    assert (v1.epoch, v1.members, v1.slots, v1.next_slot) == (1, ("a", "b", "c"), (0, 1, 2), 3)
+    v2 = v1.apply(joined=["aa"], left=["b"])
+    assert v2.epoch == 2 and v2.members == ("a", "aa", "c")
+    assert [v2.slot(u) for u in ("a", "aa", "c")] == [0, 3, 2]  # slots inchangés, jamais réutilisés
+    v3 = v2.apply(joined=["b"])
+    assert v3.slot("b") == 4 and v3.next_slot == 5
+
+
+def test_apply_is_deterministic_and_ignores_noise():
+    base = View().apply(joined=["x", "y"])
+    assert base.apply(joined=["z", "w"]).slots == base.apply(joined=["w", "z"]).slots
+    same = base.apply(joined=["x"], left=["nobody"])  # déjà membre / inconnu
+    assert (same.members, same.slots, same.next_slot) == (base.members, base.slots, base.next_slot)
+    assert same.epoch == base.epoch + 1
+    assert "q" not in base.apply(joined=["q"], left=["q"])
+
+
+def test_lookups():
+    v = View().apply(joined=["b", "d", "f"])
+    assert [v.index(u) for u in ("b", "d", "f", "a", "e", "g")] == [0, 1, 2, -1, -1, -1]
+    assert v.uid(1) == "d" and v.uid(3) is None and v.uid(-1) is None
+    assert v.slot("zz") == -1
+    assert len(v) == 3 and "d" in v and "c" not in v
+
+
+def test_bus_views_follow_membership():
+    bus = Bus()
+    a, b, c = (Com(bus, heartbeat_sec=None) for _ in range(3))
+    view = bus.view
+    slots = {u: view.slot(u) for u in view.members}
+    assert view.epoch == 3 and sorted(slots.values()) == [0, 1, 2]
+    b.close()
+    d = Com(bus, heartbeat_sec=None)
+    assert bus.view.epoch == 5
+    assert all(bus.view.slot(u) == slots[u] for u in (a.node_uid, c.node_uid))
+    assert bus.view.slot(d.node_uid) == 3 and b.node_uid not in bus.view
+    assert [x.id for x in sorted((a, c, d), key=lambda x: x.node_uid)] == [0, 1, 2]
+    for x in (a, c, d):
+        x.close()